@@ -5,51 +5,286 @@ Main entry point to our module
 """
 
 # Builtin imports
+import argparse
 import os
+import sys
+from typing import Optional
 
 # Local imports
 from . import cli
-from .image_preprocessor import ImagePreProcessor
+from .exceptions import HoleFillingException
 
-from .hole_filing_lib.hole_filler import HoleFiller
-from .hole_filing_lib.models import Connectivity
-from .hole_filing_lib.weighting import DefaultWeightMechanism
 
-
-def main() -> None:
+def main(argv: Optional[list[str]] = None) -> None:
     """Main function"""
+    if argv is None:
+        argv = sys.argv[1:]
+
+    if argv and argv[0] == "batch":
+        batch_main(argv[1:])
+        return
+
+    if argv and argv[0] == "frames":
+        frames_main(argv[1:])
+        return
+
+    if argv and argv[0] == "serve":
+        serve_main(argv[1:])
+        return
+
+    if argv and argv[0] == "benchmark":
+        benchmark_main(argv[1:])
+        return
+
     parser = cli.get_cli_parser()
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Validate the connectivity
-    if args.connectivity == Connectivity.FOUR.value:
-        connectivity = Connectivity.FOUR
-    elif args.connectivity == Connectivity.EIGHT.value:
-        connectivity = Connectivity.EIGHT
-    else:
+    if args.connectivity not in cli.CONNECTIVITIES:
         print("Error: Invalid pixel connectivity. Supports 4 and 8")
-        return None
-
-    # Preprocess the image and mask
-    preprocessor = ImagePreProcessor.from_images(args.image_path, args.mask_path)
-    processed_img = preprocessor.run()
-
-    # Create an instance of the weighting mechanism
-    weighting = DefaultWeightMechanism(args.z, args.e)
-
-    # Compute the output path
-    output_directory = args.output_directory
-    if not output_directory:
-        output_directory = os.path.dirname(args.image_path)
-
-    filler = HoleFiller(
-        processed_img,
-        weighting=weighting,
-        connectivity=connectivity,
-        output_directory=output_directory,
-        debug=args.debug,
+        return
+
+    # Imported here so that -h and invalid arguments don't pay for NumPy and
+    # OpenCV
+    from . import array_io
+    from .pipeline import fill_image
+    from .result_cache import ResultCache
+
+    from .hole_filing_lib.profiling import format_profile
+
+    if args.raw_shape or array_io.is_npy(args.image_path):
+        array_main(args)
+        return
+
+    cache = None
+    if args.cache:
+        cache = ResultCache(args.cache, args.cache_size * 1024 * 1024)
+
+    try:
+        filler = fill_image(
+            args.image_path,
+            args.mask_path,
+            args.z,
+            args.e,
+            args.connectivity,
+            output_directory=args.output_directory,
+            debug=args.debug,
+            per_component=args.per_component,
+            workers=args.workers if args.workers > 0 else (os.cpu_count() or 1),
+            engine=args.engine,
+            pyramid_levels=args.pyramid_levels,
+            pyramid_band=args.pyramid_band,
+            accuracy=args.accuracy,
+            profile=bool(args.profile),
+            cache=cache,
+            grayscale=args.grayscale,
+            precision=args.precision,
+        )
+    except HoleFillingException as error:
+        print(f"Error: {error}")
+        return
+
+    if cache is not None:
+        cache_stats = cache.stats()
+        print(
+            f"Cache {'hit' if filler is None else 'miss'}: {cache_stats.entries} "
+            f"results, {cache_stats.nbytes / 2**20:.1f} MiB, "
+            f"{cache_stats.evictions} evicted"
+        )
+    if filler is None:
+        return
+
+    stats = filler.parallel_stats
+    if stats:
+        print(
+            f"Filled with {stats.workers} workers ({stats.tasks} tasks) in "
+            f"{stats.wall_time:.3f}s, {stats.cpu_time:.3f}s of worker time, "
+            f"speedup {stats.speedup:.2f}x"
+        )
+
+    if args.per_component:
+        for component in filler.component_stats:
+            print(
+                f"Component {component.label}: {component.hole_count} holes, "
+                f"{component.boundary_count} boundaries, "
+                f"filled in {component.fill_time:.3f}s"
+            )
+
+    if args.profile:
+        for line in format_profile(filler.profile, as_json=args.profile == "json"):
+            print(line)
+
+
+def array_main(args: argparse.Namespace) -> None:
+    """Array mode: fill a .npy or raw image out of core"""
+    from .pipeline import fill_array
+
+    from .hole_filing_lib.profiling import Profiler, format_profile
+
+    output_path = None
+    if not args.in_place:
+        output_directory = args.output_directory or os.path.dirname(args.image_path)
+        output_path = os.path.join(
+            output_directory,
+            f"Filled_c{args.connectivity}_{os.path.basename(args.image_path)}",
+        )
+
+    profiler = Profiler(enabled=bool(args.profile))
+    try:
+        holes, _ = fill_array(
+            args.image_path,
+            args.mask_path,
+            args.z,
+            args.e,
+            args.connectivity,
+            output_path=output_path,
+            engine=args.engine,
+            shape=tuple(args.raw_shape) if args.raw_shape else None,
+            dtype=args.raw_dtype,
+            profiler=profiler,
+        )
+    except HoleFillingException as error:
+        print(f"Error: {error}")
+        return
+
+    print(f"Filled {len(holes)} holes")
+    if args.profile:
+        for line in format_profile(profiler.as_dict(), as_json=args.profile == "json"):
+            print(line)
+
+
+def batch_main(argv: list[str]) -> None:
+    """Batch mode: fill many image/mask pairs"""
+    parser = cli.get_batch_cli_parser()
+    args = parser.parse_args(argv)
+    if args.images and not args.masks:
+        parser.error("--masks is required with --images")
+
+    # Imported here so that the single image mode and -h don't pay for it
+    from . import batch
+
+    try:
+        if args.manifest:
+            items = batch.read_manifest(
+                args.manifest, args.z, args.e, args.connectivity, args.output_directory
+            )
+        else:
+            items = batch.scan_directories(
+                args.images,
+                args.masks,
+                args.z,
+                args.e,
+                args.connectivity,
+                args.output_directory,
+            )
+    except HoleFillingException as error:
+        print(f"Error: {error}")
+        return
+
+    results = batch.run_batch(
+        items, workers=args.workers, log_path=args.log, resume=not args.no_resume
+    )
+    for line in batch.summarize(results):
+        print(line)
+
+
+def frames_main(argv: list[str]) -> None:
+    """Frames mode: fill a sequence of frames that share a mask"""
+    args = cli.get_frames_cli_parser().parse_args(argv)
+
+    # Imported here so that the single image mode and -h don't pay for it
+    from . import frames
+
+    try:
+        stats = frames.fill_frames(
+            args.source,
+            args.mask_path,
+            args.z,
+            args.e,
+            args.connectivity,
+            args.output,
+            per_component=args.per_component,
+            fps=args.fps,
+        )
+    except HoleFillingException as error:
+        print(f"Error: {error}")
+        return
+
+    print(
+        f"Compiled the fill of {stats.holes} holes from {stats.boundaries} "
+        f"boundaries in {stats.compile_time:.3f}s"
     )
-    filler.fill()
+    print(
+        f"Filled {stats.frames} frames in {stats.fill_time:.3f}s, "
+        f"{stats.seconds_per_frame * 1000:.2f}ms per frame. Written to: {args.output}"
+    )
+
+
+def serve_main(argv: list[str]) -> None:
+    """Service mode: fill the images posted over HTTP"""
+    # Imported here so that the single image mode doesn't pay for it
+    from . import server
+
+    args = cli.get_server_cli_parser().parse_args(argv)
+    server.serve(
+        args.host,
+        args.port,
+        args.workers if args.workers > 0 else (os.cpu_count() or 1),
+        args.queue_size,
+        args.max_batch,
+        args.batch_window,
+    )
+
+
+def benchmark_main(argv: list[str]) -> None:
+    """Benchmark mode: measure the engines or compare two measures"""
+    # Imported here so that the single image mode doesn't pay for it
+    from . import benchmark
+
+    parser = cli.get_benchmark_cli_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = []
+        print(benchmark.format_header())
+        for result in benchmark.run_benchmarks(
+            tuple(args.workloads),
+            tuple(args.sizes),
+            args.engines,
+            repeat=args.repeat,
+            startup=not args.no_startup,
+        ):
+            print(benchmark.format_result(result))
+            results.append(result)
+
+        if args.output:
+            benchmark.write_results(args.output, results)
+            print(f"Benchmark results written to: {args.output}")
+        return
+
+    try:
+        baseline = benchmark.read_results(args.baseline)
+        current = benchmark.read_results(args.current)
+    except HoleFillingException as error:
+        print(f"Error: {error}")
+        sys.exit(2)
+
+    for name in benchmark.missing_cases(baseline, current):
+        print(f"Missing: {name} is in the baseline only, not compared")
+    regressions = benchmark.compare(
+        baseline,
+        current,
+        args.time_threshold,
+        args.memory_threshold,
+        args.error_threshold,
+        args.min_seconds,
+    )
+
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    if regressions:
+        sys.exit(1)
+    print("No regression")
 
 
 if __name__ == "__main__":
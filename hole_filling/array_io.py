@@ -0,0 +1,216 @@
+"""
+module: array_io
+
+Out of core input and output of images stored as arrays, for images too
+large to be decoded in memory.
+
+Supported files:
+    .npy    numpy arrays, their shape and dtype are read from the header
+    raw     any other file, a headerless 2D array in row major order whose
+            shape and dtype are given
+
+The files are memory mapped, never read in full. The mask is scanned in
+strips of rows to find the holes and their boundaries. Then only the
+boundary pixels are read from the image and only the hole pixels are written
+to the output, so the pages away from the holes are never touched.
+
+Limitation: a separate output starts as a copy of the whole image file.
+The copy is made by the operating system (a reflink on file systems that
+support it), the pages aren't mapped in the process, but the file is still
+read and written in full. Fill in place to avoid it.
+
+Integer images are in the [0..max] range of their dtype, float images in the
+[0..1] range. Raw masks are 8 bit.
+"""
+
+# Builtin imports
+import os
+import shutil
+from typing import Literal, Optional
+
+# Project specific imports
+import numpy as np
+
+# Local imports
+from .exceptions import HoleFillingException
+from .image_preprocessor import find_mask_holes, read_grayscale, to_unit
+
+from .hole_filing_lib.detection import find_boundary_mask
+from .hole_filing_lib.models import Connectivity, PixelSet
+
+NPY_EXTENSION = ".npy"
+
+# Upper bound, in bytes, of a strip of rows scanned at once: 64 MiB
+CHUNK_BYTES = 64 * 1024 * 1024
+
+# Memory map modes of numpy
+MapMode = Literal["r", "r+", "w+", "c"]
+
+# -----------------------------------------------------------------------------#
+# Files
+# -----------------------------------------------------------------------------#
+
+
+def is_npy(path: str) -> bool:
+    """
+    Return True if the path is a .npy file
+    """
+    return os.path.splitext(path)[1].lower() == NPY_EXTENSION
+
+
+def open_array(
+    path: str,
+    mode: MapMode = "r",
+    shape: Optional[tuple[int, int]] = None,
+    dtype: "np.typing.DTypeLike" = np.uint8,
+) -> np.memmap:
+    """
+    Memory map an existing 2D array file.
+
+    Args:
+        path (str): Location of a .npy or raw file
+        mode (MapMode): "r" to read only, "r+" to update in place. Defaults
+            to "r"
+        shape (tuple[int, int]): Rows and columns of a raw file. Ignored for
+            .npy files
+        dtype (np.dtype): Type of the pixels of a raw file. Ignored for .npy
+            files. Defaults to uint8
+
+    Returns:
+        A memory mapped 2D array
+
+    Raises:
+        HoleFillingException
+    """
+    if not os.path.exists(path):
+        raise HoleFillingException(f"FileNotFound: {path}")
+
+    try:
+        if is_npy(path):
+            array = np.load(path, mmap_mode=mode)
+        else:
+            if shape is None:
+                raise HoleFillingException(
+                    f"The shape of the raw file is needed: {path}"
+                )
+            expected = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            if os.path.getsize(path) != expected:
+                raise HoleFillingException(
+                    f"Size mismatch: {path} is not a {shape[0]}x{shape[1]} "
+                    f"{np.dtype(dtype).name} array"
+                )
+            array = np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+    except (OSError, ValueError) as error:
+        raise HoleFillingException(f"UnsupportedArray: {path}: {error}") from None
+
+    if array.ndim != 2:
+        raise HoleFillingException(f"Expected a 2D array: {path} is {array.ndim}D")
+    return array
+
+
+def open_mask(path: str, shape: tuple[int, int]) -> np.ndarray:
+    """
+    Open a mask: memory map a .npy or a raw 8 bit file, or read an image
+    file that OpenCV can decode.
+
+    Args:
+        path (str): Location of the mask file
+        shape (tuple[int, int]): Rows and columns of a raw file
+
+    Returns:
+        A 2D array
+
+    Raises:
+        HoleFillingException
+    """
+    import cv2
+
+    if not is_npy(path) and os.path.exists(path) and cv2.haveImageReader(path):
+        return read_grayscale(path)
+    return open_array(path, shape=shape)
+
+
+def copy_file(source: str, target: str) -> None:
+    """
+    Copy an array file, header included, without mapping it in the process.
+    The operating system copies the data, or clones it on file systems that
+    support reflinks.
+
+    Args:
+        source (str): Location of the file to copy
+        target (str): Location of the copy
+
+    Raises:
+        HoleFillingException
+    """
+    try:
+        shutil.copyfile(source, target)
+    except OSError as error:
+        raise HoleFillingException(f"CopyFailed: {target}: {error}") from None
+
+
+def chunk_rows(array: np.ndarray, chunk_bytes: int = CHUNK_BYTES) -> int:
+    """
+    Number of rows of the array that fit in chunk_bytes. Always at least 1.
+    """
+    return max(1, chunk_bytes // max(array.shape[1] * array.itemsize, 1))
+
+
+# -----------------------------------------------------------------------------#
+# Detection
+# -----------------------------------------------------------------------------#
+
+
+def scan_holes(
+    mask: np.ndarray,
+    image: np.ndarray,
+    connectivity: Connectivity,
+    rows: Optional[int] = None,
+) -> tuple[PixelSet, PixelSet]:
+    """
+    Find the holes of the mask and their boundaries, a strip of rows at a
+    time. Each strip is scanned with one row of the strips around it so that
+    the boundaries across strips are found.
+
+    Args:
+        mask (np.ndarray): Mask in the range [0..1], or [0..max] for integers
+        image (np.ndarray): Image the boundary values are read from
+        connectivity (Connectivity): Pixel connectivity
+        rows (int): Optional. Number of rows scanned at once. Defaults to
+            the rows that fit in CHUNK_BYTES
+
+    Returns:
+        A tuple of PixelSet, the holes and the boundaries. The boundaries
+        carry their value in the [0..1] range.
+
+    Raises:
+        HoleFillingException
+    """
+    if mask.shape != image.shape:
+        raise HoleFillingException(
+            "Resolution mismatch. Image and Mask should be of same resolution."
+        )
+    if rows is None:
+        rows = chunk_rows(mask)
+
+    height = mask.shape[0]
+    hole_rows, hole_cols, boundary_rows, boundary_cols = [], [], [], []
+    for start in range(0, height, rows):
+        stop = min(start + rows, height)
+        top, bottom = max(start - 1, 0), min(stop + 1, height)
+
+        strip = find_mask_holes(np.asarray(mask[top:bottom]))
+        center = slice(start - top, stop - top)
+        boundary = find_boundary_mask(strip, connectivity)[center]
+
+        found_rows, found_cols = np.nonzero(strip[center])
+        hole_rows.append(found_rows + start)
+        hole_cols.append(found_cols)
+        found_rows, found_cols = np.nonzero(boundary)
+        boundary_rows.append(found_rows + start)
+        boundary_cols.append(found_cols)
+
+    holes = PixelSet(np.concatenate(hole_rows), np.concatenate(hole_cols))
+    b_rows, b_cols = np.concatenate(boundary_rows), np.concatenate(boundary_cols)
+    boundaries = PixelSet(b_rows, b_cols, to_unit(image[b_rows, b_cols]))
+    return holes, boundaries
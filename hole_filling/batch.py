@@ -0,0 +1,368 @@
+"""
+module: batch
+
+Fills many image/mask pairs in a single interpreter. The pairs are read from a
+manifest (CSV or JSON lines) or from a directory of images and a directory of
+masks, and fanned out over a pool of worker processes, so the cost of starting
+Python and importing cv2 is paid once per worker instead of once per pair.
+
+Manifest columns (CSV header or JSON keys):
+    image, mask, z, e, connectivity, output
+z, e, connectivity and output are optional and fall back to the command line
+values when missing or empty.
+
+Every item is logged, as a JSON line, with its status (ok, skipped, failed),
+its duration and its error if any. A failing item never aborts the batch.
+Items whose output already exists are skipped unless resuming is disabled.
+Outputs are written to a temporary file that replaces the output once
+complete, so an interrupted item never leaves a partial output that a
+resumed batch would skip. In directory mode, the images without a mask of
+the same name are reported as skipped.
+"""
+
+# Builtin imports
+import csv
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass
+from typing import Any, Iterator, Optional, TextIO
+
+# Local imports
+from .exceptions import HoleFillingException
+from .pipeline import fill_image
+
+from .hole_filing_lib.engines import VectorizedEngine
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+STATUS_OK = "ok"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+
+# -----------------------------------------------------------------------------#
+# Dataclasses
+# -----------------------------------------------------------------------------#
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    """
+    Dataclass that represents one image/mask pair to fill.
+    """
+
+    image: str
+    mask: Optional[str]
+    z: int
+    e: float
+    connectivity: int
+    output: str
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """
+    Dataclass that represents the outcome of a BatchItem. seconds is the time
+    spent on the item and error the message of the failure or the reason
+    it was skipped, if any.
+    """
+
+    image: str
+    mask: Optional[str]
+    output: str
+    status: str
+    seconds: float
+    error: Optional[str] = None
+
+
+# -----------------------------------------------------------------------------#
+# Readers
+# -----------------------------------------------------------------------------#
+
+
+def default_output(image_path: str, output_directory: str) -> str:
+    """
+    Output path of an image when none is given.
+
+    Args:
+        image_path (str): Location of the image file
+        output_directory (str): Directory of the output image
+
+    Returns:
+        Path of the filled image
+    """
+    name = os.path.splitext(os.path.basename(image_path))[0]
+    return os.path.join(output_directory, f"Filled_{name}.png")
+
+
+def read_manifest(
+    path: str,
+    param_z: int,
+    param_e: float,
+    connectivity: int,
+    output_directory: Optional[str] = None,
+) -> list[BatchItem]:
+    """
+    Read the items of a CSV or JSON lines manifest. Relative paths are
+    relative to the manifest.
+
+    Args:
+        path (str): Location of the manifest. JSON lines if it ends with
+            .jsonl, CSV otherwise
+        param_z (int): Default z value
+        param_e (float): Default e value
+        connectivity (int): Default connectivity
+        output_directory (str): Optional. Directory of the outputs that are
+            not in the manifest. Defaults to the directory of each image
+
+    Returns:
+        A list of BatchItem
+
+    Raises:
+        HoleFillingException
+    """
+    if not os.path.exists(path):
+        raise HoleFillingException(f"FileNotFound: {path}")
+
+    root = os.path.dirname(os.path.abspath(path))
+    with open(path, newline="", encoding="utf-8") as stream:
+        if path.endswith(".jsonl"):
+            rows: list[dict[str, Any]] = [
+                json.loads(line) for line in stream if line.strip()
+            ]
+        else:
+            rows = list(csv.DictReader(stream))
+
+    items = []
+    for number, row in enumerate(rows, 1):
+        if not row.get("image") or not row.get("mask"):
+            raise HoleFillingException(
+                f"{path}: row {number} requires an image and a mask"
+            )
+
+        image = os.path.join(root, row["image"])
+        output = row.get("output") or default_output(
+            image, output_directory or os.path.dirname(image)
+        )
+        items.append(
+            BatchItem(
+                image=image,
+                mask=os.path.join(root, row["mask"]),
+                z=int(_field(row, "z", param_z)),
+                e=float(_field(row, "e", param_e)),
+                connectivity=int(_field(row, "connectivity", connectivity)),
+                output=os.path.join(root, output),
+            )
+        )
+    return items
+
+
+def _field(row: dict[str, Any], name: str, default: Any) -> Any:
+    """
+    Value of an optional column of a manifest row. An explicit 0 is kept,
+    a missing or empty value falls back to the default.
+    """
+    value = row.get(name)
+    return default if value is None or value == "" else value
+
+
+def scan_directories(
+    image_directory: str,
+    mask_directory: str,
+    param_z: int,
+    param_e: float,
+    connectivity: int,
+    output_directory: Optional[str] = None,
+) -> list[BatchItem]:
+    """
+    Pair the images with the masks of the same file name. The images without
+    a mask are kept as items without a mask, which run_batch skips.
+
+    Args:
+        image_directory (str): Directory of the images
+        mask_directory (str): Directory of the masks
+        param_z (int): The z value
+        param_e (float): The e value
+        connectivity (int): Pixel connectivity
+        output_directory (str): Optional. Directory of the outputs. Defaults
+            to the image directory
+
+    Returns:
+        A list of BatchItem, sorted by file name
+
+    Raises:
+        HoleFillingException
+    """
+    for directory in (image_directory, mask_directory):
+        if not os.path.isdir(directory):
+            raise HoleFillingException(f"DirectoryNotFound: {directory}")
+
+    items = []
+    for name in sorted(os.listdir(image_directory)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+
+        image = os.path.join(image_directory, name)
+        mask = os.path.join(mask_directory, name)
+        items.append(
+            BatchItem(
+                image=image,
+                mask=mask if os.path.exists(mask) else None,
+                z=param_z,
+                e=param_e,
+                connectivity=connectivity,
+                output=default_output(image, output_directory or image_directory),
+            )
+        )
+    return items
+
+
+# -----------------------------------------------------------------------------#
+# Runner
+# -----------------------------------------------------------------------------#
+
+
+def run_item(item: BatchItem) -> BatchResult:
+    """
+    Fill a single item. Failures are reported in the result, never raised.
+    The output is written to a temporary file of the same directory, then
+    moved over the output.
+
+    Args:
+        item (BatchItem): Item to fill
+
+    Returns:
+        BatchResult
+    """
+    start = time.perf_counter()
+    temporary = None
+    try:
+        if item.mask is None:
+            raise HoleFillingException(f"No mask for: {item.image}")
+
+        directory, name = os.path.split(item.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # The encoder is picked from the extension, which is kept
+        handle, temporary = tempfile.mkstemp(
+            dir=directory or None,
+            prefix=f".{name}.",
+            suffix=os.path.splitext(name)[1],
+        )
+        os.close(handle)
+
+        fill_image(
+            item.image,
+            item.mask,
+            item.z,
+            item.e,
+            item.connectivity,
+            output_path=temporary,
+            engine=VectorizedEngine(),
+        )
+        os.replace(temporary, item.output)
+    except (HoleFillingException, Exception) as error:
+        if temporary is not None and os.path.exists(temporary):
+            os.unlink(temporary)
+        return BatchResult(
+            item.image,
+            item.mask,
+            item.output,
+            STATUS_FAILED,
+            time.perf_counter() - start,
+            f"{type(error).__name__}: {error}",
+        )
+
+    return BatchResult(
+        item.image, item.mask, item.output, STATUS_OK, time.perf_counter() - start
+    )
+
+
+def run_batch(
+    items: list[BatchItem],
+    workers: int = 0,
+    log_path: Optional[str] = None,
+    resume: bool = True,
+) -> list[BatchResult]:
+    """
+    Fill the items on a pool of processes.
+
+    Args:
+        items (list[BatchItem]): Items to fill
+        workers (int): Number of processes. Defaults to the number of CPUs
+        log_path (str): Optional. Every result is appended to this file as a
+            JSON line as soon as it is known
+        resume (bool): Skip the items whose output already exists. Default
+            to True. The items without a mask are always skipped
+
+    Returns:
+        The results, in the order of the items
+    """
+    results: list[Optional[BatchResult]] = [None] * len(items)
+    pending = []
+    for index, item in enumerate(items):
+        if item.mask is None:
+            results[index] = BatchResult(
+                item.image,
+                item.mask,
+                item.output,
+                STATUS_SKIPPED,
+                0.0,
+                "No mask of the same name",
+            )
+        elif resume and os.path.exists(item.output):
+            results[index] = BatchResult(
+                item.image, item.mask, item.output, STATUS_SKIPPED, 0.0
+            )
+        else:
+            pending.append(index)
+
+    log_file = open(log_path, "a", encoding="utf-8") if log_path else nullcontext()
+    with log_file as log:
+        for result in results:
+            if result:
+                _write_log(log, result)
+
+        if pending:
+            with ProcessPoolExecutor(max_workers=workers or None) as executor:
+                completed = executor.map(run_item, [items[i] for i in pending])
+                for index, result in zip(pending, completed):
+                    results[index] = result
+                    _write_log(log, result)
+
+    return [result for result in results if result]
+
+
+def _write_log(log: Optional[TextIO], result: BatchResult) -> None:
+    """
+    Append the result to the JSON lines log, if there is one.
+    """
+    if log:
+        log.write(json.dumps(asdict(result)) + "\n")
+        log.flush()
+
+
+def summarize(results: list[BatchResult]) -> Iterator[str]:
+    """
+    Yield the lines of a short report of the batch.
+
+    Args:
+        results (list[BatchResult]): Results of run_batch
+    """
+    counts = {STATUS_OK: 0, STATUS_SKIPPED: 0, STATUS_FAILED: 0}
+    for result in results:
+        counts[result.status] += 1
+        if result.status == STATUS_FAILED:
+            yield f"Failed: {result.image}: {result.error}"
+        elif result.status == STATUS_SKIPPED and result.error:
+            yield f"Skipped: {result.image}: {result.error}"
+
+    seconds = sum(result.seconds for result in results)
+    yield (
+        f"Batch done: {counts[STATUS_OK]} filled, {counts[STATUS_SKIPPED]} skipped, "
+        f"{counts[STATUS_FAILED]} failed, {seconds:.3f}s of fill time"
+    )
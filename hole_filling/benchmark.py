@@ -0,0 +1,493 @@
+"""
+module: benchmark
+
+Benchmarks the fill engines on synthetic workloads.
+
+Every workload is a smooth synthetic image of a given size with a hole of a
+given shape:
+    disc     a single disc in the middle
+    scratch  a thin diagonal scratch
+    many     many small discs
+    border   a disc cut by the top left corner of the image
+
+Every registered engine, plus the pyramid fill, fills every workload. The
+pixel by pixel fill of HoleFiller, the baseline the engines speed up, fills
+the workloads small enough for it: up to PIXEL_MAX_PAIRS hole/boundary
+pairs. The wall time (best of a few runs), the peak memory allocated through
+Python and numpy (tracemalloc, OpenCV buffers are not seen) and the error
+against the exact fill are recorded. The results are written as JSON.
+
+The exact fill is the pixel by pixel fill where it runs, so that the
+engines are checked against an independent implementation. Larger workloads
+fall back to the VectorizedEngine.
+
+The start up of the command line is measured as well, since the heavy
+imports are deferred until a fill needs them: the wall time of
+"python -m hole_filling -h" and "batch -h" in a new interpreter, next to
+the time a bare interpreter takes to start. They are recorded as the
+"startup" workload, with a size of 0.
+
+compare checks a result file against a baseline and reports the slowdowns,
+memory growth and accuracy losses beyond the given thresholds. missing_cases
+lists the measures of the baseline that the result file lacks.
+"""
+
+# Builtin imports
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Callable, Iterator, Optional
+
+# Project specific imports
+import numpy as np
+
+# Local imports
+from .exceptions import HoleFillingException
+
+from .hole_filing_lib import registry
+from .hole_filing_lib.detection import HOLE_VALUE, find_holes_and_boundaries
+from .hole_filing_lib.engines import VectorizedEngine
+from .hole_filing_lib.hole_filler import HoleFiller
+from .hole_filing_lib.models import Connectivity
+from .hole_filing_lib.pyramid import pyramid_fill
+from .hole_filing_lib.weighting import (
+    AbstractWeightingMechanism,
+    DefaultWeightMechanism,
+)
+
+WORKLOADS = ("disc", "scratch", "many", "border")
+DEFAULT_SIZES = (64, 128, 256, 512)
+
+# Fill path of the pyramid, benchmarked along the registered engines
+PYRAMID = "pyramid"
+
+# Pixel by pixel fill of HoleFiller, without an engine
+PIXEL = "pixel"
+
+# Largest holes x boundaries the pixel by pixel fill runs on, about 0.4s
+PIXEL_MAX_PAIRS = 200_000
+
+# Name of the exact fill of a workload too large for the pixel by pixel fill
+VECTORIZED = "vectorized"
+
+# Workload of the start up measures, and the command line arguments of each.
+# None starts a bare interpreter
+STARTUP = "startup"
+STARTUP_COMMANDS: dict[str, Optional[list[str]]] = {
+    "interpreter": None,
+    "help": ["-h"],
+    "batch_help": ["batch", "-h"],
+}
+
+# -----------------------------------------------------------------------------#
+# Dataclasses
+# -----------------------------------------------------------------------------#
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    """
+    Dataclass that stores the measures of an engine on a workload. seconds
+    is the best wall time, peak_bytes the peak memory traced during the fill
+    and max_error/mean_error the error of the filled colors against the
+    exact fill computed by reference.
+    """
+
+    workload: str
+    size: int
+    engine: str
+    holes: int
+    boundaries: int
+    seconds: float
+    peak_bytes: int
+    max_error: float
+    mean_error: float
+    reference: str = VECTORIZED
+
+    @property
+    def key(self) -> tuple[str, int, str]:
+        """
+        Return what identifies the measure across runs
+        """
+        return self.workload, self.size, self.engine
+
+
+# -----------------------------------------------------------------------------#
+# Workloads
+# -----------------------------------------------------------------------------#
+
+
+def make_workload(name: str, size: int, seed: int = 0) -> np.ndarray:
+    """
+    Generate a synthetic preprocessed image.
+
+    Args:
+        name (str): Shape of the hole. One of WORKLOADS
+        size (int): Width and height of the image
+        seed (int): Seed of the noise and of the random holes
+
+    Returns:
+        A (size, size) image in [0..1] whose holes are set to -1
+
+    Raises:
+        HoleFillingException
+    """
+    rng = np.random.default_rng(seed)
+    rows, cols = np.mgrid[:size, :size] / size
+    image = (np.sin(6 * rows) * np.cos(4 * cols) + 1) / 2
+    image = np.clip(image * 0.9 + rng.random((size, size)) * 0.1, 0, 1)
+
+    rows, cols = np.mgrid[:size, :size]
+    if name == "disc":
+        center = size / 2
+        holes = (rows - center) ** 2 + (cols - center) ** 2 < (size / 4) ** 2
+    elif name == "scratch":
+        holes = np.abs(rows - cols) <= 1
+        holes &= (rows > size // 8) & (rows < size - size // 8)
+    elif name == "many":
+        holes = np.zeros((size, size), dtype=bool)
+        for row, col in rng.integers(4, size - 4, (max(1, size // 4), 2)):
+            holes |= (rows - row) ** 2 + (cols - col) ** 2 < 9
+    elif name == "border":
+        holes = rows**2 + cols**2 < (size / 3) ** 2
+    else:
+        raise HoleFillingException(
+            f"Unknown workload: {name}. Supports {', '.join(WORKLOADS)}"
+        )
+
+    image[holes] = HOLE_VALUE
+    return image
+
+
+# -----------------------------------------------------------------------------#
+# Runner
+# -----------------------------------------------------------------------------#
+
+
+def _fill_path(
+    engine: str, weighting: AbstractWeightingMechanism, connectivity: Connectivity
+) -> Callable[[np.ndarray], None]:
+    """
+    Return a function that fills an image in place with the engine.
+    """
+    if engine == PYRAMID:
+        return lambda image: pyramid_fill(image, weighting, connectivity)
+
+    if engine == PIXEL:
+
+        def fill_pixels(image: np.ndarray) -> None:
+            filler = HoleFiller(image, weighting, connectivity)
+            filler.find_holes_and_boundaries()
+            for hole in filler.holes:
+                image[hole.row, hole.column] = filler.calculate_hole_color(hole)
+
+        return fill_pixels
+
+    fill_engine = registry.create_engine(engine)
+
+    def fill(image: np.ndarray) -> None:
+        holes, boundaries = find_holes_and_boundaries(image, connectivity)
+        fill_engine.fill_region(image, weighting, connectivity, holes, boundaries)
+
+    return fill
+
+
+def measure(
+    image: np.ndarray,
+    fill: Callable[[np.ndarray], None],
+    repeat: int = 3,
+) -> tuple[np.ndarray, float, int]:
+    """
+    Fill copies of the image and measure the fill.
+
+    Args:
+        image (np.ndarray): Image whose holes are set to -1. Not modified
+        fill (Callable): Fills an image in place
+        repeat (int): Number of timed runs. Defaults to 3
+
+    Returns:
+        The filled image, the best wall time in seconds and the peak traced
+        memory in bytes
+    """
+    # Traced run first: tracemalloc slows the allocations down
+    filled = image.copy()
+    tracemalloc.start()
+    try:
+        fill(filled)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        copy = image.copy()
+        start = time.perf_counter()
+        fill(copy)
+        best = min(best, time.perf_counter() - start)
+
+    return filled, best, peak
+
+
+def measure_startup(argv: Optional[list[str]], repeat: int = 5) -> float:
+    """
+    Time the command line in a new interpreter, from the process start to
+    its exit.
+
+    Args:
+        argv (list[str]): Arguments of "python -m hole_filling". None times
+            a bare interpreter instead
+        repeat (int): Number of timed runs. Defaults to 5
+
+    Returns:
+        The best wall time in seconds
+
+    Raises:
+        HoleFillingException
+    """
+    command = [sys.executable]
+    command += ["-c", "pass"] if argv is None else ["-m", "hole_filling", *argv]
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        completed = subprocess.run(command, cwd=root, capture_output=True)
+        best = min(best, time.perf_counter() - start)
+        if completed.returncode != 0:
+            raise HoleFillingException(
+                f"{' '.join(command[1:])} failed: {completed.stderr.decode()}"
+            )
+    return best
+
+
+def run_benchmarks(
+    workloads: tuple[str, ...] = WORKLOADS,
+    sizes: tuple[int, ...] = DEFAULT_SIZES,
+    engines: Optional[list[str]] = None,
+    param_z: int = 3,
+    param_e: float = 0.01,
+    connectivity: Connectivity = Connectivity.EIGHT,
+    repeat: int = 3,
+    startup: bool = True,
+) -> Iterator[BenchmarkResult]:
+    """
+    Benchmark the engines on the workloads. The exact reference is the pixel
+    by pixel fill on the workloads of up to PIXEL_MAX_PAIRS pairs, the
+    VectorizedEngine on the larger ones.
+
+    Args:
+        workloads (tuple[str]): Shapes of the holes. Defaults to all
+        sizes (tuple[int]): Sizes of the images. Defaults to DEFAULT_SIZES,
+            64, 128, 256, 512
+        engines (list[str]): Optional. Engines to benchmark. Defaults to
+            the pixel by pixel fill, every registered engine and the
+            pyramid. The pixel by pixel fill is skipped on the workloads
+            above PIXEL_MAX_PAIRS
+        param_z (int): The z value. Defaults to 3
+        param_e (float): The e value. Defaults to 0.01
+        connectivity (Connectivity): Pixel connectivity. Defaults to 8
+        repeat (int): Number of timed runs of each fill. Defaults to 3
+        startup (bool): Measure the start up of the command line first, see
+            STARTUP_COMMANDS. Defaults to True
+
+    Yields:
+        A BenchmarkResult per workload, size and engine
+    """
+    if startup:
+        for name, argv in STARTUP_COMMANDS.items():
+            seconds = measure_startup(argv, max(repeat, 5))
+            yield BenchmarkResult(STARTUP, 0, name, 0, 0, seconds, 0, 0.0, 0.0)
+
+    if engines is None:
+        engines = [PIXEL] + registry.engine_names() + [PYRAMID]
+    weighting = DefaultWeightMechanism(param_z, param_e)
+
+    for size in sizes:
+        for workload in workloads:
+            image = make_workload(workload, size)
+            holes, boundaries = find_holes_and_boundaries(image, connectivity)
+            small = len(holes) * len(boundaries) <= PIXEL_MAX_PAIRS
+
+            reference = image.copy()
+            if small:
+                _fill_path(PIXEL, weighting, connectivity)(reference)
+            else:
+                VectorizedEngine().fill_region(
+                    reference, weighting, connectivity, holes, boundaries
+                )
+            expected = reference[holes.rows, holes.columns]
+
+            for engine in engines:
+                if engine == PIXEL and not small:
+                    continue
+
+                fill = _fill_path(engine, weighting, connectivity)
+                filled, seconds, peak = measure(image, fill, repeat)
+                error = np.abs(filled[holes.rows, holes.columns] - expected)
+                yield BenchmarkResult(
+                    workload,
+                    size,
+                    engine,
+                    len(holes),
+                    len(boundaries),
+                    seconds,
+                    peak,
+                    float(error.max()) if len(error) else 0.0,
+                    float(error.mean()) if len(error) else 0.0,
+                    PIXEL if small else VECTORIZED,
+                )
+
+
+# -----------------------------------------------------------------------------#
+# JSON
+# -----------------------------------------------------------------------------#
+
+
+def write_results(path: str, results: list[BenchmarkResult]) -> None:
+    """
+    Write the results, and the machine they were measured on, as JSON.
+
+    Args:
+        path (str): Location of the JSON file
+        results (list[BenchmarkResult]): Results to write
+    """
+    document = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.platform(),
+        "results": [asdict(result) for result in results],
+    }
+    with open(path, "w", encoding="utf-8") as stream:
+        json.dump(document, stream, indent=2)
+
+
+def read_results(path: str) -> list[BenchmarkResult]:
+    """
+    Read the results written by write_results.
+
+    Args:
+        path (str): Location of the JSON file
+
+    Returns:
+        A list of BenchmarkResult
+
+    Raises:
+        HoleFillingException
+    """
+    try:
+        with open(path, encoding="utf-8") as stream:
+            document: dict[str, Any] = json.load(stream)
+        return [BenchmarkResult(**result) for result in document["results"]]
+    except (OSError, ValueError, KeyError, TypeError) as error:
+        raise HoleFillingException(f"Invalid benchmark file {path}: {error}") from None
+
+
+# -----------------------------------------------------------------------------#
+# Compare
+# -----------------------------------------------------------------------------#
+
+
+def compare(
+    baseline: list[BenchmarkResult],
+    current: list[BenchmarkResult],
+    time_threshold: float = 0.25,
+    memory_threshold: float = 0.25,
+    error_threshold: float = 1e-6,
+    min_seconds: float = 0.005,
+) -> list[str]:
+    """
+    Find the regressions of the current results against the baseline. Only
+    the measures present in both are compared.
+
+    Args:
+        baseline (list[BenchmarkResult]): Reference results
+        current (list[BenchmarkResult]): New results
+        time_threshold (float): Relative slowdown allowed. Defaults to 0.25
+        memory_threshold (float): Relative memory growth allowed. Defaults
+            to 0.25
+        error_threshold (float): Absolute growth of the max error allowed.
+            Defaults to 1e-6
+        min_seconds (float): Slowdowns of fills faster than this, in both
+            runs, are noise and ignored. Defaults to 5ms
+
+    Returns:
+        A message per regression, empty if there is none
+    """
+    reference = {result.key: result for result in baseline}
+
+    regressions = []
+    for result in current:
+        base = reference.get(result.key)
+        if base is None:
+            continue
+
+        name = f"{result.workload} {result.size} {result.engine}"
+        if max(
+            result.seconds, base.seconds
+        ) >= min_seconds and result.seconds > base.seconds * (1 + time_threshold):
+            regressions.append(
+                f"{name}: {base.seconds:.4f}s -> {result.seconds:.4f}s "
+                f"({result.seconds / base.seconds - 1:+.0%})"
+            )
+        if result.peak_bytes > base.peak_bytes * (1 + memory_threshold):
+            regressions.append(
+                f"{name}: peak memory {base.peak_bytes} -> {result.peak_bytes} bytes"
+            )
+        if result.max_error > base.max_error + error_threshold:
+            regressions.append(
+                f"{name}: max error {base.max_error:.3g} -> {result.max_error:.3g}"
+            )
+    return regressions
+
+
+def missing_cases(
+    baseline: list[BenchmarkResult], current: list[BenchmarkResult]
+) -> list[str]:
+    """
+    Find the measures of the baseline that the current results lack, which
+    compare can't check.
+
+    Args:
+        baseline (list[BenchmarkResult]): Reference results
+        current (list[BenchmarkResult]): New results
+
+    Returns:
+        The name of each missing measure, empty if there is none
+    """
+    measured = {result.key for result in current}
+    return [
+        f"{result.workload} {result.size} {result.engine}"
+        for result in baseline
+        if result.key not in measured
+    ]
+
+
+def format_header() -> str:
+    """
+    Return the header of the table printed by format_result
+    """
+    return (
+        f"{'workload':<9}{'size':>6} {'engine':<11}{'holes':>8}"
+        f"{'seconds':>10}{'peak MiB':>10}{'max error':>11}"
+    )
+
+
+def format_result(result: BenchmarkResult) -> str:
+    """
+    Return a result as a line of a table.
+
+    Args:
+        result (BenchmarkResult): Result to show
+    """
+    return (
+        f"{result.workload:<9}{result.size:>6} {result.engine:<11}"
+        f"{result.holes:>8}{result.seconds:>10.4f}"
+        f"{result.peak_bytes / 2**20:>10.1f}{result.max_error:>11.2e}"
+    )
@@ -4,7 +4,13 @@ module: cli
 This module defines the command line interface using argParse.ArgumentParser
 
 >> python -m hole_filling -h
-usage: HoleFilling [-h] [-o OUTPUT_DIRECTORY] [-d] image_path mask_path z e connectivity
+usage: HoleFilling [-h] [-o OUTPUT_DIRECTORY] [-d] [-p] [-g] [-w WORKERS] [--pyramid_levels PYRAMID_LEVELS]
+                   [--pyramid_band PYRAMID_BAND] [--engine {auto,vectorized,fft,quadtree,flood,fmm}]
+                   [--accuracy ACCURACY] [--precision {float32,float64}]
+                   [--profile [{table,json}]] [--cache DIRECTORY]
+                   [--cache_size CACHE_SIZE] [--raw_shape ROWS COLUMNS]
+                   [--raw_dtype {uint8,uint16,float32,float64}] [--in_place]
+                   image_path mask_path z e connectivity
 
 positional arguments:
   image_path            Location of an image file
@@ -18,11 +24,162 @@ options:
   -o OUTPUT_DIRECTORY, --output_directory OUTPUT_DIRECTORY
                         If provided, the output image will be written to this location
   -d, --debug           If set, the boundary is drawn in black in the output image. Defaults to False
+  -p, --per_component   If set, each hole is filled independently using only its own boundary. Defaults to False
+  -g, --grayscale       If set, the image is converted to 8 bit grayscale. Defaults to False: the channels
+                        and the bit depth of the image are kept
+  -w WORKERS, --workers WORKERS
+                        Number of processes used to fill the holes. 0 uses all the CPUs. Defaults to 1
+  --pyramid_levels PYRAMID_LEVELS
+                        Fill coarse to fine over this many halvings of the resolution. Defaults to 0 (off)
+  --pyramid_band PYRAMID_BAND
+                        Width in pixels of the band refined exactly at each pyramid level. Defaults to 2
+  --engine {auto,vectorized,fft,quadtree,flood,fmm}
+                        Engine used to fill the holes. auto picks the fastest engine within the accuracy.
+                        Defaults to the pixel by pixel fill
+  --accuracy ACCURACY   Largest acceptable error of a filled color, in [0..1], for --engine auto. Defaults to 0
+                        (exact engines only)
+  --precision {float32,float64}
+                        Type the pixels are filled in. float64 is for reference runs. Defaults to
+                        float32
+  --profile [{table,json}]
+                        Print the time, throughput and peak memory of every stage, as a table or as JSON
+                        lines. Defaults to table
+  --cache DIRECTORY     Cache the filled images in this directory. A fill of the same pixels with the
+                        same parameters is copied from the cache
+  --cache_size CACHE_SIZE
+                        Size budget of the cache in MiB, the least recently used results are evicted.
+                        Defaults to 1024
+  --raw_shape ROWS COLUMNS
+                        Read the image (and the mask) as headerless raw arrays of this shape. .npy files
+                        are always read as arrays
+  --raw_dtype {uint8,uint16,float32,float64}
+                        Pixel type of a raw image. Raw masks are 8 bit. Defaults to uint8
+  --in_place            Write the filled pixels of an array image into the image file itself
+
+Images stored as .npy or raw arrays are memory mapped and filled out of core. They support
+--output_directory, --engine (except the image based engines) and --profile.
+
+>> python -m hole_filling batch -h
+usage: python -m hole_filling batch [-h] (-m MANIFEST | -i IMAGES) [-k MASKS] [-o OUTPUT_DIRECTORY]
+                                    [-z Z] [-e E] [-c {4,8}] [-w WORKERS] [-l LOG] [--no_resume]
+
+options:
+  -h, --help            show this help message and exit
+  -m MANIFEST, --manifest MANIFEST
+                        CSV or JSON lines (.jsonl) file with the columns image, mask, z, e, connectivity, output
+  -i IMAGES, --images IMAGES
+                        Directory of images. Each image is paired with the mask of the same name
+  -k MASKS, --masks MASKS
+                        Directory of masks. Required with --images
+  -o OUTPUT_DIRECTORY, --output_directory OUTPUT_DIRECTORY
+                        Directory of the outputs that have no explicit output path
+  -z Z                  Default z value for the default weighting mechanism. Defaults to 3
+  -e E                  Default e value for the default weighting mechanism. Defaults to 0.01
+  -c {4,8}, --connectivity {4,8}
+                        Default pixel connectivity. Defaults to 8
+  -w WORKERS, --workers WORKERS
+                        Number of worker processes. Defaults to the number of CPUs
+  -l LOG, --log LOG     Append the result of every item, as JSON lines, to this file
+  --no_resume           Fill the items even if their output already exists
+
+>> python -m hole_filling frames -h
+usage: python -m hole_filling frames [-h] [-z Z] [-e E] [-c {4,8}] [-p] [--fps FPS] source mask_path output
+
+positional arguments:
+  source                Directory of frames, in the order of their names, or video file
+  mask_path             Location of the mask shared by all the frames
+  output                Video file (.mp4, .avi, .mov, .mkv) or directory of the filled frames
+
+options:
+  -h, --help            show this help message and exit
+  -z Z                  The z value for the default weighting mechanism. Defaults to 3
+  -e E                  The e value for the default weighting mechanism. Defaults to 0.01
+  -c {4,8}, --connectivity {4,8}
+                        Pixel connectivity. Defaults to 8
+  -p, --per_component   If set, each hole is filled independently using only its own boundary. Defaults to
+                        False
+  --fps FPS             Frame rate of an output video. Defaults to the frame rate of the source
+
+>> python -m hole_filling serve -h
+usage: python -m hole_filling serve [-h] [--host HOST] [--port PORT] [-w WORKERS] [-q QUEUE_SIZE]
+                                    [--max_batch MAX_BATCH] [--batch_window BATCH_WINDOW]
+
+options:
+  -h, --help            show this help message and exit
+  --host HOST           Address to listen on. Defaults to 127.0.0.1
+  --port PORT           Port to listen on. Defaults to 8765
+  -w WORKERS, --workers WORKERS
+                        Number of worker processes. Defaults to the number of CPUs
+  -q QUEUE_SIZE, --queue_size QUEUE_SIZE
+                        Requests waiting for a worker before new ones are rejected with 503. Defaults to 64
+  --max_batch MAX_BATCH
+                        Largest number of requests with the same parameters filled together. Defaults to 8
+  --batch_window BATCH_WINDOW
+                        Seconds a batch that isn't full waits for more requests. Defaults to 0.005
+
+>> python -m hole_filling benchmark -h
+usage: python -m hole_filling benchmark [-h] {run,compare} ...
+
+positional arguments:
+  {run,compare}
+    run          Benchmark the engines on synthetic workloads
+    compare      Fail if a result file regresses against a baseline
+
+>> python -m hole_filling benchmark run -h
+usage: python -m hole_filling benchmark run [-h] [-o OUTPUT] [-s SIZES [SIZES ...]]
+                                            [-w {disc,scratch,many,border} [...]]
+                                            [--engines ENGINES [ENGINES ...]] [-r REPEAT]
+                                            [--no_startup]
+
+options:
+  -h, --help            show this help message and exit
+  -o OUTPUT, --output OUTPUT
+                        Write the results to this JSON file
+  -s SIZES [SIZES ...], --sizes SIZES [SIZES ...]
+                        Width and height of the synthetic images. Defaults to 64 128 256 512
+  -w {disc,scratch,many,border} [{disc,scratch,many,border} ...], --workloads ...
+                        Shapes of the holes. Defaults to all
+  --engines ENGINES [ENGINES ...]
+                        Engines to benchmark. Defaults to the pixel by pixel fill, every engine and
+                        the pyramid
+  -r REPEAT, --repeat REPEAT
+                        Number of timed runs of each fill, the best is kept. Defaults to 3
+  --no_startup          Skip the start up times of the command line
+
+>> python -m hole_filling benchmark compare -h
+usage: python -m hole_filling benchmark compare [-h] [--time_threshold TIME_THRESHOLD]
+                                                [--memory_threshold MEMORY_THRESHOLD]
+                                                [--error_threshold ERROR_THRESHOLD]
+                                                [--min_seconds MIN_SECONDS] baseline current
+
+positional arguments:
+  baseline              Baseline JSON file
+  current               JSON file to check against the baseline
+
+options:
+  -h, --help            show this help message and exit
+  --time_threshold TIME_THRESHOLD
+                        Relative slowdown allowed. Defaults to 0.25
+  --memory_threshold MEMORY_THRESHOLD
+                        Relative growth of the peak memory allowed. Defaults to 0.25
+  --error_threshold ERROR_THRESHOLD
+                        Absolute growth of the max error allowed. Defaults to 1e-6
+  --min_seconds MIN_SECONDS
+                        Slowdowns of fills faster than this are ignored. Defaults to 0.005
 """
 
 # Builtin imports
 import argparse
 
+# Local imports
+from .hole_filing_lib import registry
+
+# Supported pixel connectivities
+CONNECTIVITIES = (4, 8)
+
+# Types the pixels can be filled in
+PRECISIONS = ("float32", "float64")
+
 # -----------------------------------------------------------------------------#
 # Functions
 # -----------------------------------------------------------------------------#
@@ -35,7 +192,12 @@ def get_cli_parser() -> argparse.ArgumentParser:
     Returns:
         argparse.ArgumentParser
     """
-    parser = argparse.ArgumentParser("python -m hole_filling")
+    parser = argparse.ArgumentParser(
+        "python -m hole_filling",
+        epilog="Run 'python -m hole_filling batch -h' to fill many images at once, "
+        "'python -m hole_filling serve -h' to run a fill service "
+        "and 'python -m hole_filling benchmark -h' to measure the engines.",
+    )
 
     # Positional arguments
     parser.add_argument("image_path", help="Location of an image file")
@@ -66,5 +228,367 @@ def get_cli_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="If set, the boundary is drawn in black in the output image. Defaults to False",
     )
+    parser.add_argument(
+        "-p",
+        "--per_component",
+        action="store_true",
+        help="If set, each hole is filled independently using only its own boundary. Defaults to False",
+    )
+    parser.add_argument(
+        "-g",
+        "--grayscale",
+        action="store_true",
+        help="If set, the image is converted to 8 bit grayscale. Defaults to False: the "
+        "channels and the bit depth of the image are kept",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes used to fill the holes. 0 uses all the CPUs. Defaults to 1",
+    )
+    parser.add_argument(
+        "--pyramid_levels",
+        type=int,
+        default=0,
+        help="Fill coarse to fine over this many halvings of the resolution. Defaults to 0 (off)",
+    )
+    parser.add_argument(
+        "--pyramid_band",
+        type=int,
+        default=2,
+        help="Width in pixels of the band refined exactly at each pyramid level. Defaults to 2",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=[registry.AUTO] + registry.engine_names(),
+        help="Engine used to fill the holes. auto picks the fastest engine within the accuracy. "
+        "Defaults to the pixel by pixel fill",
+    )
+    parser.add_argument(
+        "--accuracy",
+        type=float,
+        default=0.0,
+        help="Largest acceptable error of a filled color, in [0..1], for --engine auto. "
+        "Defaults to 0 (exact engines only)",
+    )
+    parser.add_argument(
+        "--precision",
+        default=PRECISIONS[0],
+        choices=PRECISIONS,
+        help="Type the pixels are filled in. float64 is for reference runs. "
+        "Defaults to float32",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="table",
+        choices=["table", "json"],
+        help="Print the time, throughput and peak memory of every stage, as a table or as "
+        "JSON lines. Defaults to table",
+    )
+
+    # Result cache
+    parser.add_argument(
+        "--cache",
+        metavar="DIRECTORY",
+        help="Cache the filled images in this directory. A fill of the same pixels with "
+        "the same parameters is copied from the cache",
+    )
+    parser.add_argument(
+        "--cache_size",
+        type=int,
+        default=1024,
+        help="Size budget of the cache in MiB, the least recently used results are "
+        "evicted. Defaults to 1024",
+    )
+
+    # Array files
+    parser.add_argument(
+        "--raw_shape",
+        type=int,
+        nargs=2,
+        metavar=("ROWS", "COLUMNS"),
+        help="Read the image (and the mask) as headerless raw arrays of this shape. "
+        ".npy files are always read as arrays",
+    )
+    parser.add_argument(
+        "--raw_dtype",
+        default="uint8",
+        choices=["uint8", "uint16", "float32", "float64"],
+        help="Pixel type of a raw image. Raw masks are 8 bit. Defaults to uint8",
+    )
+    parser.add_argument(
+        "--in_place",
+        action="store_true",
+        help="Write the filled pixels of an array image into the image file itself",
+    )
+
+    return parser
+
+
+def get_batch_cli_parser() -> argparse.ArgumentParser:
+    """
+    Returns the command line interface of the batch mode
+
+    Returns:
+        argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser("python -m hole_filling batch")
+
+    # Inputs
+    inputs = parser.add_mutually_exclusive_group(required=True)
+    inputs.add_argument(
+        "-m",
+        "--manifest",
+        help="CSV or JSON lines (.jsonl) file with the columns image, mask, z, e, connectivity, output",
+    )
+    inputs.add_argument(
+        "-i",
+        "--images",
+        help="Directory of images. Each image is paired with the mask of the same name",
+    )
+    parser.add_argument(
+        "-k", "--masks", help="Directory of masks. Required with --images"
+    )
+
+    # Optional arguments
+    parser.add_argument(
+        "-o",
+        "--output_directory",
+        help="Directory of the outputs that have no explicit output path",
+    )
+    parser.add_argument(
+        "-z",
+        type=int,
+        default=3,
+        help="Default z value for the default weighting mechanism. Defaults to 3",
+    )
+    parser.add_argument(
+        "-e",
+        type=float,
+        default=0.01,
+        help="Default e value for the default weighting mechanism. Defaults to 0.01",
+    )
+    parser.add_argument(
+        "-c",
+        "--connectivity",
+        type=int,
+        choices=CONNECTIVITIES,
+        default=8,
+        help="Default pixel connectivity. Defaults to 8",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=0,
+        help="Number of worker processes. Defaults to the number of CPUs",
+    )
+    parser.add_argument(
+        "-l",
+        "--log",
+        help="Append the result of every item, as JSON lines, to this file",
+    )
+    parser.add_argument(
+        "--no_resume",
+        action="store_true",
+        help="Fill the items even if their output already exists",
+    )
+
+    return parser
+
+
+def get_frames_cli_parser() -> argparse.ArgumentParser:
+    """
+    Returns the command line interface of the frames mode
+
+    Returns:
+        argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser("python -m hole_filling frames")
+    parser.add_argument(
+        "source", help="Directory of frames, in the order of their names, or video file"
+    )
+    parser.add_argument(
+        "mask_path", help="Location of the mask shared by all the frames"
+    )
+    parser.add_argument(
+        "output",
+        help="Video file (.mp4, .avi, .mov, .mkv) or directory of the filled frames",
+    )
+    parser.add_argument(
+        "-z",
+        type=int,
+        default=3,
+        help="The z value for the default weighting mechanism. Defaults to 3",
+    )
+    parser.add_argument(
+        "-e",
+        type=float,
+        default=0.01,
+        help="The e value for the default weighting mechanism. Defaults to 0.01",
+    )
+    parser.add_argument(
+        "-c",
+        "--connectivity",
+        type=int,
+        choices=CONNECTIVITIES,
+        default=8,
+        help="Pixel connectivity. Defaults to 8",
+    )
+    parser.add_argument(
+        "-p",
+        "--per_component",
+        action="store_true",
+        help="If set, each hole is filled independently using only its own boundary. "
+        "Defaults to False",
+    )
+    parser.add_argument(
+        "--fps",
+        type=float,
+        help="Frame rate of an output video. Defaults to the frame rate of the source",
+    )
+
+    return parser
+
+
+def get_benchmark_cli_parser() -> argparse.ArgumentParser:
+    """
+    Returns the command line interface of the benchmarks
+
+    Returns:
+        argparse.ArgumentParser
+    """
+    # Imported here so that the single image mode doesn't pay for it
+    from .benchmark import DEFAULT_SIZES, PIXEL, PYRAMID, WORKLOADS
+
+    parser = argparse.ArgumentParser("python -m hole_filling benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser(
+        "run", help="Benchmark the engines on synthetic workloads"
+    )
+    run.add_argument("-o", "--output", help="Write the results to this JSON file")
+    run.add_argument(
+        "-s",
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        help="Width and height of the synthetic images. Defaults to 64 128 256 512",
+    )
+    run.add_argument(
+        "-w",
+        "--workloads",
+        nargs="+",
+        choices=WORKLOADS,
+        default=list(WORKLOADS),
+        help="Shapes of the holes. Defaults to all",
+    )
+    run.add_argument(
+        "--engines",
+        nargs="+",
+        choices=[PIXEL] + registry.engine_names() + [PYRAMID],
+        help="Engines to benchmark. Defaults to the pixel by pixel fill, every "
+        "engine and the pyramid",
+    )
+    run.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of timed runs of each fill, the best is kept. Defaults to 3",
+    )
+    run.add_argument(
+        "--no_startup",
+        action="store_true",
+        help="Skip the start up times of the command line",
+    )
+
+    check = commands.add_parser(
+        "compare", help="Fail if a result file regresses against a baseline"
+    )
+    check.add_argument("baseline", help="Baseline JSON file")
+    check.add_argument("current", help="JSON file to check against the baseline")
+    check.add_argument(
+        "--time_threshold",
+        type=float,
+        default=0.25,
+        help="Relative slowdown allowed. Defaults to 0.25",
+    )
+    check.add_argument(
+        "--memory_threshold",
+        type=float,
+        default=0.25,
+        help="Relative growth of the peak memory allowed. Defaults to 0.25",
+    )
+    check.add_argument(
+        "--error_threshold",
+        type=float,
+        default=1e-6,
+        help="Absolute growth of the max error allowed. Defaults to 1e-6",
+    )
+    check.add_argument(
+        "--min_seconds",
+        type=float,
+        default=0.005,
+        help="Slowdowns of fills faster than this are ignored. Defaults to 0.005",
+    )
+
+    return parser
+
+
+def get_server_cli_parser() -> argparse.ArgumentParser:
+    """
+    Returns the command line interface of the fill service
+
+    Returns:
+        argparse.ArgumentParser
+    """
+    # Imported here so that the single image mode doesn't pay for it
+    from .server import DEFAULT_HOST, DEFAULT_PORT
+
+    parser = argparse.ArgumentParser("python -m hole_filling serve")
+    parser.add_argument(
+        "--host",
+        default=DEFAULT_HOST,
+        help=f"Address to listen on. Defaults to {DEFAULT_HOST}",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Port to listen on. Defaults to {DEFAULT_PORT}",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=0,
+        help="Number of worker processes. Defaults to the number of CPUs",
+    )
+    parser.add_argument(
+        "-q",
+        "--queue_size",
+        type=int,
+        default=64,
+        help="Requests waiting for a worker before new ones are rejected with 503. "
+        "Defaults to 64",
+    )
+    parser.add_argument(
+        "--max_batch",
+        type=int,
+        default=8,
+        help="Largest number of requests with the same parameters filled together. "
+        "Defaults to 8",
+    )
+    parser.add_argument(
+        "--batch_window",
+        type=float,
+        default=0.005,
+        help="Seconds a batch that isn't full waits for more requests. Defaults to 0.005",
+    )
 
     return parser
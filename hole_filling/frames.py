@@ -0,0 +1,208 @@
+"""
+module: frames
+
+Fills a sequence of frames that share the same mask, like the frames of a
+video or a timelapse shot through a dusty sensor.
+
+The fill of the mask is compiled once into a FillOperator: the holes, the
+boundaries and the normalized weights. Each frame then only costs a gather of
+its boundary values and a matrix product. The frames are streamed: one frame
+is read, filled and written at a time.
+
+Sources:
+    directory   the images of the directory, in the order of their names
+    video       the frames of a video file OpenCV can decode
+
+Outputs:
+    video       a path with a video extension. The frames must be 8 bit
+    directory   any other path. Frames of a directory keep their name, frames
+                of a video are named after their index
+"""
+
+# Builtin imports
+import os
+import time
+from typing import Iterator, Optional
+
+# Project specific imports
+import numpy as np
+
+# Local imports
+from .batch import IMAGE_EXTENSIONS
+from .exceptions import HoleFillingException
+from .image_preprocessor import find_mask_holes, read_grayscale, read_image
+from .pipeline import get_connectivity
+
+from .hole_filing_lib.fill_operator import FillOperator
+from .hole_filing_lib.models import FrameStats
+from .hole_filing_lib.weighting import DefaultWeightMechanism
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+
+# FourCC of the written videos by extension, mp4v for the others
+VIDEO_CODECS = {".avi": "MJPG"}
+
+# Frame rate of the written videos when the source has none
+DEFAULT_FPS = 25.0
+
+# -----------------------------------------------------------------------------#
+# Readers
+# -----------------------------------------------------------------------------#
+
+
+def is_video(path: str) -> bool:
+    """
+    Return True if the path has a video extension
+    """
+    return os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS
+
+
+def iter_frames(source: str) -> Iterator[tuple[str, np.ndarray]]:
+    """
+    Read the frames of a directory or a video, one at a time.
+
+    Args:
+        source (str): Directory of images or video file
+
+    Yields:
+        The name of the output image of the frame, and the frame
+
+    Raises:
+        HoleFillingException
+    """
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                yield name, read_image(os.path.join(source, name))
+        return
+
+    if not os.path.exists(source):
+        raise HoleFillingException(f"FileNotFound: {source}")
+
+    import cv2
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise HoleFillingException(f"UnsupportedVideo: {source}")
+    try:
+        index = 0
+        while True:
+            read, frame = capture.read()
+            if not read:
+                break
+            yield f"frame_{index:06d}.png", frame
+            index += 1
+    finally:
+        capture.release()
+
+
+def video_fps(source: str) -> float:
+    """
+    Return the frame rate of a video source, DEFAULT_FPS for a directory or
+    a video without one.
+    """
+    if not is_video(source):
+        return DEFAULT_FPS
+
+    import cv2
+
+    capture = cv2.VideoCapture(source)
+    fps = capture.get(cv2.CAP_PROP_FPS)
+    capture.release()
+    return fps if fps > 0 else DEFAULT_FPS
+
+
+# -----------------------------------------------------------------------------#
+# Fill
+# -----------------------------------------------------------------------------#
+
+
+def fill_frames(
+    source: str,
+    mask_path: str,
+    param_z: int,
+    param_e: float,
+    connectivity: int,
+    output: str,
+    per_component: bool = False,
+    fps: Optional[float] = None,
+) -> FrameStats:
+    """
+    Fill the holes of the mask in every frame of the source and write the
+    filled frames to the output.
+
+    Args:
+        source (str): Directory of images or video file
+        mask_path (str): Location of the mask file, shared by all the frames
+        param_z (int): The z value for the default weighting mechanism
+        param_e (float): The e value for the default weighting mechanism
+        connectivity (int): Pixel connectivity, 4 or 8
+        output (str): Video file, or directory of the filled frames
+        per_component (bool): Fill each hole with its own boundary only
+        fps (float): Optional. Frame rate of an output video. Defaults to
+            the frame rate of the source
+
+    Returns:
+        FrameStats
+
+    Raises:
+        HoleFillingException
+    """
+    import cv2
+
+    pixel_connectivity = get_connectivity(connectivity)
+    operator = FillOperator(
+        find_mask_holes(read_grayscale(mask_path)),
+        DefaultWeightMechanism(param_z, param_e),
+        pixel_connectivity,
+        per_component,
+    )
+
+    to_video = is_video(output)
+    if not to_video:
+        os.makedirs(output, exist_ok=True)
+
+    writer = None
+    frames, fill_time = 0, 0.0
+    try:
+        for name, frame in iter_frames(source):
+            start = time.perf_counter()
+            operator.apply(frame, in_place=True)
+            fill_time += time.perf_counter() - start
+
+            if not to_video:
+                path = os.path.join(output, name)
+                if not cv2.imwrite(path, frame):
+                    raise HoleFillingException(f"Failed to write: {path}")
+            else:
+                if frame.dtype != np.uint8:
+                    raise HoleFillingException(
+                        f"Videos are written in 8 bit, the frame {name} is "
+                        f"{frame.dtype.name}"
+                    )
+                if writer is None:
+                    codec = VIDEO_CODECS.get(
+                        os.path.splitext(output)[1].lower(), "mp4v"
+                    )
+                    writer = cv2.VideoWriter(
+                        output,
+                        cv2.VideoWriter.fourcc(*codec),
+                        fps or video_fps(source),
+                        (frame.shape[1], frame.shape[0]),
+                        frame.ndim == 3,
+                    )
+                    if not writer.isOpened():
+                        raise HoleFillingException(f"Failed to write: {output}")
+                writer.write(frame)
+            frames += 1
+    finally:
+        if writer is not None:
+            writer.release()
+
+    return FrameStats(
+        frames,
+        len(operator.holes),
+        len(operator.boundaries),
+        operator.compile_time,
+        fill_time,
+    )
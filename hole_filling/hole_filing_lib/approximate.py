@@ -0,0 +1,265 @@
+"""
+module: approximate
+
+A Barnes-Hut style approximation of the fill formula.
+
+The boundary pixels are grouped in a quadtree. Each node knows how many
+boundary pixels it holds, the sum of their colors, their centroid c, the
+radius r of the circle around the centroid that contains them and their
+color dipole p = sum(I(v) * (v - c)). When a node is far enough from a hole
+pixel u, i.e. its radius is smaller than theta times the distance d = ||u-c||,
+the weights of its pixels are expanded around the centroid:
+
+    sum(w(u,v) * I(v)) ~ w(d) * sum(I(v)) + w'(d) / d * (c - u) . p
+    sum(w(u,v))        ~ w(d) * count
+
+The first order term of the denominator is zero as the centroid is the mean
+of the pixels. Otherwise the children are visited, down to the leaves which
+are computed exactly. A larger theta approximates more and runs faster;
+theta = 0 is exact. The cost is roughly O(n log m).
+
+The expansion drops the second order term, which is at most r^2 / 2 times
+the largest second derivative of the weight around d, per pixel. The error
+of each filled color is estimated as
+
+    sum(count * r^2 / 2 * max(|w''(d)|, |w'(d)| / d)) * (max(I) - min(I)) / sum(w)
+
+capped to max(I) - min(I), as the filled color is always within the range of
+the boundary colors. This is a conservative estimate, the actual error is
+usually much smaller. The largest estimate seen is reported by
+QuadTreeEngine.max_error.
+"""
+
+# Builtin imports
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+# Project specific imports
+import numpy as np
+
+# Local imports
+from ..exceptions import HoleFillingException
+from .engines import AbstractFillEngine
+from .weighting import DefaultWeightMechanism
+
+if TYPE_CHECKING:
+    from .weighting import AbstractWeightingMechanism
+
+# -----------------------------------------------------------------------------#
+# Quadtree
+# -----------------------------------------------------------------------------#
+
+
+@dataclass
+class _Node:
+    """
+    A node of the quadtree. The boundary pixels of the node are the range
+    [start, stop) of the sorted boundary arrays.
+    """
+
+    start: int
+    stop: int
+    centroid: np.ndarray
+    radius: float
+    value_sum: np.ndarray
+    dipole: np.ndarray
+    children: list["_Node"] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return self.stop - self.start
+
+
+def _build(
+    coords: np.ndarray, values: np.ndarray, start: int, stop: int, leaf_size: int
+) -> _Node:
+    """
+    Build the node of the range [start, stop). coords and values are
+    reordered in place so that every child is a contiguous range.
+    """
+    points = coords[start:stop]
+    centroid = points.mean(axis=0)
+    offsets = points - centroid
+    radius = float(np.sqrt((offsets**2).sum(axis=1).max()))
+    node_values = values[start:stop]
+    node = _Node(
+        start,
+        stop,
+        centroid,
+        radius,
+        node_values.sum(axis=0),
+        np.tensordot(offsets, node_values, axes=(0, 0)),
+    )
+
+    if node.count <= leaf_size or radius == 0:
+        return node
+
+    # Split the bounding box in four quadrants
+    middle = (points.min(axis=0) + points.max(axis=0)) / 2
+    quadrant = (points[:, 0] > middle[0]) * 2 + (points[:, 1] > middle[1])
+    order = np.argsort(quadrant, kind="stable")
+    coords[start:stop] = points[order]
+    values[start:stop] = values[start:stop][order]
+
+    bounds = np.searchsorted(quadrant[order], np.arange(5))
+    for low, high in zip(bounds[:-1], bounds[1:]):
+        if high > low:
+            node.children.append(
+                _build(coords, values, start + low, start + high, leaf_size)
+            )
+    return node
+
+
+def _derivatives(
+    dist: np.ndarray, param_z: int, param_e: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The default weight w(d) = 1 / (d^z + e) and its first and second
+    derivatives with respect to d.
+    """
+    power = np.power(dist, param_z)
+    base = power + param_e
+    weight = 1.0 / base
+    slope = -param_z * power / dist / base**2
+    curvature = (
+        param_z
+        * power
+        / dist**2
+        * (2 * param_z * power - (param_z - 1) * base)
+        / base**3
+    )
+    return weight, slope, curvature
+
+
+# -----------------------------------------------------------------------------#
+# Engine
+# -----------------------------------------------------------------------------#
+
+
+class QuadTreeEngine(AbstractFillEngine):
+    """
+    Approximates the hole colors with a quadtree over the boundary pixels.
+    Works with the DefaultWeightMechanism.
+
+    Args:
+        theta (float): Opening angle. A node is approximated when its radius
+            is less than theta times its distance to the hole. Defaults to 0.5
+        leaf_size (int): Maximum number of boundary pixels in a leaf. Leaves
+            are computed exactly. Defaults to 32
+    """
+
+    def __init__(self, theta: float = 0.5, leaf_size: int = 32):
+        self.__theta = theta
+        self.__leaf_size = max(1, leaf_size)
+        self.__max_error = 0.0
+
+    # -------------------------------------------------------------------------#
+    # Properties
+    # -------------------------------------------------------------------------#
+    @property
+    def theta(self) -> float:
+        """
+        Return the opening angle
+        """
+        return self.__theta
+
+    @property
+    def max_error(self) -> float:
+        """
+        Return the largest estimated error of a filled color over all the
+        compute calls of this engine
+        """
+        return self.__max_error
+
+    # -------------------------------------------------------------------------#
+    # Methods
+    # -------------------------------------------------------------------------#
+    def compute(
+        self,
+        weighting: "AbstractWeightingMechanism",
+        holes: np.ndarray,
+        boundaries: np.ndarray,
+        values: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Compute the approximate color of every hole.
+
+        Args:
+            weighting (AbstractWeightingMechanism): A DefaultWeightMechanism
+            holes (np.ndarray): (n, 2) array of hole coordinates
+            boundaries (np.ndarray): (m, 2) array of boundary coordinates
+            values (np.ndarray): (m,) array of boundary colors
+
+        Returns:
+            A (n,) array with the color of each hole
+
+        Raises:
+            HoleFillingException
+        """
+        if not isinstance(weighting, DefaultWeightMechanism):
+            raise HoleFillingException(
+                "QuadTreeEngine only supports the DefaultWeightMechanism"
+            )
+
+        holes = np.asarray(holes, dtype=np.float64).reshape(-1, 2)
+        coords = np.array(boundaries, dtype=np.float64).reshape(-1, 2)
+        values = np.array(values, dtype=np.float64)
+        if not len(holes):
+            return np.empty((0,) + values.shape[1:], dtype=np.float64)
+
+        root = _build(coords, values, 0, len(coords), self.__leaf_size)
+
+        numerator = np.zeros((len(holes),) + values.shape[1:], dtype=np.float64)
+        denominator = np.zeros(len(holes), dtype=np.float64)
+        uncertainty = np.zeros(len(holes), dtype=np.float64)
+
+        param_z, param_e = weighting.param_z, weighting.param_e
+
+        stack = [(root, np.arange(len(holes)))]
+        while stack:
+            node, index = stack.pop()
+            offset = holes[index] - node.centroid
+            dist = np.sqrt((offset * offset).sum(axis=1))
+
+            far = node.radius < self.__theta * dist
+            if far.any():
+                far_index, far_dist = index[far], dist[far]
+                node_weight, slope, curvature = _derivatives(far_dist, param_z, param_e)
+
+                # (c - u) . p, for every channel
+                dipole = np.tensordot(-offset[far], node.dipole, axes=(1, 0))
+                gradient = slope / far_dist
+                numerator[far_index] += np.multiply.outer(node_weight, node.value_sum)
+                numerator[far_index] += (
+                    gradient.reshape((-1,) + (1,) * (dipole.ndim - 1)) * dipole
+                )
+                denominator[far_index] += node_weight * node.count
+                uncertainty[far_index] += (
+                    node.count
+                    * node.radius**2
+                    / 2
+                    * np.maximum(np.abs(curvature), np.abs(gradient))
+                )
+
+            near_index = index[~far]
+            if not len(near_index):
+                continue
+
+            if node.children:
+                stack.extend((child, near_index) for child in node.children)
+                continue
+
+            # Leaf: exact weights
+            weights = weighting.get_weights(
+                holes[near_index], coords[node.start : node.stop]
+            )
+            numerator[near_index] += weights @ values[node.start : node.stop]
+            denominator[near_index] += weights.sum(axis=1)
+
+        value_range = float(np.ptp(values)) if len(values) else 0.0
+        errors = np.minimum(uncertainty / denominator, 1.0) * value_range
+        self.__max_error = max(self.__max_error, float(errors.max()))
+
+        if numerator.ndim > 1:
+            return numerator / denominator[:, None]
+        return numerator / denominator
@@ -0,0 +1,197 @@
+"""
+module: convolution
+
+Exact fill through FFT convolution.
+
+When the weight only depends on the offset between the hole and the boundary
+pixel, w(u,v) = k(u-v), both sums of the fill formula are 2D convolutions
+over the bounding box of the region:
+
+    sum(w(u,v) * I(v)) = (k * (I . M))(u)
+    sum(w(u,v))        = (k * M)(u)
+
+where M is 1 on the boundary pixels and 0 elsewhere. Both are computed with
+the FFT in O(N log N), N being the number of pixels of the bounding box,
+whatever the number of holes and boundary pixels.
+
+The FFT round-off is proportional to the largest weight of the kernel, while
+the sums deep inside a large hole are made of the smallest weights. With a
+large z or a small epsilon, the ratio between the two exceeds the float
+precision: the engine then estimates the error of its result and falls back
+to the exact VectorizedEngine when it is above FFT_TOLERANCE.
+"""
+
+# Builtin imports
+import sys
+from typing import TYPE_CHECKING
+
+# Project specific imports
+import numpy as np
+
+# Local imports
+from ..exceptions import HoleFillingException
+from .engines import AbstractFillEngine, VectorizedEngine
+
+if TYPE_CHECKING:
+    from .weighting import AbstractWeightingMechanism
+
+# -----------------------------------------------------------------------------#
+# Constants
+# -----------------------------------------------------------------------------#
+
+# Largest relative error accepted from the FFT before falling back
+FFT_TOLERANCE = 1e-6
+
+# -----------------------------------------------------------------------------#
+# Functions
+# -----------------------------------------------------------------------------#
+
+
+def _fast_length(length: int) -> int:
+    """
+    Smallest product of 2, 3 and 5 greater or equal to length. The FFT is
+    much faster on these sizes.
+    """
+    best = 2 ** max(0, (length - 1).bit_length())
+    power_5 = 1
+    while power_5 < best:
+        power_35 = power_5
+        while power_35 < best:
+            candidate = power_35
+            while candidate < length:
+                candidate *= 2
+            best = min(best, candidate)
+            power_35 *= 3
+        power_5 *= 5
+    return best
+
+
+def fft_error(largest_weight: float, smallest_sum: float, boundary_count: int) -> float:
+    """
+    Estimate the relative error of the FFT fill. The round-off of each
+    convolved value is about eps * largest_weight * sqrt(boundary_count),
+    and it is divided by the weight sum of the hole. The estimate is an upper
+    bound, a few tens of times above the measured error.
+
+    Args:
+        largest_weight (float): Largest weight of the kernel
+        smallest_sum (float): Smallest weight sum over the holes
+        boundary_count (int): Number of boundary pixels
+
+    Returns:
+        The estimated relative error, inf if the sum is not positive
+    """
+    if not np.isfinite(largest_weight) or not smallest_sum > 0:
+        return np.inf
+    noise = np.finfo(np.float64).eps * largest_weight * np.sqrt(boundary_count)
+    return float(noise / smallest_sum)
+
+
+# -----------------------------------------------------------------------------#
+# Engine
+# -----------------------------------------------------------------------------#
+
+
+class FFTEngine(AbstractFillEngine):
+    """
+    Computes the exact hole colors with two FFT convolutions over the bounding
+    box of the holes and boundaries. Works with the translation invariant
+    weighting mechanisms, on integer pixel coordinates.
+
+    The kernel and the padded grids take about 9 times the bounding box, so
+    prefer it for large holes whose bounding box is mostly holes and
+    boundaries. When the kernel dynamic range makes the FFT inaccurate (see
+    fft_error), the holes are computed by the exact VectorizedEngine instead.
+    """
+
+    def block_size(self, boundary_count: int) -> int:
+        """
+        The convolution covers the whole region at once: a region is never
+        split.
+
+        Args:
+            boundary_count (int): Number of boundary pixels
+
+        Returns:
+            Number of holes
+        """
+        return sys.maxsize
+
+    def compute(
+        self,
+        weighting: "AbstractWeightingMechanism",
+        holes: np.ndarray,
+        boundaries: np.ndarray,
+        values: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Compute the color of every hole.
+
+        Args:
+            weighting (AbstractWeightingMechanism): A translation invariant
+                weighting mechanism
+            holes (np.ndarray): (n, 2) array of hole coordinates
+            boundaries (np.ndarray): (m, 2) array of boundary coordinates
+            values (np.ndarray): (m,) array of boundary colors
+
+        Returns:
+            A (n,) array with the color of each hole
+
+        Raises:
+            HoleFillingException
+        """
+        if not weighting.translation_invariant:
+            raise HoleFillingException(
+                "FFTEngine only supports translation invariant weighting mechanisms"
+            )
+
+        holes = np.asarray(holes, dtype=np.float64).reshape(-1, 2)
+        boundaries = np.asarray(boundaries, dtype=np.float64).reshape(-1, 2)
+        values = np.asarray(values, dtype=np.float64)
+        if not len(holes):
+            return np.empty((0,) + values.shape[1:], dtype=np.float64)
+
+        points = np.concatenate([holes, boundaries])
+        if not np.array_equal(points, np.round(points)):
+            raise HoleFillingException("FFTEngine requires integer pixel coordinates")
+
+        origin = points.min(axis=0)
+        hole_index = (holes - origin).astype(np.intp)
+        boundary_index = (boundaries - origin).astype(np.intp)
+        rows, cols = (int(size) + 1 for size in points.max(axis=0) - origin)
+
+        # Weight of every offset between two pixels of the bounding box
+        d_row, d_col = np.mgrid[-(rows - 1) : rows, -(cols - 1) : cols]
+        offsets = np.stack([d_row.ravel(), d_col.ravel()], axis=1)
+        kernel = weighting.get_weights(offsets, np.zeros((1, 2))).reshape(d_row.shape)
+
+        indicator = np.zeros((rows, cols), dtype=np.float64)
+        indicator[boundary_index[:, 0], boundary_index[:, 1]] = 1.0
+        weighted = np.zeros((rows, cols) + values.shape[1:], dtype=np.float64)
+        weighted[boundary_index[:, 0], boundary_index[:, 1]] = values
+
+        # Linear (not circular) convolution
+        shape = (_fast_length(3 * rows - 2), _fast_length(3 * cols - 2))
+        kernel_fft = np.fft.rfft2(kernel, shape)
+
+        def convolve(grid: np.ndarray) -> np.ndarray:
+            grid_fft = np.fft.rfft2(grid, shape, axes=(0, 1))
+            spectrum = grid_fft * kernel_fft.reshape(
+                kernel_fft.shape + (1,) * (grid.ndim - 2)
+            )
+            full = np.fft.irfft2(spectrum, shape, axes=(0, 1))
+            # The pixel p of the grid is at p + (size - 1) in the full result
+            return full[rows - 1 : 2 * rows - 1, cols - 1 : 2 * cols - 1]
+
+        numerator = convolve(weighted)[hole_index[:, 0], hole_index[:, 1]]
+        denominator = convolve(indicator)[hole_index[:, 0], hole_index[:, 1]]
+
+        # The round-off may swamp the weight sums, even turn them to 0
+        if not np.isfinite(denominator).all() or (
+            fft_error(kernel.max(), denominator.min(), len(boundaries)) > FFT_TOLERANCE
+        ):
+            return VectorizedEngine().compute(weighting, holes, boundaries, values)
+
+        if numerator.ndim > 1:
+            return numerator / denominator[:, None]
+        return numerator / denominator
@@ -0,0 +1,193 @@
+"""
+module: detection
+
+Finds the holes and their boundaries with array operations.
+
+The holes are the pixels whose value is -1. The boundary is the dilation of
+the hole mask, using a 4 or 8 connected structuring element based on the
+Connectivity, minus the hole itself.
+
+The holes can also be split in their 8 connected components, each one with
+its own boundary, so that they can be filled independently.
+
+Color images have the shape (rows, columns, C). Every channel of a hole is
+-1, so the holes are found in the first channel and the boundaries carry the
+values of all the channels.
+
+find_hole_window bounds all the holes, so that the rest of the pipeline only
+has to process the window around them.
+"""
+
+# Project specific imports
+import numpy as np
+
+# Local imports
+from .models import Connectivity, PixelSet
+
+HOLE_VALUE = -1
+
+# Neighbour offsets for each connectivity
+OFFSETS = {
+    Connectivity.FOUR: ((0, -1), (0, 1), (-1, 0), (1, 0)),
+    Connectivity.EIGHT: (
+        (0, -1),
+        (0, 1),
+        (-1, 0),
+        (1, 0),
+        (-1, -1),
+        (-1, 1),
+        (1, -1),
+        (1, 1),
+    ),
+}
+
+# -----------------------------------------------------------------------------#
+# Functions
+# -----------------------------------------------------------------------------#
+
+
+def dilate(mask: np.ndarray, connectivity: Connectivity) -> np.ndarray:
+    """
+    Dilate a boolean mask by one pixel. Pixels outside the image are ignored.
+
+    Args:
+        mask (np.ndarray): 2D boolean array
+        connectivity (Connectivity): Structuring element to dilate with
+
+    Returns:
+        A new 2D boolean array
+    """
+    dilated = mask.copy()
+    rows, cols = mask.shape
+    for d_row, d_col in OFFSETS[connectivity]:
+        dst_rows = slice(max(d_row, 0), rows + min(d_row, 0))
+        dst_cols = slice(max(d_col, 0), cols + min(d_col, 0))
+        src_rows = slice(max(-d_row, 0), rows + min(-d_row, 0))
+        src_cols = slice(max(-d_col, 0), cols + min(-d_col, 0))
+        dilated[dst_rows, dst_cols] |= mask[src_rows, src_cols]
+    return dilated
+
+
+def find_boundary_mask(hole_mask: np.ndarray, connectivity: Connectivity) -> np.ndarray:
+    """
+    Find the pixels connected to a hole that are not holes themselves.
+
+    Args:
+        hole_mask (np.ndarray): 2D boolean array, True for the holes
+        connectivity (Connectivity): Pixel connectivity
+
+    Returns:
+        A 2D boolean array, True for the boundaries
+    """
+    return dilate(hole_mask, connectivity) & ~hole_mask
+
+
+def find_hole_mask(image: np.ndarray) -> np.ndarray:
+    """
+    Find the holes of a grayscale or a color image.
+
+    Args:
+        image (np.ndarray): 2D array, or 3D for a color image, where the holes
+            are set to -1
+
+    Returns:
+        A 2D boolean array, True for the holes
+    """
+    if image.ndim == 3:
+        return image[:, :, 0] == HOLE_VALUE
+    return image == HOLE_VALUE
+
+
+def find_hole_window(hole_mask: np.ndarray, margin: int = 1) -> tuple[slice, slice]:
+    """
+    Find the bounding box of the holes, padded by a margin and clipped to the
+    image.
+
+    Args:
+        hole_mask (np.ndarray): 2D boolean array, True for the holes
+        margin (int): Pixels added around the holes. Defaults to 1, the
+            boundary of either connectivity
+
+    Returns:
+        The rows and columns slices of the window. Empty if there is no hole
+    """
+    import cv2
+
+    left, top, width, height = cv2.boundingRect(hole_mask.view(np.uint8))
+    if not width:
+        return slice(0, 0), slice(0, 0)
+
+    rows, cols = hole_mask.shape
+    return (
+        slice(max(top - margin, 0), min(top + height + margin, rows)),
+        slice(max(left - margin, 0), min(left + width + margin, cols)),
+    )
+
+
+def find_holes_and_boundaries(
+    image: np.ndarray, connectivity: Connectivity
+) -> tuple[PixelSet, PixelSet]:
+    """
+    Find the holes and their boundaries in the image.
+
+    Args:
+        image (np.ndarray): 2D array, or 3D for a color image, where the holes
+            are set to -1
+        connectivity (Connectivity): Pixel connectivity
+
+    Returns:
+        A tuple of PixelSet, the holes and the boundaries. The boundaries
+        carry their value in the image.
+    """
+    hole_mask = find_hole_mask(image)
+    boundary_mask = find_boundary_mask(hole_mask, connectivity)
+    return PixelSet.from_mask(hole_mask), PixelSet.from_mask(boundary_mask, image)
+
+
+def find_components(
+    image: np.ndarray, connectivity: Connectivity
+) -> list[tuple[PixelSet, PixelSet]]:
+    """
+    Label the 8 connected components of the holes and find the boundary of
+    each component. Only a window around each component is scanned.
+
+    Args:
+        image (np.ndarray): 2D array, or 3D for a color image, where the holes
+            are set to -1
+        connectivity (Connectivity): Pixel connectivity of the boundary
+
+    Returns:
+        A list with the holes and the boundaries of each component, ordered
+        by label
+    """
+    import cv2
+
+    hole_mask = find_hole_mask(image)
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(
+        hole_mask.view(np.uint8), connectivity=8, ltype=cv2.CV_32S
+    )
+
+    rows, cols = hole_mask.shape
+    components = []
+    for label in range(1, count):
+        left, top, width, height, _ = stats[label]
+
+        # Window around the component, padded by the connectivity radius
+        row_start, row_stop = max(top - 1, 0), min(top + height + 1, rows)
+        col_start, col_stop = max(left - 1, 0), min(left + width + 1, cols)
+        window = (slice(row_start, row_stop), slice(col_start, col_stop))
+
+        component = labels[window] == label
+        boundary = find_boundary_mask(component, connectivity) & ~hole_mask[window]
+
+        hole_rows, hole_cols = np.nonzero(component)
+        boundary_rows, boundary_cols = np.nonzero(boundary)
+        holes = PixelSet(hole_rows + row_start, hole_cols + col_start)
+        boundaries = PixelSet(
+            boundary_rows + row_start,
+            boundary_cols + col_start,
+            image[window][boundary],
+        )
+        components.append((holes, boundaries))
+
+    return components
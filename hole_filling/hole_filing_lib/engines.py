@@ -0,0 +1,238 @@
+"""
+module: engines
+
+Fill engines compute the color of every hole pixel in one go, instead of the
+pixel by pixel loop in HoleFiller.calculate_hole_color. They implement
+AbstractFillEngine.
+
+VectorizedEngine evaluates the weighted average
+
+    I(u) = sum(w(u,v) * I(v)) / sum(w(u,v))    for v in B
+
+with numpy array operations over the hole and boundary coordinates. The
+weights come from AbstractWeightingMechanism.get_weights. The boundary values
+of a color image are an (m, C) array: the weights are computed once and
+applied to every channel in the same matrix product. The n x m
+weight matrix is never allocated in full. Hole pixels are processed in blocks
+whose size is derived from a memory budget.
+
+Engines that need the image around the holes, not only the boundary pixels,
+set image_based and override fill_region instead of compute. They always run
+on the whole image in the main process, one channel at a time for a color
+image.
+"""
+
+# Builtin imports
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+# Project specific imports
+import numpy as np
+
+# Local imports
+from .models import PixelSet
+
+if TYPE_CHECKING:
+    from .models import Connectivity
+    from .weighting import AbstractWeightingMechanism
+
+# Default memory budget for the temporary weight blocks: 64 MiB
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+
+# Number of n x m float64 temporaries alive at the same time while a block is
+# being evaluated (row offsets, column offsets, distances, weights)
+_TEMPORARIES = 4
+
+# -----------------------------------------------------------------------------#
+# Classes
+# -----------------------------------------------------------------------------#
+
+
+class AbstractFillEngine(ABC):
+    """
+    An abstract class that all fill engines should use to implement
+    """
+
+    # True when the engine reads the image around the holes in fill_region
+    image_based = False
+
+    @abstractmethod
+    def compute(
+        self,
+        weighting: "AbstractWeightingMechanism",
+        holes: np.ndarray,
+        boundaries: np.ndarray,
+        values: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Compute the color of every hole.
+
+        Args:
+            weighting (AbstractWeightingMechanism): Weighting mechanism to use
+            holes (np.ndarray): (n, 2) array of hole coordinates
+            boundaries (np.ndarray): (m, 2) array of boundary coordinates
+            values (np.ndarray): (m,) array of boundary colors, or (m, C) for
+                a color image
+
+        Returns:
+            A (n,) or (n, C) array with the color of each hole
+        """
+
+    def fill_region(
+        self,
+        image: np.ndarray,
+        weighting: "AbstractWeightingMechanism",
+        connectivity: "Connectivity",
+        holes: PixelSet,
+        boundaries: PixelSet,
+    ) -> None:
+        """
+        Fill the holes of a region of the image in place. The colors are
+        computed with compute.
+
+        Args:
+            image (np.ndarray): 2D array where the holes are set to -1, or
+                3D for a color image unless the engine is image based
+            weighting (AbstractWeightingMechanism): Weighting mechanism to use
+            connectivity (Connectivity): Pixel connectivity
+            holes (PixelSet): Holes to fill
+            boundaries (PixelSet): Boundaries used to fill the holes
+        """
+        if holes:
+            image[holes.rows, holes.columns] = self.compute(
+                weighting, holes.coords, boundaries.coords, boundaries.values
+            )
+
+    def fill_channels(
+        self,
+        image: np.ndarray,
+        weighting: "AbstractWeightingMechanism",
+        connectivity: "Connectivity",
+        holes: PixelSet,
+        boundaries: PixelSet,
+    ) -> None:
+        """
+        Fill the holes of a region of a grayscale or a color image in place.
+        Image based engines fill a color image one channel at a time, the
+        others fill all the channels with fill_region.
+
+        Args:
+            image (np.ndarray): 2D array, or 3D for a color image, where the
+                holes are set to -1
+            weighting (AbstractWeightingMechanism): Weighting mechanism to use
+            connectivity (Connectivity): Pixel connectivity
+            holes (PixelSet): Holes to fill
+            boundaries (PixelSet): Boundaries used to fill the holes
+        """
+        if image.ndim == 2 or not self.image_based:
+            self.fill_region(image, weighting, connectivity, holes, boundaries)
+            return
+
+        for index in range(image.shape[2]):
+            self.fill_region(
+                image[:, :, index],
+                weighting,
+                connectivity,
+                holes,
+                PixelSet(
+                    boundaries.rows, boundaries.columns, boundaries.values[:, index]
+                ),
+            )
+
+    @property
+    def margin(self) -> int:
+        """
+        Return how far, in pixels, fill_region reads the image around the
+        holes. Defaults to 1: the boundary only.
+        """
+        return 1
+
+    def block_size(self, boundary_count: int) -> int:
+        """
+        Number of holes that must be computed together for the result to be
+        reproducible. The parallel fill splits the holes on multiples of it.
+        Defaults to 1: every hole is computed independently.
+
+        Args:
+            boundary_count (int): Number of boundary pixels
+
+        Returns:
+            Number of holes
+        """
+        return 1
+
+
+class VectorizedEngine(AbstractFillEngine):
+    """
+    Computes the hole colors with numpy array operations.
+
+    Args:
+        memory_budget (int): Upper bound, in bytes, of the temporary weight
+            arrays allocated while filling a block of holes. Defaults to 64 MiB
+    """
+
+    def __init__(self, memory_budget: int = DEFAULT_MEMORY_BUDGET):
+        self.__memory_budget = memory_budget
+
+    # -------------------------------------------------------------------------#
+    # Properties
+    # -------------------------------------------------------------------------#
+    @property
+    def memory_budget(self) -> int:
+        """
+        Return the memory budget in bytes
+        """
+        return self.__memory_budget
+
+    # -------------------------------------------------------------------------#
+    # Methods
+    # -------------------------------------------------------------------------#
+    def block_size(self, boundary_count: int) -> int:
+        """
+        Number of holes evaluated together so that the temporaries stay within
+        the memory budget. Always at least 1.
+
+        Args:
+            boundary_count (int): Number of boundary pixels
+
+        Returns:
+            Number of hole rows per block
+        """
+        bytes_per_hole = max(boundary_count, 1) * 8 * _TEMPORARIES
+        return max(1, self.__memory_budget // bytes_per_hole)
+
+    def compute(
+        self,
+        weighting: "AbstractWeightingMechanism",
+        holes: np.ndarray,
+        boundaries: np.ndarray,
+        values: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Compute the color of every hole.
+
+        Args:
+            weighting (AbstractWeightingMechanism): Weighting mechanism to use
+            holes (np.ndarray): (n, 2) array of hole coordinates
+            boundaries (np.ndarray): (m, 2) array of boundary coordinates
+            values (np.ndarray): (m,) array of boundary colors, or (m, C) for
+                a color image
+
+        Returns:
+            A (n,) or (n, C) array with the color of each hole
+        """
+        holes = np.asarray(holes, dtype=np.float64).reshape(-1, 2)
+        boundaries = np.asarray(boundaries, dtype=np.float64).reshape(-1, 2)
+        values = np.asarray(values, dtype=np.float64)
+
+        colors = np.empty((len(holes),) + values.shape[1:], dtype=np.float64)
+        step = self.block_size(len(boundaries))
+        for start in range(0, len(holes), step):
+            stop = start + step
+            weights = weighting.get_weights(holes[start:stop], boundaries)
+            denominator = weights.sum(axis=1)
+            if values.ndim > 1:
+                denominator = denominator[:, None]
+            colors[start:stop] = (weights @ values) / denominator
+
+        return colors
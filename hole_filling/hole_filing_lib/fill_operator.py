@@ -0,0 +1,212 @@
+"""
+module: fill_operator
+
+Compiles the fill of a fixed mask once, then applies it to many images, for
+the frames of a video or a timelapse that share the same mask.
+
+The colors of the holes are a linear function of the colors of the
+boundaries:
+
+    I(u) = sum(W(u,v) * I(v))    with W(u,v) = w(u,v) / sum(w(u,v'))  for v' in B
+
+FillOperator finds the holes and their boundaries from the mask, and computes
+the normalized n x m matrix W once. Filling an image is then a gather of the
+boundary values and a single matrix product, W @ I(B). The values of a color
+image are an (m, C) array, all the channels are filled by the same product.
+
+Filling per component splits W in one small block per component of the holes,
+each against its own boundary only. The blocks are much smaller than the full
+matrix when the mask has many small holes, like sensor dust.
+
+The matrix takes n * m * 8 bytes. Compiling an operator above its memory
+budget raises an error instead of allocating it.
+"""
+
+# Builtin imports
+import time
+from typing import TYPE_CHECKING
+
+# Project specific imports
+import numpy as np
+
+# Local imports
+from ..exceptions import HoleFillingException
+from .detection import HOLE_VALUE, find_components, find_holes_and_boundaries
+from .engines import VectorizedEngine
+from .models import Connectivity, PixelSet
+
+if TYPE_CHECKING:
+    from .weighting import AbstractWeightingMechanism
+
+# Default memory budget of the compiled matrices: 512 MiB
+DEFAULT_OPERATOR_BUDGET = 512 * 1024 * 1024
+
+# -----------------------------------------------------------------------------#
+# Class
+# -----------------------------------------------------------------------------#
+
+
+class FillOperator:
+    """
+    The fill of the holes of a mask, compiled once and applied to any image
+    of the same resolution.
+
+    Args:
+        hole_mask (np.ndarray): 2D boolean array, True for the holes
+        weighting (AbstractWeightingMechanism): An instance of
+            WeightingMechanism implemented using the AbstractWeightingMechanism
+            class
+        connectivity (Connectivity): Pixel connectivity of the boundary.
+            Defaults to 4
+        per_component (bool): If set to true, each 8 connected hole is filled
+            using only its own boundary. Default to False
+        max_bytes (int): Memory budget of the compiled matrices. Defaults to
+            512 MiB
+
+    Raises:
+        HoleFillingException
+    """
+
+    def __init__(
+        self,
+        hole_mask: np.ndarray,
+        weighting: "AbstractWeightingMechanism",
+        connectivity: Connectivity = Connectivity.FOUR,
+        per_component: bool = False,
+        max_bytes: int = DEFAULT_OPERATOR_BUDGET,
+    ):
+        start = time.perf_counter()
+        self.__shape = hole_mask.shape
+
+        # Only the position of the holes matters, not the colors
+        image = np.where(hole_mask, HOLE_VALUE, 0.0)
+        if per_component:
+            components = find_components(image, connectivity)
+        else:
+            components = [find_holes_and_boundaries(image, connectivity)]
+        components = [
+            (holes, boundaries)
+            for holes, boundaries in components
+            if holes and boundaries
+        ]
+
+        nbytes = sum(
+            len(holes) * len(boundaries) * 8 for holes, boundaries in components
+        )
+        if nbytes > max_bytes:
+            raise HoleFillingException(
+                f"The fill operator needs {nbytes / 2**20:.0f} MiB, above its budget "
+                f"of {max_bytes / 2**20:.0f} MiB. Fill per component or raise the "
+                "budget"
+            )
+
+        self.__blocks = [
+            (holes, boundaries, self.__compile(weighting, holes, boundaries))
+            for holes, boundaries in components
+        ]
+        self.__nbytes = nbytes
+        self.__compile_time = time.perf_counter() - start
+
+    # -------------------------------------------------------------------------#
+    # Properties
+    # -------------------------------------------------------------------------#
+    @property
+    def shape(self) -> tuple[int, int]:
+        """
+        Return the rows and columns of the images the operator applies to
+        """
+        return self.__shape
+
+    @property
+    def holes(self) -> PixelSet:
+        """
+        Return the pixels that are filled
+        """
+        return self.__merge([holes for holes, _, _ in self.__blocks])
+
+    @property
+    def boundaries(self) -> PixelSet:
+        """
+        Return the pixels the holes are filled from
+        """
+        return self.__merge([boundaries for _, boundaries, _ in self.__blocks])
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Return the memory used by the compiled matrices
+        """
+        return self.__nbytes
+
+    @property
+    def compile_time(self) -> float:
+        """
+        Return the time, in seconds, spent compiling the operator
+        """
+        return self.__compile_time
+
+    # -------------------------------------------------------------------------#
+    # Methods
+    # -------------------------------------------------------------------------#
+    def apply(self, image: np.ndarray, in_place: bool = False) -> np.ndarray:
+        """
+        Fill the holes of an image. The values of the hole pixels of the image
+        are ignored. Integer images are rounded and clipped to their dtype.
+
+        Args:
+            image (np.ndarray): 2D array, or 3D for a color image, of any dtype
+            in_place (bool): Write the holes into the image instead of a copy.
+                Default to False
+
+        Returns:
+            The filled image
+
+        Raises:
+            HoleFillingException
+        """
+        if image.shape[:2] != self.__shape:
+            raise HoleFillingException(
+                "Resolution mismatch. Image and Mask should be of same resolution."
+            )
+
+        filled = image if in_place else image.copy()
+        for holes, boundaries, matrix in self.__blocks:
+            values = image[boundaries.rows, boundaries.columns].astype(np.float64)
+            colors = matrix @ values
+            if np.issubdtype(image.dtype, np.integer):
+                limits = np.iinfo(image.dtype)
+                colors = np.clip(np.rint(colors), limits.min, limits.max)
+            filled[holes.rows, holes.columns] = colors
+        return filled
+
+    # -------------------------------------------------------------------------#
+    # Methods: Privates
+    # -------------------------------------------------------------------------#
+    @staticmethod
+    def __compile(
+        weighting: "AbstractWeightingMechanism", holes: PixelSet, boundaries: PixelSet
+    ) -> np.ndarray:
+        """
+        Compute the normalized weights of the holes, in blocks of holes
+        whose temporaries fit the budget of a VectorizedEngine.
+        """
+        hole_coords, boundary_coords = holes.coords, boundaries.coords
+        matrix = np.empty((len(holes), len(boundaries)), dtype=np.float64)
+        step = VectorizedEngine().block_size(len(boundaries))
+        for start in range(0, len(holes), step):
+            stop = start + step
+            weights = weighting.get_weights(hole_coords[start:stop], boundary_coords)
+            matrix[start:stop] = weights / weights.sum(axis=1, keepdims=True)
+        return matrix
+
+    @staticmethod
+    def __merge(pixel_sets: list[PixelSet]) -> PixelSet:
+        """
+        Merge the pixels of the blocks in a single PixelSet.
+        """
+        if not pixel_sets:
+            return PixelSet()
+        return PixelSet(
+            np.concatenate([pixels.rows for pixels in pixel_sets]),
+            np.concatenate([pixels.columns for pixels in pixel_sets]),
+        )
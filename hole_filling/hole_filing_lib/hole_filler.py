@@ -4,24 +4,54 @@ module: hole_filler
 For the given grayscale image where the pixel values are in the range of [0..1]
 and the hole pixels are set to -1, the class finds the boundary around the hole
 and fills the hole using an algorithm.
+
+Color images of shape (rows, columns, C) are filled in one pass: the weights of
+every hole and boundary pair are computed once and applied to all the channels
+together. Image based engines and the pyramid fill one channel at a time.
 """
 
 # Builtin imports
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, Optional, Union
 import tempfile
+import time
 from datetime import datetime
 import os
 
 # Project specific imports
-import cv2
+import numpy as np
 
 # Local imports
-from .models import Pixel, Connectivity
+from ..exceptions import HoleFillingException
+from .models import Pixel, PixelSet, Connectivity, ComponentStats, ParallelStats
+from .detection import find_holes_and_boundaries, find_components
+from .engines import AbstractFillEngine, VectorizedEngine
+from .parallel import parallel_fill
+from .profiling import NULL_PROFILER, Profiler
+from .pyramid import pyramid_fill
 
 if TYPE_CHECKING:
-    import numpy as np
     from .weighting import AbstractWeightingMechanism
 
+# Rows of the image converted to 8 bit at once when saving
+SAVE_ROWS = 256
+
+# -----------------------------------------------------------------------------#
+# Functions
+# -----------------------------------------------------------------------------#
+
+
+def output_filename(connectivity: Connectivity) -> str:
+    """
+    Return the timestamped name of an output image.
+
+    Args:
+        connectivity (Connectivity): Pixel connectivity of the fill
+    """
+    return (
+        f"Filled_c{connectivity.value}_{datetime.now().strftime("%m%d%y_%H%M%S")}.png"
+    )
+
+
 # -----------------------------------------------------------------------------#
 # Class
 # -----------------------------------------------------------------------------#
@@ -33,14 +63,46 @@ class HoleFiller:
 
     Args:
         image (np.ndarray): A 2D array in tha range of [0..1]. The hole is
-            represemted with a value of -1
+            represemted with a value of -1. A 3D array of shape
+            (rows, columns, C) is a color image
+
         weighting (AbstractWeightingMechanism): An instance of WeightingMechanism
             implemented using the AbstractWeigbhtingMechanism class.
         connectivity (Connectivity): Number of pixels the hole is connected to.
             Could be 4 or 8
         output_directory (str): Optional. Output image will be written out to this directory
+        output_path (str): Optional. If provided, the output image is written
+            to this exact path instead of a timestamped file in the output
+            directory
         debug (bool): If set to true, the boundary pixels are set to black while
             writing to disk. Default to False
+        engine (AbstractFillEngine): Optional. If provided, all the hole colors
+            are computed by the engine in one go instead of pixel by pixel.
+            Image based engines ignore workers and pyramid_levels.
+        per_component (bool): If set to true, each 8 connected hole is filled
+            independently, using only its own boundary. Default to False
+        workers (int): Number of processes used to fill the holes. The holes
+            are split across a process pool when more than 1. The result is
+            identical to a serial fill with the same engine. Without an
+            engine, the workers use a VectorizedEngine instead of the pixel
+            by pixel fill, so the colors can differ from the serial fill by
+            float rounding. Default to 1
+        pyramid_levels (int): If more than 0, the holes are filled coarse to
+            fine over this many halvings of the resolution. Default to 0
+        pyramid_band (int): Width, in pixels, of the band of holes refined
+            exactly at each pyramid level. Default to 2
+        profiler (Profiler): Optional. Records the time, throughput and
+            memory of the detect, fill and save stages. Default to no
+            profiling
+        frame (np.ndarray): Optional. Image the image is a window of, with
+            the same channels and any bit depth. Only the window is
+            processed: its filled pixels are written into the frame, at
+            offset, and the whole frame is saved
+        offset (tuple[int, int]): Row and column of the window in the frame.
+            Default to (0, 0)
+        output_dtype (np.dtype): Type of the pixels of the saved image when
+            there is no frame, such as ImagePreProcessor.source_dtype to keep
+            the bit depth of the source. Default to uint8
     """
 
     def __init__(
@@ -50,38 +112,90 @@ class HoleFiller:
         connectivity: Connectivity = Connectivity.FOUR,
         output_directory: Optional[str] = None,
         debug: bool = False,
+        engine: Optional["AbstractFillEngine"] = None,
+        per_component: bool = False,
+        workers: int = 1,
+        output_path: Optional[str] = None,
+        pyramid_levels: int = 0,
+        pyramid_band: int = 2,
+        profiler: Optional[Profiler] = None,
+        frame: Optional["np.ndarray"] = None,
+        offset: tuple[int, int] = (0, 0),
+        output_dtype: "np.typing.DTypeLike" = np.uint8,
     ):
         self.__image = image
         self.__weighting = weighting
         self.__connectivity = connectivity
         self.__output_directory = output_directory
+        self.__output_path = output_path
+        self.__pyramid_levels = pyramid_levels
+        self.__pyramid_band = pyramid_band
         self.__debug = debug
-
-        # Get the resolution of the image
-        self.__rows = self.__image.shape[0]
-        self.__columns = self.__image.shape[1]
+        self.__engine = engine
+        self.__per_component = per_component
+        self.__workers = workers
+        self.__profiler = profiler or NULL_PROFILER
+        self.__frame = frame
+        self.__offset = offset
+        self.__output_dtype = np.dtype(output_dtype)
 
         # Holes and Boundaries
-        self.__holes: set[Pixel] = set()
-        self.__boundaries: set[Pixel] = set()
+        self.__holes = PixelSet()
+        self.__boundaries = PixelSet()
+        self.__component_stats: list[ComponentStats] = []
+        self.__parallel_stats: Optional[ParallelStats] = None
 
     # -------------------------------------------------------------------------#
     # Properties
     # -------------------------------------------------------------------------#
     @property
-    def holes(self) -> set[Pixel]:
+    def holes(self) -> PixelSet:
         """
         Return the pixels that are holes
         """
         return self.__holes
 
     @property
-    def boundaries(self) -> set[Pixel]:
+    def boundaries(self) -> PixelSet:
         """
         Return the pixels that are boundaries
         """
         return self.__boundaries
 
+    @property
+    def output_path(self) -> Optional[str]:
+        """
+        Return the path the output image is written to. Set after saving
+        unless provided.
+        """
+        return self.__output_path
+
+    @property
+    def component_stats(self) -> list[ComponentStats]:
+        """
+        Return the statistics of the filled components. When not filling per
+        component, all the holes are reported as a single component.
+        """
+        return self.__component_stats
+
+    @property
+    def profile(self) -> dict[str, Any]:
+        """
+        Return the time, throughput and memory of each profiled stage. Empty
+        unless a profiler is set.
+        """
+        if not self.__profiler.enabled:
+            return {}
+        return self.__profiler.as_dict()
+
+    @property
+    def parallel_stats(self) -> Optional[ParallelStats]:
+        """
+        Return how the last fill scaled across the workers. None unless the
+        fill ran on more than one worker.
+        """
+        return self.__parallel_stats
+
     # -------------------------------------------------------------------------#
     # Methods
     # -------------------------------------------------------------------------#
@@ -89,11 +203,15 @@ class HoleFiller:
         """
         Fill the hole
         """
-        self.find_holes_and_boundaries()
+        with self.__profiler.stage("detect", self.__image.size) as counters:
+            self.find_holes_and_boundaries()
+            counters["holes"] = len(self.holes)
+            counters["boundaries"] = len(self.boundaries)
 
-        for hole in self.holes:
-            hole_color = self.calculate_hole_color(hole)
-            self.__image[hole.row][hole.column] = hole_color
+        self.__component_stats = []
+        with self.__profiler.stage("fill", len(self.holes)) as counters:
+            self.__fill()
+            counters["components"] = len(self.__component_stats)
 
         self.save()
 
@@ -102,89 +220,184 @@ class HoleFiller:
         Find the pixels that are holes (whose value is set to -1) and their
         boundary pixels.
         """
-        for row_index, row in enumerate(self.__image):
-            for col_index, value in enumerate(row):
-                if value == -1:
-                    # Found a hole
-                    hole = Pixel(row_index, col_index, -1)
-                    self.__holes.add(hole)
+        self.__holes, self.__boundaries = find_holes_and_boundaries(
+            self.__image, self.__connectivity
+        )
 
-                    # Find its connected pixels
-                    connected_pixels = self.__get_connected_pixels(hole)
-                    self.__boundaries.update(connected_pixels)
-
-    def calculate_hole_color(self, hole: Pixel) -> float:
+    def calculate_hole_color(
+        self, hole: Pixel, boundaries: Optional[PixelSet] = None
+    ) -> Union[float, "np.ndarray"]:
         """
-        Calculcate the color for the hole
+        Calculcate the color for the hole. The color of a hole of a color
+        image is the array of its channels
+
+        Args:
+            hole (Pixel): Hole whose color has to be computed
+            boundaries (PixelSet): Optional. Boundaries used for the weighted
+                average. Defaults to all the boundaries
         """
-        numerator = 0.0
+        if boundaries is None:
+            boundaries = self.boundaries
+
+        numerator: Union[float, "np.ndarray"] = 0.0
         denominator = 0.0
-        for boundary in self.boundaries:
+        for boundary in boundaries:
             weight = self.__weighting.get_weight(hole, boundary)
-            numerator += weight * boundary.value
+            # The value of a color boundary is the tuple of its channels
+            value = boundary.value
+            numerator += weight * (
+                np.asarray(value) if isinstance(value, tuple) else value
+            )
             denominator += weight
 
         return numerator / denominator
 
     def save(self) -> None:
         """
-        Saves the image
+        Saves the image. With a frame, only the holes, and the boundaries
+        when debugging, are written into it.
         """
-        if self.__debug:
-            for boundary in self.boundaries:
-                self.__image[boundary.row][boundary.column] = 0
+        import cv2
 
-        img = self.__image * 255
+        if self.__debug:
+            self.__image[self.boundaries.rows, self.boundaries.columns] = 0
 
-        if not self.__output_directory:
-            self.__output_directory = tempfile.TemporaryDirectory().name
+        filepath = self.__output_path
+        if not filepath:
+            if not self.__output_directory:
+                self.__output_directory = tempfile.mkdtemp()
 
-        filename = f"Filled_c{self.__connectivity.value}_{datetime.now().strftime("%m%d%y_%H%M%S")}.png"
-        filepath = os.path.join(self.__output_directory, filename)
-        cv2.imwrite(filepath, img)
+            filepath = os.path.join(
+                self.__output_directory, output_filename(self.__connectivity)
+            )
+            self.__output_path = filepath
+
+        with self.__profiler.stage("save", self.__image.size) as counters:
+            if self.__frame is None:
+                # Converted a strip of rows at a time, without a float copy of
+                # the whole image
+                img = np.empty(self.__image.shape, dtype=self.__output_dtype)
+                integer = np.issubdtype(img.dtype, np.integer)
+                scale = np.iinfo(img.dtype).max if integer else 1
+                for start in range(0, len(img), SAVE_ROWS):
+                    strip = self.__image[start : start + SAVE_ROWS] * scale
+                    if integer:
+                        np.rint(strip, out=strip)
+                    img[start : start + SAVE_ROWS] = np.clip(strip, 0, scale, out=strip)
+            else:
+                # Only the pixels that changed are converted back
+                img = self.__frame
+                top, left = self.__offset
+                changed = [self.holes] + ([self.boundaries] if self.__debug else [])
+                for pixels in changed:
+                    values = self.__image[pixels.rows, pixels.columns]
+                    if np.issubdtype(img.dtype, np.integer):
+                        scale = np.iinfo(img.dtype).max
+                        values = np.clip(np.rint(values * scale), 0, scale)
+                    img[pixels.rows + top, pixels.columns + left] = values
+                counters["pixels"] = img.size
+            written = cv2.imwrite(filepath, img)
+        if not written:
+            raise HoleFillingException(f"Failed to write: {filepath}")
 
         print(f"Filled output image written to: {filepath}")
 
     # -------------------------------------------------------------------------#
     # Methods: Privates
     # -------------------------------------------------------------------------#
-    def __get_connected_pixels(self, pixel: Pixel) -> list[Pixel]:
+    def __fill(self) -> None:
+        """
+        Fill the holes with the configured strategy.
         """
-        For a given pixel, based on the connectivity value, return a list of
-        connected pixels. Out of bound pixels are ignored
+        image_based = self.__engine is not None and self.__engine.image_based
+        if self.__pyramid_levels > 0 and not image_based:
+            self.__fill_pyramid()
+        else:
+            if self.__per_component:
+                components = find_components(self.__image, self.__connectivity)
+            else:
+                components = [(self.holes, self.boundaries)]
+
+            if self.__workers > 1 and not image_based:
+                self.__fill_in_parallel(components)
+            else:
+                for label, (holes, boundaries) in enumerate(components, 1):
+                    start = time.perf_counter()
+                    self.__fill_component(holes, boundaries)
+                    self.__component_stats.append(
+                        ComponentStats(
+                            label,
+                            len(holes),
+                            len(boundaries),
+                            time.perf_counter() - start,
+                        )
+                    )
+
+    def __fill_pyramid(self) -> None:
+        """
+        Fill all the holes coarse to fine.
+        """
+        start = time.perf_counter()
+        for channel in self.__channels():
+            pyramid_fill(
+                channel,
+                self.__weighting,
+                self.__connectivity,
+                self.__pyramid_levels,
+                self.__pyramid_band,
+                self.__engine,
+            )
+        self.__component_stats.append(
+            ComponentStats(
+                1, len(self.holes), len(self.boundaries), time.perf_counter() - start
+            )
+        )
+
+    def __fill_in_parallel(self, components: list[tuple[PixelSet, PixelSet]]) -> None:
+        """
+        Fill the components on a pool of processes.
 
         Args:
-            pixel (Pixel): Hole whose connected pixels has to be found.
-        """
-        connected_pixels = []
-
-        indices_to_check = [
-            (pixel.row, pixel.column - 1),
-            (pixel.row, pixel.column + 1),
-            (pixel.row - 1, pixel.column),
-            (pixel.row + 1, pixel.column),
-        ]
-
-        if self.__connectivity == Connectivity.EIGHT:
-            indices_to_check.extend(
-                [
-                    (pixel.row - 1, pixel.column - 1),
-                    (pixel.row - 1, pixel.column + 1),
-                    (pixel.row + 1, pixel.column - 1),
-                    (pixel.row + 1, pixel.column + 1),
-                ]
+            components (list): The holes and the boundaries of each component
+        """
+        engine = self.__engine or VectorizedEngine()
+        self.__parallel_stats = parallel_fill(
+            self.__image, components, self.__weighting, engine, self.__workers
+        )
+        for label, ((holes, boundaries), fill_time) in enumerate(
+            zip(components, self.__parallel_stats.component_times), 1
+        ):
+            self.__component_stats.append(
+                ComponentStats(label, len(holes), len(boundaries), fill_time)
             )
 
-        for row, col in indices_to_check:
-            # Within the image range
-            if (row < 0 or row >= self.__rows) or (col < 0 or col >= self.__columns):
-                continue
-
-            # Is it a hole?
-            value = self.__image[row][col]
-            if value == -1:
-                continue
+    def __channels(self) -> list["np.ndarray"]:
+        """
+        Return the 2D views of the channels of the image, the image itself if
+        it is grayscale. Filling a view fills the image.
+        """
+        if self.__image.ndim == 2:
+            return [self.__image]
+        return [self.__image[:, :, index] for index in range(self.__image.shape[2])]
 
-            connected_pixels.append(Pixel(row, col, value))
+    def __fill_component(self, holes: PixelSet, boundaries: PixelSet) -> None:
+        """
+        Compute the color of the holes from the boundaries and write them
+        into the image. The engine is used if one is set.
 
-        return connected_pixels
+        Args:
+            holes (PixelSet): Holes to fill
+            boundaries (PixelSet): Boundaries used to fill the holes
+        """
+        if not holes:
+            return
+
+        if self.__engine is None:
+            for hole in holes:
+                hole_color = self.calculate_hole_color(hole, boundaries)
+                self.__image[hole.row][hole.column] = hole_color
+            return
+
+        self.__engine.fill_channels(
+            self.__image, self.__weighting, self.__connectivity, holes, boundaries
+        )
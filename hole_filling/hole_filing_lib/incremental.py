@@ -0,0 +1,283 @@
+"""
+module: incremental
+
+Refills an image as its hole mask is edited, for interactive retouching.
+
+For every hole u, IncrementalFiller keeps the two sums of the weighted
+average
+
+    N(u) = sum(w(u,v) * I(v))    D(u) = sum(w(u,v))    for v in B
+
+so that I(u) = N(u) / D(u). When the mask changes, only the difference is
+evaluated:
+    - the boundary pixels lost are subtracted from the sums of the holes
+      and the boundary pixels gained are added: O(n * dm)
+    - the new holes are summed over the whole boundary: O(dn * m)
+    - the removed holes are dropped and get their original color back
+
+The boundary only changes around the edited pixels, so it is updated there
+only. Subtracting weights can accumulate rounding errors over many edits:
+refresh recomputes every sum from scratch.
+"""
+
+# Builtin imports
+import time
+from typing import TYPE_CHECKING, Any
+
+# Project specific imports
+import numpy as np
+
+# Local imports
+from .detection import OFFSETS
+from .engines import VectorizedEngine
+from .models import Connectivity, DeltaStats, PixelSet
+
+if TYPE_CHECKING:
+    from .weighting import AbstractWeightingMechanism
+
+# -----------------------------------------------------------------------------#
+# Class
+# -----------------------------------------------------------------------------#
+
+
+class IncrementalFiller:
+    """
+    Keeps an image filled while its holes are added and removed.
+
+    Args:
+        image (np.ndarray): A 2D array in the range of [0..1], without holes.
+            The colors of the pixels that stop being holes are read from it
+        weighting (AbstractWeightingMechanism): An instance of
+            WeightingMechanism implemented using the AbstractWeightingMechanism
+            class
+        connectivity (Connectivity): Pixel connectivity of the boundary.
+            Defaults to 4
+    """
+
+    def __init__(
+        self,
+        image: np.ndarray,
+        weighting: "AbstractWeightingMechanism",
+        connectivity: Connectivity = Connectivity.FOUR,
+    ):
+        self.__source = np.asarray(image, dtype=np.float64)
+        self.__image = self.__source.copy()
+        self.__weighting = weighting
+        self.__connectivity = connectivity
+        self.__block_size = VectorizedEngine().block_size
+
+        self.__hole_mask: np.ndarray = np.zeros(self.__source.shape, dtype=bool)
+        self.__boundary_mask = np.zeros(self.__source.shape, dtype=bool)
+
+        # Holes in insertion order, and the sums of each of them
+        self.__holes = np.empty((0, 2), dtype=np.int64)
+        self.__numerators = np.empty(0, dtype=np.float64)
+        self.__denominators = np.empty(0, dtype=np.float64)
+
+        # Boundaries in insertion order
+        self.__boundaries = np.empty((0, 2), dtype=np.int64)
+
+    # -------------------------------------------------------------------------#
+    # Properties
+    # -------------------------------------------------------------------------#
+    @property
+    def image(self) -> np.ndarray:
+        """
+        Return the filled image
+        """
+        return self.__image
+
+    @property
+    def hole_mask(self) -> np.ndarray:
+        """
+        Return the current holes as a boolean mask. Read only
+        """
+        return self.__hole_mask
+
+    @property
+    def holes(self) -> PixelSet:
+        """
+        Return the pixels that are holes
+        """
+        return PixelSet(self.__holes[:, 0], self.__holes[:, 1])
+
+    @property
+    def boundaries(self) -> PixelSet:
+        """
+        Return the pixels that are boundaries, with their color
+        """
+        rows, cols = self.__boundaries[:, 0], self.__boundaries[:, 1]
+        return PixelSet(rows, cols, self.__source[rows, cols])
+
+    # -------------------------------------------------------------------------#
+    # Methods
+    # -------------------------------------------------------------------------#
+    def update(self, hole_mask: np.ndarray) -> DeltaStats:
+        """
+        Replace the hole mask and refill what changed.
+
+        Args:
+            hole_mask (np.ndarray): 2D boolean array, True for the holes
+
+        Returns:
+            DeltaStats
+        """
+        added = np.argwhere(hole_mask & ~self.__hole_mask)
+        removed = np.argwhere(~hole_mask & self.__hole_mask)
+        return self.apply_delta(added, removed)
+
+    def apply_delta(self, added: Any = (), removed: Any = ()) -> DeltaStats:
+        """
+        Add and remove holes and refill what changed. Pixels added that are
+        already holes, or removed that are not, are ignored.
+
+        Args:
+            added (np.ndarray): (k, 2) array of the coordinates of new holes
+            removed (np.ndarray): (k, 2) array of the coordinates of the
+                pixels that are no longer holes
+
+        Returns:
+            DeltaStats
+        """
+        start = time.perf_counter()
+        added = np.unique(np.asarray(added, dtype=np.int64).reshape(-1, 2), axis=0)
+        removed = np.unique(np.asarray(removed, dtype=np.int64).reshape(-1, 2), axis=0)
+        added = added[~self.__hole_mask[added[:, 0], added[:, 1]]]
+        removed = removed[self.__hole_mask[removed[:, 0], removed[:, 1]]]
+
+        # Holes
+        self.__drop_holes(removed)
+        self.__hole_mask[removed[:, 0], removed[:, 1]] = False
+        self.__hole_mask[added[:, 0], added[:, 1]] = True
+        self.__image[removed[:, 0], removed[:, 1]] = self.__source[
+            removed[:, 0], removed[:, 1]
+        ]
+
+        # Boundaries around the edit, then the sums of the remaining holes
+        lost, gained = self.__update_boundaries(np.concatenate([added, removed]))
+        changed = np.concatenate([lost, gained])
+        signs = np.concatenate([-np.ones(len(lost)), np.ones(len(gained))])
+        numerators, denominators = self.__sums(self.__holes, changed, signs)
+        self.__numerators += numerators
+        self.__denominators += denominators
+
+        # New holes, over the whole boundary
+        numerators, denominators = self.__sums(
+            added, self.__boundaries, np.ones(len(self.__boundaries))
+        )
+        self.__holes = np.concatenate([self.__holes, added])
+        self.__numerators = np.concatenate([self.__numerators, numerators])
+        self.__denominators = np.concatenate([self.__denominators, denominators])
+
+        self.__write_colors()
+        return DeltaStats(
+            len(added),
+            len(removed),
+            len(gained),
+            len(lost),
+            time.perf_counter() - start,
+        )
+
+    def refresh(self) -> None:
+        """
+        Recompute the sums of every hole from scratch
+        """
+        self.__numerators, self.__denominators = self.__sums(
+            self.__holes, self.__boundaries, np.ones(len(self.__boundaries))
+        )
+        self.__write_colors()
+
+    # -------------------------------------------------------------------------#
+    # Methods: Privates
+    # -------------------------------------------------------------------------#
+    def __drop_holes(self, removed: np.ndarray) -> None:
+        """
+        Forget the holes and their sums.
+        """
+        if not len(removed):
+            return
+
+        keep = ~self.__contains(self.__holes, removed)
+        self.__holes = self.__holes[keep]
+        self.__numerators = self.__numerators[keep]
+        self.__denominators = self.__denominators[keep]
+
+    def __update_boundaries(self, changed: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Update the boundary of the pixels around the changed ones.
+
+        Args:
+            changed (np.ndarray): (k, 2) array of the pixels added or removed
+
+        Returns:
+            The boundary pixels lost and gained
+        """
+        rows, cols = self.__hole_mask.shape
+        offsets = np.array(((0, 0),) + OFFSETS[self.__connectivity])
+
+        # The pixels whose boundary status may have changed
+        around = (changed[:, None, :] + offsets).reshape(-1, 2)
+        inside = (around >= 0).all(axis=1) & (around < (rows, cols)).all(axis=1)
+        around = np.unique(around[inside], axis=0)
+
+        # A pixel is a boundary if it isn't a hole and a neighbour is
+        neighbours = around[:, None, :] + offsets[1:]
+        valid = (neighbours >= 0).all(axis=2) & (neighbours < (rows, cols)).all(axis=2)
+        neighbours = np.where(valid[:, :, None], neighbours, 0)
+        next_to_hole = (
+            self.__hole_mask[neighbours[:, :, 0], neighbours[:, :, 1]] & valid
+        ).any(axis=1)
+        is_boundary = next_to_hole & ~self.__hole_mask[around[:, 0], around[:, 1]]
+
+        was_boundary = self.__boundary_mask[around[:, 0], around[:, 1]]
+        lost = around[was_boundary & ~is_boundary]
+        gained = around[is_boundary & ~was_boundary]
+        self.__boundary_mask[around[:, 0], around[:, 1]] = is_boundary
+
+        if len(lost):
+            self.__boundaries = self.__boundaries[
+                ~self.__contains(self.__boundaries, lost)
+            ]
+        self.__boundaries = np.concatenate([self.__boundaries, gained])
+        return lost, gained
+
+    def __sums(
+        self, holes: np.ndarray, boundaries: np.ndarray, signs: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Sum the weighted colors and the weights of the boundaries for every
+        hole, in blocks of holes. signs is +1 to add a boundary, -1 to
+        subtract it.
+        """
+        numerators = np.zeros(len(holes), dtype=np.float64)
+        denominators = np.zeros(len(holes), dtype=np.float64)
+        if not len(holes) or not len(boundaries):
+            return numerators, denominators
+
+        values = self.__source[boundaries[:, 0], boundaries[:, 1]] * signs
+        step = self.__block_size(len(boundaries))
+        for start in range(0, len(holes), step):
+            stop = start + step
+            weights = self.__weighting.get_weights(holes[start:stop], boundaries)
+            numerators[start:stop] = weights @ values
+            denominators[start:stop] = weights @ signs
+        return numerators, denominators
+
+    def __write_colors(self) -> None:
+        """
+        Write the color of every hole into the image.
+        """
+        filled = self.__denominators > 0
+        rows, cols = self.__holes[filled, 0], self.__holes[filled, 1]
+        self.__image[rows, cols] = (
+            self.__numerators[filled] / self.__denominators[filled]
+        )
+
+    def __contains(self, pixels: np.ndarray, subset: np.ndarray) -> np.ndarray:
+        """
+        Return True for the pixels that are in subset.
+        """
+        width = self.__hole_mask.shape[1]
+        return np.isin(
+            pixels[:, 0] * width + pixels[:, 1], subset[:, 0] * width + subset[:, 1]
+        )
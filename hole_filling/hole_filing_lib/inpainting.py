@@ -0,0 +1,218 @@
+"""
+module: inpainting
+
+Image based fill engines. They don't evaluate the weighted average formula:
+they fill the holes from the pixels around them, so they read the image
+itself instead of the boundary coordinates.
+
+FloodFillEngine is the flood fill of q2_flood_fill, peeled layer by layer:
+every hole gets the mean of its known neighbours, the outermost holes first.
+
+FMMEngine is OpenCV's Fast Marching Method (cv2.inpaint with INPAINT_TELEA)
+of q3_fmm, run on the preprocessed array instead of the files. It works on
+8 bit values: the holes of a 16 bit image are filled with 256 levels only.
+"""
+
+# Builtin imports
+from typing import TYPE_CHECKING, Optional
+
+# Project specific imports
+import numpy as np
+
+# Local imports
+from ..exceptions import HoleFillingException
+from .detection import HOLE_VALUE, OFFSETS
+from .engines import AbstractFillEngine
+from .models import Connectivity
+
+if TYPE_CHECKING:
+    from .models import PixelSet
+    from .weighting import AbstractWeightingMechanism
+
+# -----------------------------------------------------------------------------#
+# Classes
+# -----------------------------------------------------------------------------#
+
+
+class _ImageEngine(AbstractFillEngine):
+    """
+    Base class of the image based engines
+    """
+
+    image_based = True
+
+    def compute(
+        self,
+        weighting: "AbstractWeightingMechanism",
+        holes: np.ndarray,
+        boundaries: np.ndarray,
+        values: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Image based engines can't compute from the coordinates only.
+
+        Raises:
+            HoleFillingException
+        """
+        raise HoleFillingException(
+            f"{type(self).__name__} fills images, use fill_region instead"
+        )
+
+
+class FloodFillEngine(_ImageEngine):
+    """
+    Fills the holes layer by layer, from the outside in. Each layer is the
+    front of the holes that touch a known pixel. The whole front is filled at
+    once with the mean of the known neighbours of each pixel, then becomes
+    known itself. The neighbours follow the connectivity of the fill.
+
+    Every pixel of the front only sees the pixels known before the front, so
+    the result doesn't depend on any scan order. Every hole and its
+    neighbours are visited once: O(n) overall.
+    """
+
+    def fill_region(
+        self,
+        image: np.ndarray,
+        weighting: Optional["AbstractWeightingMechanism"],
+        connectivity: Connectivity,
+        holes: "PixelSet",
+        boundaries: "PixelSet",
+    ) -> None:
+        """
+        Fill the holes of a region of the image in place.
+
+        Args:
+            image (np.ndarray): 2D array where the holes are set to -1
+            weighting (AbstractWeightingMechanism): Unused, can be None
+            connectivity (Connectivity): Neighbours averaged for each hole
+            holes (PixelSet): Holes to fill
+            boundaries (PixelSet): Unused
+
+        Raises:
+            HoleFillingException
+        """
+        if not holes:
+            return
+
+        # Window around the holes with a margin of one pixel. The margin
+        # outside the image is neither known nor a hole.
+        top = int(holes.rows.min())
+        left = int(holes.columns.min())
+        bottom = int(holes.rows.max()) + 1
+        right = int(holes.columns.max()) + 1
+        src_top, src_left = max(top - 1, 0), max(left - 1, 0)
+        src_bottom = min(bottom + 1, image.shape[0])
+        src_right = min(right + 1, image.shape[1])
+
+        shape = (bottom - top + 2, right - left + 2)
+        grid = np.zeros(shape, dtype=np.float64)
+        grid_known = np.zeros(shape, dtype=bool)
+        window = (
+            slice(src_top - top + 1, src_bottom - top + 1),
+            slice(src_left - left + 1, src_right - left + 1),
+        )
+        grid[window] = image[src_top:src_bottom, src_left:src_right]
+        grid_known[window] = grid[window] != HOLE_VALUE
+        grid[~grid_known] = 0.0
+        values, known = grid.ravel(), grid_known.ravel()
+
+        width = shape[1]
+        offsets = np.array(
+            [d_row * width + d_col for d_row, d_col in OFFSETS[connectivity]]
+        )
+        index = (holes.rows - top + 1) * width + (holes.columns - left + 1)
+
+        pending = np.zeros(known.shape, dtype=bool)
+        pending[index] = True
+
+        # First front: the holes next to a known pixel
+        front = index[known[index[:, None] + offsets].any(axis=1)]
+        while len(front):
+            neighbours = front[:, None] + offsets
+            neighbour_known = known[neighbours]
+            total = (values[neighbours] * neighbour_known).sum(axis=1)
+            values[front] = total / neighbour_known.sum(axis=1)
+            known[front] = True
+            pending[front] = False
+
+            # Next front: the pending holes next to this one
+            candidates = neighbours.ravel()
+            front = np.unique(candidates[pending[candidates]])
+
+        if pending.any():
+            raise HoleFillingException("The holes have no known pixel around them")
+
+        image[holes.rows, holes.columns] = values[index]
+
+
+class FMMEngine(_ImageEngine):
+    """
+    Fills the holes with OpenCV's Fast Marching Method inpainting.
+
+    The inpainting runs on 8 bit values, like q3_fmm: the float version of
+    INPAINT_TELEA overshoots the range of the known pixels. The filled
+    colors are multiples of 1/255, so a 16 bit image loses its extra
+    precision in the holes. The known pixels are left untouched.
+
+    Args:
+        radius (float): Radius of the neighbourhood considered by the
+            inpainting. Defaults to 3
+    """
+
+    def __init__(self, radius: float = 3):
+        self.__radius = radius
+
+    @property
+    def radius(self) -> float:
+        """
+        Return the inpainting radius
+        """
+        return self.__radius
+
+    @property
+    def margin(self) -> int:
+        """
+        Return how far the inpainting reads the image around the holes
+        """
+        return int(np.ceil(self.__radius)) + 1
+
+    def fill_region(
+        self,
+        image: np.ndarray,
+        weighting: Optional["AbstractWeightingMechanism"],
+        connectivity: Connectivity,
+        holes: "PixelSet",
+        boundaries: "PixelSet",
+    ) -> None:
+        """
+        Fill the holes of a region of the image in place. Only the bounding
+        box of the holes, grown by the radius, is inpainted.
+
+        Args:
+            image (np.ndarray): 2D array where the holes are set to -1
+            weighting (AbstractWeightingMechanism): Unused, can be None
+            connectivity (Connectivity): Unused
+            holes (PixelSet): Holes to fill
+            boundaries (PixelSet): Unused
+        """
+        if not holes:
+            return
+
+        import cv2
+
+        margin = self.margin
+        top = max(0, int(holes.rows.min()) - margin)
+        left = max(0, int(holes.columns.min()) - margin)
+        bottom = int(holes.rows.max()) + margin + 1
+        right = int(holes.columns.max()) + margin + 1
+
+        window = image[top:bottom, left:right]
+        mask = (window == HOLE_VALUE).astype(np.uint8)
+
+        # Inpaint in 8 bit, like q3_fmm
+        source = np.rint(np.where(mask, 0, window) * 255).astype(np.uint8)
+        filled = cv2.inpaint(source, mask, self.__radius, cv2.INPAINT_TELEA)
+        image[holes.rows, holes.columns] = (
+            filled[holes.rows - top, holes.columns - left] / 255.0
+        )
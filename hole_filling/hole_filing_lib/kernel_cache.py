@@ -0,0 +1,191 @@
+"""
+module: kernel_cache
+
+A process wide cache of weight lookup tables.
+
+Hole and boundary pixels sit on the integer grid, so the weight of the
+default mechanism only depends on the integer offset (|dr|, |dc|) between
+them. The same offsets come back for every block of holes, every component
+and every image filled with the same z and e. The table of the weights of
+all the offsets up to a radius is computed once and looked up afterwards.
+
+Tables are keyed by (z, e). A request for a larger radius replaces the table
+with a larger one, never with a smaller one. The least recently used tables
+are evicted when the cache grows above its memory budget. A table larger
+than the whole budget is never cached, and neither is a table much larger
+than the number of weights it is built for: a few holes far apart from their
+boundaries. The caller computes the weights directly instead.
+
+Each process has its own cache: the workers of the parallel fill build
+theirs on their first block.
+"""
+
+# Builtin imports
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# Project specific imports
+import numpy as np
+
+# Local imports
+from .models import CacheStats
+
+# Default memory budget of the cache: 256 MiB
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024
+
+# Tables are allocated with a side that is a multiple of this value, so that
+# slightly larger regions reuse the same table
+_TABLE_GRANULARITY = 64
+
+# A missing table is only built when it has at most this many entries per
+# weight looked up. Larger tables cost more than the direct computation
+_TABLE_PAIR_RATIO = 4
+
+# -----------------------------------------------------------------------------#
+# Functions
+# -----------------------------------------------------------------------------#
+
+
+def build_table(param_z: float, param_e: float, size: int) -> np.ndarray:
+    """
+    Weights 1 / (||(dr, dc)||^z + e) for 0 <= dr, dc < size. The operations
+    are the ones of DefaultWeightMechanism.get_weights, so a lookup gives the
+    same bits as a direct computation.
+
+    Args:
+        param_z (float): The z value
+        param_e (float): The e value
+        size (int): Side of the table
+
+    Returns:
+        A (size, size) array of weights
+    """
+    offsets = np.arange(size, dtype=np.float64)
+    d_row = offsets[:, None]
+    d_col = offsets[None, :]
+    dist = np.sqrt(d_row * d_row + d_col * d_col)
+    return 1.0 / (np.power(dist, param_z) + param_e)
+
+
+# -----------------------------------------------------------------------------#
+# Classes
+# -----------------------------------------------------------------------------#
+
+
+class KernelCache:
+    """
+    LRU cache of weight tables, bounded by memory.
+
+    Args:
+        max_bytes (int): Memory budget of the cached tables. Defaults to
+            256 MiB
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_SIZE):
+        self.__max_bytes = max_bytes
+        self.__tables: OrderedDict[tuple[float, float], np.ndarray] = OrderedDict()
+        self.__nbytes = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__lock = threading.Lock()
+
+    # -------------------------------------------------------------------------#
+    # Properties
+    # -------------------------------------------------------------------------#
+    @property
+    def max_bytes(self) -> int:
+        """
+        Return the memory budget in bytes
+        """
+        return self.__max_bytes
+
+    # -------------------------------------------------------------------------#
+    # Methods
+    # -------------------------------------------------------------------------#
+    def get_table(
+        self,
+        param_z: float,
+        param_e: float,
+        radius: int,
+        pairs: Optional[int] = None,
+    ) -> Optional[np.ndarray]:
+        """
+        Return the weight table of (z, e) covering the offsets up to radius.
+
+        Args:
+            param_z (float): The z value
+            param_e (float): The e value
+            radius (int): Largest |dr| or |dc| looked up
+            pairs (int): Optional. Number of weights looked up. A missing
+                table is not built when it is much larger than that
+
+        Returns:
+            A square array of weights indexed by [|dr|, |dc|], with a side
+            greater than radius. None if such a table does not fit in the
+            budget, or isn't cached and isn't worth building
+        """
+        size = -(-(radius + 1) // _TABLE_GRANULARITY) * _TABLE_GRANULARITY
+        if size * size * 8 > self.__max_bytes:
+            return None
+
+        key = (param_z, param_e)
+        with self.__lock:
+            table = self.__tables.get(key)
+            if table is not None and len(table) > radius:
+                self.__hits += 1
+                self.__tables.move_to_end(key)
+                return table
+            self.__misses += 1
+
+        if pairs is not None and size * size > _TABLE_PAIR_RATIO * pairs:
+            return None
+
+        table = build_table(param_z, param_e, size)
+
+        with self.__lock:
+            # Another thread may have cached a larger table in the meantime
+            previous = self.__tables.get(key)
+            if previous is not None and len(previous) >= len(table):
+                self.__tables.move_to_end(key)
+                return previous
+
+            if previous is not None:
+                del self.__tables[key]
+                self.__nbytes -= previous.nbytes
+            self.__tables[key] = table
+            self.__nbytes += table.nbytes
+
+            while self.__nbytes > self.__max_bytes:
+                _, evicted = self.__tables.popitem(last=False)
+                self.__nbytes -= evicted.nbytes
+                self.__evictions += 1
+
+        return table
+
+    def stats(self) -> CacheStats:
+        """
+        Return the counters of the cache
+        """
+        with self.__lock:
+            return CacheStats(
+                self.__hits,
+                self.__misses,
+                self.__evictions,
+                len(self.__tables),
+                self.__nbytes,
+            )
+
+    def clear(self) -> None:
+        """
+        Drop every table and reset the counters
+        """
+        with self.__lock:
+            self.__tables.clear()
+            self.__nbytes = 0
+            self.__hits = self.__misses = self.__evictions = 0
+
+
+# The cache shared by every weighting mechanism of the process
+KERNEL_CACHE = KernelCache()
@@ -1,12 +1,17 @@
 """
 module: models
 
-Defines the dataclass and enums used in this module
+Defines the dataclass, enums and containers used in this module
 """
 
 # Builtin imports
+from collections.abc import Iterable, Iterator, Set
 from enum import Enum
 from dataclasses import dataclass
+from typing import Any, Optional, Union
+
+# Project specific imports
+import numpy as np
 
 # -----------------------------------------------------------------------------#
 # Class
@@ -17,12 +22,131 @@ from dataclasses import dataclass
 class Pixel:
     """
     Dataclass that represents a pixel in the image. It stores three values.
-    col, row is the coordinate and value is the color value
+    col, row is the coordinate and value is the color value, the tuple of its
+    channels for a color pixel
     """
 
     row: int
     column: int
-    value: float
+    value: Union[float, tuple[float, ...]]
+
+
+@dataclass(frozen=True)
+class ComponentStats:
+    """
+    Dataclass that stores the statistics of a filled hole component.
+    label is the index of the component, fill_time is in seconds.
+    """
+
+    label: int
+    hole_count: int
+    boundary_count: int
+    fill_time: float
+
+
+@dataclass(frozen=True)
+class ParallelStats:
+    """
+    Dataclass that stores how a parallel fill scaled. wall_time is the
+    elapsed time, cpu_time the time spent by the workers filling holes and
+    component_times the part of cpu_time spent on each component. All the
+    times are in seconds.
+    """
+
+    workers: int
+    tasks: int
+    wall_time: float
+    cpu_time: float
+    component_times: list[float]
+
+    @property
+    def speedup(self) -> float:
+        """
+        Return the speedup over filling on a single core
+        """
+        return self.cpu_time / self.wall_time if self.wall_time else 0.0
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """
+    Dataclass that stores the counters of a cache. entries and nbytes
+    describe what the cache holds at the time the stats were taken.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    nbytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Return the fraction of the lookups served from the cache
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass(frozen=True)
+class StageStats:
+    """
+    Dataclass that stores the measures of a stage of the pipeline. seconds
+    is the wall time, pixels the number of pixels the stage worked on,
+    peak_bytes the peak memory allocated during the stage and counters any
+    other count reported by the stage.
+    """
+
+    name: str
+    seconds: float
+    pixels: int
+    peak_bytes: int
+    counters: dict[str, int]
+
+    @property
+    def pixels_per_second(self) -> float:
+        """
+        Return the throughput of the stage
+        """
+        return self.pixels / self.seconds if self.seconds else 0.0
+
+
+@dataclass(frozen=True)
+class DeltaStats:
+    """
+    Dataclass that stores what an incremental update changed: the holes
+    added to and removed from the mask, and the boundary pixels gained and
+    lost around them. fill_time is in seconds.
+    """
+
+    added_holes: int
+    removed_holes: int
+    added_boundaries: int
+    removed_boundaries: int
+    fill_time: float
+
+
+@dataclass(frozen=True)
+class FrameStats:
+    """
+    Dataclass that stores how a sequence of frames was filled with a single
+    FillOperator. compile_time is the time spent building the operator and
+    fill_time the time spent applying it to all the frames, in seconds.
+    """
+
+    frames: int
+    holes: int
+    boundaries: int
+    compile_time: float
+    fill_time: float
+
+    @property
+    def seconds_per_frame(self) -> float:
+        """
+        Return the mean time spent filling a frame
+        """
+        return self.fill_time / self.frames if self.frames else 0.0
 
 
 class Connectivity(Enum):
@@ -55,3 +179,254 @@ class Connectivity(Enum):
 
     FOUR = 4
     EIGHT = 8
+
+
+class PixelSet(Set):
+    """
+    A compact set of pixels. The rows, columns and values are stored in three
+    contiguous arrays instead of one Pixel object per pixel. Pixels are kept
+    unique and sorted in row major order.
+
+    It behaves like a set[Pixel]: len, iteration (yields Pixel on demand),
+    membership and the set operators are supported. The operators between
+    two PixelSets work on the arrays, with the other sets they go through
+    Pixel objects. A PixelSet holds one value per (row, column): a union or
+    a symmetric difference with two values at the same coordinate is a
+    frozenset of Pixel. merge combines two PixelSets by coordinate instead.
+
+    Args:
+        rows (np.ndarray): Row of each pixel
+        columns (np.ndarray): Column of each pixel
+        values (np.ndarray): Optional. Value of each pixel, (n,) or (n, C)
+            for the channels of a color image. Defaults to -1 (a hole)
+
+    Duplicated (row, column) pairs are removed in bulk, the first value wins.
+    """
+
+    def __init__(
+        self,
+        rows: Any = (),
+        columns: Any = (),
+        values: Optional[Any] = None,
+    ):
+        rows = np.asarray(rows, dtype=np.int32).ravel()
+        columns = np.asarray(columns, dtype=np.int32).ravel()
+        if values is None:
+            values = np.full(len(rows), -1, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 2:
+            values = values.ravel()
+
+        if not len(rows) == len(columns) == len(values):
+            raise ValueError("rows, columns and values must be of same length")
+
+        self.__keys, index = np.unique(self.__pack(rows, columns), return_index=True)
+        self.__rows = rows[index]
+        self.__columns = columns[index]
+        self.__values = values[index]
+
+    @classmethod
+    def from_mask(
+        cls, mask: np.ndarray, image: Optional[np.ndarray] = None
+    ) -> "PixelSet":
+        """
+        Create a PixelSet from the True pixels of a 2D boolean mask. The
+        pixels are unique and sorted already, so no deduplication is done.
+
+        Args:
+            mask (np.ndarray): 2D boolean array
+            image (np.ndarray): Optional. Values are read from this image.
+                Defaults to -1
+
+        Returns:
+            PixelSet
+        """
+        pixel_set = cls()
+        rows, columns = np.nonzero(mask)
+        pixel_set.__rows = rows.astype(np.int32)
+        pixel_set.__columns = columns.astype(np.int32)
+        pixel_set.__keys = cls.__pack(rows, columns)
+        if image is None:
+            pixel_set.__values = np.full(len(rows), -1, dtype=np.float64)
+        else:
+            pixel_set.__values = image[rows, columns].astype(np.float64)
+        return pixel_set
+
+    @classmethod
+    def from_pixels(cls, pixels: Iterable[Pixel]) -> "PixelSet":
+        """
+        Create a PixelSet from Pixel objects.
+
+        Args:
+            pixels (Iterable[Pixel]): Pixels to store
+
+        Returns:
+            PixelSet
+        """
+        pixels = list(pixels)
+        return cls(
+            [pixel.row for pixel in pixels],
+            [pixel.column for pixel in pixels],
+            [pixel.value for pixel in pixels],
+        )
+
+    @classmethod
+    def _from_iterable(cls, it: Iterable[Any]) -> Set:
+        # Used by the Set mixin methods (&, |, -, ^) to build their result
+        pixels = list(it)
+        if len({(pixel.row, pixel.column) for pixel in pixels}) < len(pixels):
+            return frozenset(pixels)
+        return cls.from_pixels(pixels)
+
+    # -------------------------------------------------------------------------#
+    # Properties
+    # -------------------------------------------------------------------------#
+    @property
+    def rows(self) -> np.ndarray:
+        """
+        Return the rows of the pixels
+        """
+        return self.__rows
+
+    @property
+    def columns(self) -> np.ndarray:
+        """
+        Return the columns of the pixels
+        """
+        return self.__columns
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        Return the values of the pixels
+        """
+        return self.__values
+
+    @property
+    def coords(self) -> np.ndarray:
+        """
+        Return a (n, 2) array of (row, column)
+        """
+        return np.column_stack((self.__rows, self.__columns))
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Return the memory used by the arrays
+        """
+        return self.__rows.nbytes + self.__columns.nbytes + self.__values.nbytes
+
+    # -------------------------------------------------------------------------#
+    # Dunder methods
+    # -------------------------------------------------------------------------#
+    def __len__(self) -> int:
+        return len(self.__rows)
+
+    def __iter__(self) -> Iterator[Pixel]:
+        # The value of a color pixel is the tuple of its channels
+        values = self.__values.tolist()
+        if self.__values.ndim == 2:
+            values = [tuple(value) for value in values]
+        for row, column, value in zip(
+            self.__rows.tolist(), self.__columns.tolist(), values
+        ):
+            yield Pixel(row, column, value)
+
+    def __contains__(self, pixel: object) -> bool:
+        if not isinstance(pixel, Pixel):
+            return False
+
+        key = self.__pack(np.array([pixel.row]), np.array([pixel.column]))[0]
+        index = int(np.searchsorted(self.__keys, key))
+        if index == len(self.__keys) or self.__keys[index] != key:
+            return False
+        return bool(np.all(self.__values[index] == pixel.value))
+
+    def __le__(self, other: Set) -> bool:
+        if not isinstance(other, PixelSet):
+            return super().__le__(other)
+        return len(self) <= len(other) and bool(self.__shared(other).all())
+
+    def __ge__(self, other: Set) -> bool:
+        if not isinstance(other, PixelSet):
+            return super().__ge__(other)
+        return other <= self
+
+    def __and__(self, other: Set) -> Set:
+        if not isinstance(other, PixelSet):
+            return super().__and__(other)
+        return self.__select(self.__shared(other))
+
+    def __sub__(self, other: Set) -> Set:
+        if not isinstance(other, PixelSet):
+            return super().__sub__(other)
+        return self.__select(~self.__shared(other))
+
+    def __or__(self, other: Set) -> Set:
+        if not isinstance(other, PixelSet) or (
+            self.__values.shape[1:] != other.__values.shape[1:]
+        ):
+            return super().__or__(other)
+        # Same coordinate, different value: both pixels belong to the union
+        if np.isin(self.__keys, other.__keys).sum() > self.__shared(other).sum():
+            return super().__or__(other)
+        return self.merge(other)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({len(self)} pixels)"
+
+    # -------------------------------------------------------------------------#
+    # Methods
+    # -------------------------------------------------------------------------#
+    def merge(self, other: "PixelSet") -> "PixelSet":
+        """
+        Combine the pixels of both sets by coordinate. Where both sets have
+        a pixel, the value of this set wins.
+
+        Args:
+            other (PixelSet): Pixels to add
+
+        Returns:
+            PixelSet
+        """
+        return PixelSet(
+            np.concatenate([self.__rows, other.__rows]),
+            np.concatenate([self.__columns, other.__columns]),
+            np.concatenate([self.__values, other.__values]),
+        )
+
+    # -------------------------------------------------------------------------#
+    # Methods: Privates
+    # -------------------------------------------------------------------------#
+    @staticmethod
+    def __pack(rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        """
+        Pack each (row, column) into a single int64 that sorts in row major
+        order.
+        """
+        return (rows.astype(np.int64) << 32) | columns.astype(np.int64)
+
+    def __shared(self, other: "PixelSet") -> np.ndarray:
+        """
+        Boolean mask of the pixels that are also in the other set, with the
+        same value.
+        """
+        if self.__values.shape[1:] != other.__values.shape[1:]:
+            return np.zeros(len(self), dtype=bool)
+
+        shared = np.isin(self.__keys, other.__keys, assume_unique=True)
+        index = np.searchsorted(other.__keys, self.__keys[shared])
+        same = self.__values[shared] == other.__values[index]
+        shared[shared] = same if same.ndim == 1 else same.all(axis=1)
+        return shared
+
+    def __select(self, selection: np.ndarray) -> "PixelSet":
+        """
+        Return the pixels of the selection. They stay unique and sorted.
+        """
+        pixel_set = self.__class__()
+        pixel_set.__rows = self.__rows[selection]
+        pixel_set.__columns = self.__columns[selection]
+        pixel_set.__values = self.__values[selection]
+        pixel_set.__keys = self.__keys[selection]
+        return pixel_set
@@ -0,0 +1,248 @@
+"""
+module: parallel
+
+Fills the holes on a pool of processes.
+
+The hole/boundary arrays of every component are copied once into shared
+memory (multiprocessing.shared_memory), next to a shared array of colors
+with one entry per hole. The workers attach to these buffers instead of
+receiving pickled copies, compute a range of holes with the engine and
+write the colors of that range only. The image itself is never shared: the
+parent writes the colors into its holes once the pool is done.
+
+The ranges of holes are aligned to the block size of the engine, so every
+block is computed with exactly the same inputs as in the serial path and the
+result is bit identical.
+"""
+
+# Builtin imports
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import TYPE_CHECKING, Any
+
+# Project specific imports
+import numpy as np
+
+# Local imports
+from .models import ParallelStats
+
+if TYPE_CHECKING:
+    from .engines import AbstractFillEngine
+    from .models import PixelSet
+    from .weighting import AbstractWeightingMechanism
+
+# Number of tasks per worker. More tasks than workers balance the load when
+# the components have different sizes.
+TASKS_PER_WORKER = 4
+
+# Shared array specs, weighting and engine of a worker process
+_WORKER_STATE: dict[str, Any] = {}
+
+# -----------------------------------------------------------------------------#
+# Shared memory helpers
+# -----------------------------------------------------------------------------#
+
+
+def _create(
+    shape: tuple[int, ...], dtype: np.dtype
+) -> tuple[SharedMemory, np.ndarray, tuple]:
+    """
+    Allocate an array in a new shared memory block.
+
+    Returns:
+        The shared memory, the shared array and the (name, shape, dtype)
+        needed to attach to it
+    """
+    size = int(np.prod(shape)) * dtype.itemsize
+    shm = SharedMemory(create=True, size=max(size, 1))
+    shared: np.ndarray = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    return shm, shared, (shm.name, shape, dtype.str)
+
+
+def _share(array: np.ndarray) -> tuple[SharedMemory, np.ndarray, tuple]:
+    """
+    Copy the array into a new shared memory block. See _create.
+    """
+    shm, shared, spec = _create(array.shape, array.dtype)
+    shared[...] = array
+    return shm, shared, spec
+
+
+def _attach(spec: tuple) -> tuple[SharedMemory, np.ndarray]:
+    """
+    Attach to a shared memory block created by _create.
+    """
+    name, shape, dtype = spec
+    shm = SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+# -----------------------------------------------------------------------------#
+# Worker
+# -----------------------------------------------------------------------------#
+
+
+def _init_worker(
+    specs: dict[str, tuple],
+    weighting: "AbstractWeightingMechanism",
+    engine: "AbstractFillEngine",
+) -> None:
+    """
+    Keep what every task of the worker process needs.
+    """
+    _WORKER_STATE["specs"] = specs
+    _WORKER_STATE["weighting"] = weighting
+    _WORKER_STATE["engine"] = engine
+
+
+def _fill_range(task: tuple[int, int, int, int, int]) -> tuple[int, float]:
+    """
+    Fill a range of holes of a component with the boundaries of the
+    component. The shared arrays are attached for the task and closed
+    before it returns.
+
+    Args:
+        task (tuple): component index, first and last hole, first and last
+            boundary. Hole and boundary indices refer to the shared arrays.
+
+    Returns:
+        The component index and the time spent in seconds
+    """
+    start = time.perf_counter()
+    component, hole_start, hole_stop, boundary_start, boundary_stop = task
+
+    handles: list[SharedMemory] = []
+    arrays: dict[str, np.ndarray] = {}
+    try:
+        for key, spec in _WORKER_STATE["specs"].items():
+            shm, arrays[key] = _attach(spec)
+            handles.append(shm)
+
+        arrays["colors"][hole_start:hole_stop] = _WORKER_STATE["engine"].compute(
+            _WORKER_STATE["weighting"],
+            arrays["holes"][hole_start:hole_stop],
+            arrays["boundaries"][boundary_start:boundary_stop],
+            arrays["values"][boundary_start:boundary_stop],
+        )
+    finally:
+        # The views must be released before their buffers are closed
+        arrays.clear()
+        for shm in handles:
+            shm.close()
+
+    return component, time.perf_counter() - start
+
+
+# -----------------------------------------------------------------------------#
+# Functions
+# -----------------------------------------------------------------------------#
+
+
+def _make_tasks(
+    components: list[tuple["PixelSet", "PixelSet"]],
+    engine: "AbstractFillEngine",
+    workers: int,
+) -> list[tuple[int, int, int, int, int]]:
+    """
+    Split the holes of every component in ranges aligned to the block size of
+    the engine.
+    """
+    total = sum(len(holes) for holes, _ in components)
+    target = max(1, math.ceil(total / (workers * TASKS_PER_WORKER)))
+
+    tasks = []
+    hole_offset = boundary_offset = 0
+    for index, (holes, boundaries) in enumerate(components):
+        block = engine.block_size(len(boundaries))
+        chunk = block * max(1, math.ceil(target / block))
+        for start in range(0, len(holes), chunk):
+            stop = min(start + chunk, len(holes))
+            tasks.append(
+                (
+                    index,
+                    hole_offset + start,
+                    hole_offset + stop,
+                    boundary_offset,
+                    boundary_offset + len(boundaries),
+                )
+            )
+        hole_offset += len(holes)
+        boundary_offset += len(boundaries)
+    return tasks
+
+
+def parallel_fill(
+    image: np.ndarray,
+    components: list[tuple["PixelSet", "PixelSet"]],
+    weighting: "AbstractWeightingMechanism",
+    engine: "AbstractFillEngine",
+    workers: int = 0,
+) -> ParallelStats:
+    """
+    Fill the holes of every component on a pool of processes. The image is
+    updated in place.
+
+    Args:
+        image (np.ndarray): 2D image whose holes are filled, or 3D for a
+            color image
+        components (list): The holes and the boundaries of each component
+        weighting (AbstractWeightingMechanism): Weighting mechanism to use.
+            Must be picklable.
+        engine (AbstractFillEngine): Engine used by the workers
+        workers (int): Number of processes. Defaults to the number of CPUs
+
+    Returns:
+        ParallelStats with the fill time of each component
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    tasks = _make_tasks(components, engine, workers)
+    component_times = [0.0] * len(components)
+    if not tasks:
+        return ParallelStats(workers, 0, 0.0, 0.0, component_times)
+
+    arrays = {
+        "holes": np.concatenate([holes.coords for holes, _ in components]),
+        "boundaries": np.concatenate([b.coords for _, b in components]),
+        "values": np.concatenate([b.values for _, b in components]),
+    }
+    colors_shape = (len(arrays["holes"]),) + image.shape[2:]
+
+    shared: dict[str, SharedMemory] = {}
+    views: dict[str, np.ndarray] = {}
+    try:
+        specs = {}
+        for key, array in arrays.items():
+            shared[key], views[key], specs[key] = _share(array)
+        shared["colors"], views["colors"], specs["colors"] = _create(
+            colors_shape, image.dtype
+        )
+
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(tasks)),
+            initializer=_init_worker,
+            initargs=(specs, weighting, engine),
+        ) as executor:
+            for component, seconds in executor.map(_fill_range, tasks):
+                component_times[component] += seconds
+
+        # Write the colors of the holes into the image
+        rows, cols = arrays["holes"].T
+        image[rows, cols] = views["colors"]
+    finally:
+        views.clear()
+        for shm in shared.values():
+            shm.close()
+            shm.unlink()
+
+    return ParallelStats(
+        workers,
+        len(tasks),
+        time.perf_counter() - start,
+        sum(component_times),
+        component_times,
+    )
@@ -0,0 +1,178 @@
+"""
+module: profiling
+
+Lightweight instrumentation of the stages of the pipeline: reading the
+files, preprocessing, finding the holes and boundaries, filling and saving.
+
+Every stage runs in a Profiler.stage context that records its wall time,
+the number of pixels it worked on, the peak memory allocated while it ran
+(traced with tracemalloc, OpenCV buffers are not seen) and any counter the
+stage reports.
+
+A disabled profiler records nothing: a stage costs a method call and an
+empty context manager. NULL_PROFILER is the disabled profiler used by
+default.
+"""
+
+# Builtin imports
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict
+from typing import Any, ContextManager, Iterator
+
+# Local imports
+from .models import StageStats
+
+# Keys of a stage shown in their own column by format_profile
+_COLUMNS = ("name", "seconds", "pixels", "peak_bytes", "pixels_per_second")
+
+# -----------------------------------------------------------------------------#
+# Classes
+# -----------------------------------------------------------------------------#
+
+
+class Profiler:
+    """
+    Records the measures of the stages of a run.
+
+    Args:
+        enabled (bool): Record the stages. Defaults to True
+        trace_memory (bool): Trace the peak memory of every stage. Tracing
+            slows the allocations down. Defaults to True
+    """
+
+    def __init__(self, enabled: bool = True, trace_memory: bool = True):
+        self.__enabled = enabled
+        self.__trace_memory = trace_memory
+        self.__stages: list[StageStats] = []
+
+    # -------------------------------------------------------------------------#
+    # Properties
+    # -------------------------------------------------------------------------#
+    @property
+    def enabled(self) -> bool:
+        """
+        Return True if the stages are recorded
+        """
+        return self.__enabled
+
+    @property
+    def stages(self) -> list[StageStats]:
+        """
+        Return the recorded stages, in the order they ended
+        """
+        return self.__stages
+
+    # -------------------------------------------------------------------------#
+    # Methods
+    # -------------------------------------------------------------------------#
+    def stage(self, name: str, pixels: int = 0) -> ContextManager[dict[str, int]]:
+        """
+        Measure the stage run in the context. The context yields a dict in
+        which the stage can set its counters. The "pixels" counter, if set,
+        replaces the pixels argument.
+
+        Args:
+            name (str): Name of the stage
+            pixels (int): Number of pixels the stage works on
+
+        Returns:
+            A context manager
+        """
+        if not self.__enabled:
+            return nullcontext({})
+        return self.__measure(name, pixels)
+
+    def as_dict(self) -> dict[str, Any]:
+        """
+        Return the recorded stages as a structured dict
+        """
+        return {
+            "total_seconds": sum(stage.seconds for stage in self.__stages),
+            "stages": [_stage_dict(stage) for stage in self.__stages],
+        }
+
+    # -------------------------------------------------------------------------#
+    # Methods: Privates
+    # -------------------------------------------------------------------------#
+    @contextmanager
+    def __measure(self, name: str, pixels: int) -> Iterator[dict[str, int]]:
+        """
+        Measure the stage run in the context.
+        """
+        counters: dict[str, int] = {}
+
+        started_tracing = False
+        if self.__trace_memory:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+                started_tracing = True
+
+        start = time.perf_counter()
+        try:
+            yield counters
+        finally:
+            seconds = time.perf_counter() - start
+            peak = 0
+            if self.__trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                if started_tracing:
+                    tracemalloc.stop()
+
+            self.__stages.append(
+                StageStats(
+                    name, seconds, counters.pop("pixels", pixels), peak, counters
+                )
+            )
+
+
+# The profiler of the runs that are not profiled
+NULL_PROFILER = Profiler(enabled=False)
+
+# -----------------------------------------------------------------------------#
+# Functions
+# -----------------------------------------------------------------------------#
+
+
+def _stage_dict(stage: StageStats) -> dict[str, Any]:
+    """
+    Flatten a stage, its throughput and its counters in a dict
+    """
+    values = asdict(stage)
+    values.update(values.pop("counters"))
+    values["pixels_per_second"] = stage.pixels_per_second
+    return values
+
+
+def format_profile(profile: dict[str, Any], as_json: bool = False) -> Iterator[str]:
+    """
+    Yield the lines of the report of a profile.
+
+    Args:
+        profile (dict): Profile returned by Profiler.as_dict
+        as_json (bool): Yield a JSON line per stage instead of a table.
+            Defaults to False
+    """
+    if as_json:
+        for stage in profile["stages"]:
+            yield json.dumps(stage)
+        return
+
+    yield (
+        f"{'stage':<12}{'seconds':>10}{'pixels':>12}{'Mpx/s':>10}"
+        f"{'peak MiB':>10}  counters"
+    )
+    for stage in profile["stages"]:
+        counters = ", ".join(
+            f"{key}={value}" for key, value in stage.items() if key not in _COLUMNS
+        )
+        yield (
+            f"{stage['name']:<12}{stage['seconds']:>10.4f}{stage['pixels']:>12}"
+            f"{stage['pixels_per_second'] / 1e6:>10.2f}"
+            f"{stage['peak_bytes'] / 2**20:>10.1f}  {counters}"
+        )
+    yield f"{'total':<12}{profile['total_seconds']:>10.4f}"
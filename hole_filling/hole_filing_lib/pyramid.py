@@ -0,0 +1,192 @@
+"""
+module: pyramid
+
+Coarse to fine fill for large holes in high resolution images.
+
+The image is downsampled into a pyramid: every level halves the resolution.
+A coarse pixel is the mean of its 2x2 block, or a hole if any pixel of the
+block is a hole. The holes of the coarsest level are filled with the exact
+formula. Going back up, the filled level is upsampled into the holes of the
+next finer level and only a band of hole pixels along the known pixels is
+recomputed with the exact formula.
+
+Every exact computation uses the full resolution boundary, the hole pixels
+being placed at the center of their block. The fill is smooth away from the
+boundary, so the upsampled values are accurate there, and the band takes care
+of the steep part near the boundary. The exact formula runs on about
+n / 4^levels holes plus the bands instead of n holes.
+"""
+
+# Builtin imports
+from typing import TYPE_CHECKING, Optional
+
+# Project specific imports
+import numpy as np
+
+# Local imports
+from .detection import HOLE_VALUE, dilate, find_boundary_mask
+from .engines import VectorizedEngine
+from .models import PixelSet
+
+if TYPE_CHECKING:
+    from .engines import AbstractFillEngine
+    from .models import Connectivity
+    from .weighting import AbstractWeightingMechanism
+
+# -----------------------------------------------------------------------------#
+# Functions
+# -----------------------------------------------------------------------------#
+
+
+def downsample(image: np.ndarray) -> np.ndarray:
+    """
+    Halve the resolution of the image. Each pixel is the mean of its 2x2
+    block, or -1 if any pixel of the block is a hole. Odd sizes are rounded
+    up, the missing pixels are ignored.
+
+    Args:
+        image (np.ndarray): 2D array where the holes are set to -1
+
+    Returns:
+        The downsampled image, of the dtype of the image
+    """
+    rows, cols = image.shape
+    padded = np.zeros((rows + rows % 2, cols + cols % 2), dtype=image.dtype)
+    padded[:rows, :cols] = image
+
+    def block_sum(array: np.ndarray) -> np.ndarray:
+        return (
+            array[0::2, 0::2]
+            + array[1::2, 0::2]
+            + array[0::2, 1::2]
+            + array[1::2, 1::2]
+        )
+
+    # Number of pixels of each block inside the image
+    inside = np.full((padded.shape[0] // 2, padded.shape[1] // 2), 4, dtype=image.dtype)
+    if rows % 2:
+        inside[-1] /= 2
+    if cols % 2:
+        inside[:, -1] /= 2
+
+    # A bool sum is a logical or: True if any pixel of the block is a hole
+    holes = block_sum(padded == HOLE_VALUE)
+    coarse = block_sum(padded) / inside
+    coarse[holes] = HOLE_VALUE
+    return coarse
+
+
+def refine(
+    image: np.ndarray,
+    estimate: np.ndarray,
+    weighting: "AbstractWeightingMechanism",
+    connectivity: "Connectivity",
+    boundaries: PixelSet,
+    band: int,
+    scale: int,
+    engine: "AbstractFillEngine",
+) -> None:
+    """
+    Fill the holes of the image with the estimate, then recompute exactly
+    the holes within band pixels of the known pixels. The image is updated in
+    place.
+
+    Args:
+        image (np.ndarray): 2D array where the holes are set to -1
+        estimate (np.ndarray): Coarser filled image, upsampled to the image
+        weighting (AbstractWeightingMechanism): Weighting mechanism to use
+        connectivity (Connectivity): Pixel connectivity
+        boundaries (PixelSet): Boundary of the full resolution image
+        band (int): Width, in pixels, of the band recomputed exactly. A
+            negative band recomputes every hole
+        scale (int): Size of a pixel of the image in full resolution pixels
+        engine (AbstractFillEngine): Engine used for the exact fill
+    """
+    hole_mask = image == HOLE_VALUE
+
+    if band < 0:
+        band_mask = hole_mask
+    else:
+        known = ~hole_mask
+        for _ in range(band):
+            known = dilate(known, connectivity)
+        band_mask = known & hole_mask
+
+    holes = PixelSet.from_mask(band_mask)
+
+    # Center of each pixel in full resolution coordinates
+    offset = (scale - 1) / 2
+
+    image[hole_mask] = estimate[hole_mask]
+    if holes:
+        image[holes.rows, holes.columns] = engine.compute(
+            weighting,
+            holes.coords * scale + offset,
+            boundaries.coords,
+            boundaries.values,
+        )
+
+
+def pyramid_fill(
+    image: np.ndarray,
+    weighting: "AbstractWeightingMechanism",
+    connectivity: "Connectivity",
+    levels: int = 3,
+    band: int = 2,
+    engine: Optional["AbstractFillEngine"] = None,
+) -> None:
+    """
+    Fill the holes coarse to fine. The image is updated in place.
+
+    Args:
+        image (np.ndarray): 2D array where the holes are set to -1
+        weighting (AbstractWeightingMechanism): Weighting mechanism to use
+        connectivity (Connectivity): Pixel connectivity
+        levels (int): Number of times the image is halved. 0 fills the image
+            exactly. Defaults to 3
+        band (int): Width, in pixels, of the band of holes along the known
+            pixels recomputed exactly at each finer level. Defaults to 2
+        engine (AbstractFillEngine): Optional. Engine used for the exact
+            fills. Defaults to a VectorizedEngine
+    """
+    import cv2
+
+    engine = engine or VectorizedEngine()
+
+    boundaries = PixelSet.from_mask(
+        find_boundary_mask(image == HOLE_VALUE, connectivity), image
+    )
+    if not boundaries:
+        return
+
+    pyramid = [image]
+    for _ in range(levels):
+        pyramid.append(downsample(pyramid[-1]))
+
+    # Exact fill of the coarsest level
+    coarsest = pyramid[-1]
+    refine(
+        coarsest, coarsest, weighting, connectivity, boundaries, -1, 2**levels, engine
+    )
+
+    for level in range(levels - 1, -1, -1):
+        current, coarse = pyramid[level], pyramid[level + 1]
+        rows, cols = current.shape
+
+        # Upsample by exactly 2 and crop, so the pixel centers stay aligned
+        # when the size of the finer level is odd
+        estimate = cv2.resize(
+            coarse,
+            (coarse.shape[1] * 2, coarse.shape[0] * 2),
+            interpolation=cv2.INTER_LINEAR,
+        )[:rows, :cols]
+        refine(
+            current,
+            estimate,
+            weighting,
+            connectivity,
+            boundaries,
+            band,
+            2**level,
+            engine,
+        )
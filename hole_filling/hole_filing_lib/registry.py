@@ -0,0 +1,314 @@
+"""
+module: registry
+
+A registry of the fill engines, by name, with a rough model of their cost,
+memory and accuracy.
+
+select_engine picks, for the size of a fill, the fastest engine whose error
+is within the requested accuracy and whose memory fits in the available
+memory. The costs are per pixel timings measured on a single core with the
+DefaultWeightMechanism. They are only meant to rank the engines.
+
+    vectorized  exact, n * m weights
+    fft         exact, two convolutions over the bounding box of the region,
+                unless a large z or a small e exceeds the float precision
+    quadtree    approximate, about n log m
+    flood       mean of the neighbours, layer by layer, not the formula
+    fmm         OpenCV inpainting, not the weighted average formula
+
+Other engines can be added with register_engine.
+
+The modules of the builtin engines, and NumPy and OpenCV with them, are only
+imported when an engine is created. Listing or selecting the engines is
+free, so the command line interface can offer them without paying for the
+imports.
+"""
+
+# Builtin imports
+import os
+from dataclasses import dataclass
+from importlib import import_module
+from typing import TYPE_CHECKING, Callable, Optional, Union
+
+# Local imports
+from ..exceptions import HoleFillingException
+
+if TYPE_CHECKING:
+    from .engines import AbstractFillEngine
+
+# Name of the automatic selection
+AUTO = "auto"
+
+# Error of the engines that don't evaluate the fill formula: anything in the
+# [0..1] range of the colors
+UNBOUNDED_ERROR = 1.0
+
+# -----------------------------------------------------------------------------#
+# Dataclasses
+# -----------------------------------------------------------------------------#
+
+
+@dataclass(frozen=True)
+class EngineSpec:
+    """
+    Dataclass that describes a registered engine. cost and memory are
+    estimated from (hole count, boundary count, bounding box area), in
+    seconds and in bytes. error is the largest expected error of a filled
+    color, in the [0..1] range of the colors, or a function that estimates
+    it from (hole count, boundary count, bounding box area, z, e).
+    """
+
+    name: str
+    factory: Callable[[], "AbstractFillEngine"]
+    error: Union[float, Callable[[int, int, int, int, float], float]]
+    cost: Callable[[int, int, int], float]
+    memory: Callable[[int, int, int], int]
+    description: str
+
+
+@dataclass(frozen=True)
+class EngineChoice:
+    """
+    Dataclass that stores the engine picked by select_engine, why, and the
+    estimated cost, in seconds, of every engine considered.
+    """
+
+    name: str
+    reason: str
+    estimates: dict[str, float]
+
+
+# -----------------------------------------------------------------------------#
+# Registry
+# -----------------------------------------------------------------------------#
+
+_ENGINES: dict[str, EngineSpec] = {}
+
+
+def register_engine(spec: EngineSpec) -> None:
+    """
+    Add an engine to the registry, replacing any engine of the same name.
+
+    Args:
+        spec (EngineSpec): The engine to register
+    """
+    _ENGINES[spec.name] = spec
+
+
+def engine_names() -> list[str]:
+    """
+    Return the names of the registered engines
+    """
+    return list(_ENGINES)
+
+
+def get_engine_spec(name: str) -> EngineSpec:
+    """
+    Return the registered engine of this name.
+
+    Raises:
+        HoleFillingException
+    """
+    try:
+        return _ENGINES[name]
+    except KeyError:
+        raise HoleFillingException(
+            f"Unknown engine: {name}. Supports {', '.join(_ENGINES)}"
+        ) from None
+
+
+def create_engine(name: str) -> "AbstractFillEngine":
+    """
+    Create a new instance of the registered engine of this name.
+
+    Args:
+        name (str): Name of the engine
+
+    Returns:
+        AbstractFillEngine
+
+    Raises:
+        HoleFillingException
+    """
+    return get_engine_spec(name).factory()
+
+
+def available_memory() -> Optional[int]:
+    """
+    Return the physical memory available, in bytes, or None if it is not
+    known on this platform.
+    """
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def select_engine(
+    hole_count: int,
+    boundary_count: int,
+    area: int,
+    accuracy: float = 0.0,
+    memory: Optional[int] = None,
+    param_z: int = 3,
+    param_e: float = 0.01,
+) -> EngineChoice:
+    """
+    Pick the fastest engine that is accurate enough and fits in memory.
+
+    Args:
+        hole_count (int): Number of holes
+        boundary_count (int): Number of boundary pixels
+        area (int): Area of the bounding box of the holes and boundaries
+        accuracy (float): Largest acceptable error of a filled color, in the
+            [0..1] range of the colors. Defaults to 0: exact engines only
+        memory (int): Optional. Memory available, in bytes. Defaults to the
+            available physical memory
+        param_z (int): The z value of the default weighting mechanism.
+            Defaults to 3
+        param_e (float): The e value of the default weighting mechanism.
+            Defaults to 0.01
+
+    Returns:
+        EngineChoice
+
+    Raises:
+        HoleFillingException
+    """
+    if memory is None:
+        memory = available_memory()
+
+    estimates = {}
+    rejected = []
+    for spec in _ENGINES.values():
+        error = spec.error
+        if callable(error):
+            error = error(hole_count, boundary_count, area, param_z, param_e)
+        if error > accuracy:
+            rejected.append(f"{spec.name} (error {error:g})")
+            continue
+
+        needed = spec.memory(hole_count, boundary_count, area)
+        if memory is not None and needed > memory:
+            rejected.append(f"{spec.name} (needs {needed / 2**20:.0f} MiB)")
+            continue
+
+        estimates[spec.name] = spec.cost(hole_count, boundary_count, area)
+
+    if not estimates:
+        raise HoleFillingException(
+            f"No engine meets an accuracy of {accuracy:g}: {', '.join(rejected)}"
+        )
+
+    name = min(estimates, key=estimates.__getitem__)
+    others = ", ".join(
+        f"{other} {seconds:.3g}s"
+        for other, seconds in sorted(estimates.items(), key=lambda item: item[1])
+        if other != name
+    )
+    reason = (
+        f"{hole_count} holes, {boundary_count} boundaries, {area} pixels: "
+        f"fastest within an error of {accuracy:g}, "
+        f"estimated {estimates[name]:.3g}s"
+    )
+    if others:
+        reason += f" (then {others})"
+    if rejected:
+        reason += f"; rejected {', '.join(rejected)}"
+    return EngineChoice(name, reason, estimates)
+
+
+# -----------------------------------------------------------------------------#
+# Builtin engines
+# -----------------------------------------------------------------------------#
+
+
+def _lazy(module: str, name: str) -> Callable[[], "AbstractFillEngine"]:
+    """
+    Return a factory of the engine class name of the module of this package,
+    imported on the first call.
+    """
+
+    def factory() -> "AbstractFillEngine":
+        return getattr(import_module(f".{module}", __package__), name)()
+
+    return factory
+
+
+def _vectorized_memory(hole_count: int, boundary_count: int, area: int) -> int:
+    """
+    Memory of the VectorizedEngine: its blocks of weights, bounded by its
+    default budget. The engines module is imported on the first estimate.
+    """
+    from .engines import DEFAULT_MEMORY_BUDGET
+
+    return min(hole_count * boundary_count * 32, DEFAULT_MEMORY_BUDGET)
+
+
+def _fft_error(
+    hole_count: int, boundary_count: int, area: int, param_z: int, param_e: float
+) -> float:
+    """
+    Error of the FFTEngine: 0 while its round-off is within FFT_TOLERANCE,
+    else the estimated round-off. The largest weight is 1 / e, and the
+    weight sums are at least boundary_count times the weight of the diagonal
+    of the bounding box, taken as a square. The convolution module is
+    imported on the first estimate.
+    """
+    from .convolution import FFT_TOLERANCE, fft_error
+
+    smallest_sum = boundary_count / ((2 * area) ** (param_z / 2) + param_e)
+    error = fft_error(1 / param_e, smallest_sum, boundary_count)
+    return 0.0 if error <= FFT_TOLERANCE else error
+
+
+register_engine(
+    EngineSpec(
+        "vectorized",
+        _lazy("engines", "VectorizedEngine"),
+        0.0,
+        lambda n, m, area: 15e-9 * n * m,
+        _vectorized_memory,
+        "Exact weighted average with numpy, in blocks of holes",
+    )
+)
+register_engine(
+    EngineSpec(
+        "fft",
+        _lazy("convolution", "FFTEngine"),
+        _fft_error,
+        lambda n, m, area: 1.7e-6 * area,
+        lambda n, m, area: 300 * area,
+        "Exact weighted average as two FFT convolutions",
+    )
+)
+register_engine(
+    EngineSpec(
+        "quadtree",
+        _lazy("approximate", "QuadTreeEngine"),
+        0.05,
+        lambda n, m, area: 2.5e-6 * n + 1e-5 * m,
+        lambda n, m, area: 64 * n + 256 * m,
+        "Barnes-Hut approximation of the weighted average",
+    )
+)
+register_engine(
+    EngineSpec(
+        "flood",
+        _lazy("inpainting", "FloodFillEngine"),
+        UNBOUNDED_ERROR,
+        lambda n, m, area: 6e-7 * n,
+        lambda n, m, area: 16 * area + 192 * n,
+        "Layer by layer flood fill with the mean of the neighbours",
+    )
+)
+register_engine(
+    EngineSpec(
+        "fmm",
+        _lazy("inpainting", "FMMEngine"),
+        UNBOUNDED_ERROR,
+        lambda n, m, area: 1e-6 * area,
+        lambda n, m, area: 4 * area,
+        "OpenCV Fast Marching Method inpainting",
+    )
+)
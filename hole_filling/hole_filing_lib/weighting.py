@@ -3,14 +3,29 @@ module: weighting
 
 Provides an abstract class to implement weighting functions. Also defines a
 default weighting mechanism
+
+Weights can be computed one pair at a time with get_weight or for a block of
+holes against a block of boundaries with get_weights. The batched version
+falls back to get_weight unless the weighting mechanism overrides it.
+
+A weighting mechanism whose weight only depends on the offset between the
+hole and the boundary pixel sets translation_invariant, which lets the fill
+engines compute the fill as a convolution.
+
+On integer coordinates, DefaultWeightMechanism.get_weights looks the weights
+up in the process wide KERNEL_CACHE instead of computing them.
 """
 
 # Builtin imports
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 import math
 
+# Project specific imports
+import numpy as np
+
 from hole_filling.hole_filing_lib.models import Pixel
+from hole_filling.hole_filing_lib.kernel_cache import KERNEL_CACHE
 
 if TYPE_CHECKING:
     from .models import Pixel
@@ -25,6 +40,9 @@ class AbstractWeightingMechanism(ABC):
     An abstract class that all weighting mechanism should use to implement
     """
 
+    # True when the weight only depends on hole - boundary
+    translation_invariant = False
+
     @abstractmethod
     def get_weight(self, hole: "Pixel", boundary: "Pixel") -> float:
         """
@@ -38,16 +56,70 @@ class AbstractWeightingMechanism(ABC):
             Computed weight in float
         """
 
+    def get_weights(self, holes: np.ndarray, boundaries: np.ndarray) -> np.ndarray:
+        """
+        Takes in a block of hole coordinates and a block of boundary
+        coordinates and computes the weight of every pair.
+
+        This default implementation calls get_weight once per pair. Only the
+        coordinates are known here, so the value of the hole pixels is -1 and
+        the value of the boundary pixels is nan. Override it with an array
+        based implementation to speed up the fill engines.
+
+        Args:
+            holes (np.ndarray): (n, 2) array of hole (row, column)
+            boundaries (np.ndarray): (m, 2) array of boundary (row, column)
+
+        Returns:
+            A (n, m) array of weights
+        """
+        holes = np.asarray(holes).reshape(-1, 2)
+        boundaries = np.asarray(boundaries).reshape(-1, 2)
+
+        boundary_pixels = [
+            Pixel(int(row), int(col), math.nan) for row, col in boundaries
+        ]
+        weights = np.empty((len(holes), len(boundaries)), dtype=np.float64)
+        for index, (row, col) in enumerate(holes):
+            hole = Pixel(int(row), int(col), -1)
+            weights[index] = [
+                self.get_weight(hole, boundary) for boundary in boundary_pixels
+            ]
+        return weights
+
 
 class DefaultWeightMechanism(AbstractWeightingMechanism):
     """
     Computes the weight between hole and boundary using euclidean distance
+
+    Args:
+        param_z (int): The exponent applied to the distance
+        param_e (float): The epsilon added to the denominator
+        use_cache (bool): Look the weights of integer coordinates up in the
+            KERNEL_CACHE. Defaults to True
     """
 
-    def __init__(self, param_z: int, param_e: float):
+    translation_invariant = True
+
+    def __init__(self, param_z: int, param_e: float, use_cache: bool = True):
         super().__init__()
         self.__param_z = param_z
         self.__param_e = param_e
+        self.__use_cache = use_cache
+
+    @property
+    def param_z(self) -> int:
+        """
+        Return the exponent applied to the distance
+        """
+        return self.__param_z
+
+    @property
+    def param_e(self) -> float:
+        """
+        Return the epsilon added to the denominator
+        """
+        return self.__param_e
 
     def get_weight(self, hole: Pixel, boundary: Pixel) -> float:
         """
@@ -63,3 +135,57 @@ class DefaultWeightMechanism(AbstractWeightingMechanism):
         dist = math.dist((hole.row, hole.column), (boundary.row, boundary.column))
         denominator = math.pow(dist, self.__param_z) + self.__param_e
         return 1 / denominator
+
+    def get_weights(self, holes: np.ndarray, boundaries: np.ndarray) -> np.ndarray:
+        """
+        Array based version of get_weight. Computes 1 / (||u-v||^z + e) for
+        every hole u and boundary v.
+
+        Args:
+            holes (np.ndarray): (n, 2) array of hole (row, column)
+            boundaries (np.ndarray): (m, 2) array of boundary (row, column)
+
+        Returns:
+            A (n, m) array of weights
+        """
+        holes = np.asarray(holes, dtype=np.float64).reshape(-1, 2)
+        boundaries = np.asarray(boundaries, dtype=np.float64).reshape(-1, 2)
+
+        if self.__use_cache and len(holes) and len(boundaries):
+            weights = self.__lookup_weights(holes, boundaries)
+            if weights is not None:
+                return weights
+
+        d_row = holes[:, 0, None] - boundaries[None, :, 0]
+        d_col = holes[:, 1, None] - boundaries[None, :, 1]
+        dist = np.sqrt(d_row * d_row + d_col * d_col)
+        return 1.0 / (np.power(dist, self.__param_z) + self.__param_e)
+
+    def __lookup_weights(
+        self, holes: np.ndarray, boundaries: np.ndarray
+    ) -> Optional[np.ndarray]:
+        """
+        Look the weights up in the kernel cache. Returns None when the
+        coordinates are not integers, or the table does not fit in the cache
+        or costs more to build than the weights.
+        """
+        points = np.concatenate([holes, boundaries])
+        if not np.array_equal(points, np.round(points)):
+            return None
+
+        low, high = points.min(axis=0), points.max(axis=0)
+        table = KERNEL_CACHE.get_table(
+            self.__param_z,
+            self.__param_e,
+            int((high - low).max()),
+            len(holes) * len(boundaries),
+        )
+        if table is None:
+            return None
+
+        hole_index = holes.astype(np.intp)
+        boundary_index = boundaries.astype(np.intp)
+        flat = np.abs(hole_index[:, 0, None] - boundary_index[None, :, 0])
+        flat *= len(table)
+        flat += np.abs(hole_index[:, 1, None] - boundary_index[None, :, 1])
+        return table.ravel().take(flat)
@@ -7,37 +7,97 @@ Validations:
     - image and mask must be of same resolution
 
 Process:
-    - image and mask are coverted to grayscale and the pixel values are
-    normalized to [0,1]
-    - the pixels whose intensity are less than 0.5 in the mask, their
-    corresponding pixel in the image is set to -1
+    - image and mask are coverted to grayscale and the pixel values of the
+    image are normalized to [0,1]. The mask is kept in its 8 bit form.
+    - the pixels whose intensity are less than 0.5 in the mask (less than 128
+    for an 8 bit mask), their corresponding pixel in the image is set to -1
+
+The image can be converted to float32 instead of float64: half the memory,
+and the filled colors still round to the same 8 bit values.
+
+Color images can be kept as they are: an image of shape (rows, columns, C)
+is normalized channel by channel and every channel of a hole is set to -1.
+
+Images and masks are read as their pixels are stored: the EXIF orientation
+is ignored by every reader, so an image and its mask always line up,
+whatever mode they are read in.
 """
 
 # Builtin imports
-from typing import TYPE_CHECKING
 import os
 
 # Project specific imports
-import cv2
+import numpy as np
 
 # Local imports
 from .exceptions import HoleFillingException
 
-if TYPE_CHECKING:
-    import numpy as np
-
 # -----------------------------------------------------------------------------#
 # CV2 Utils
 # -----------------------------------------------------------------------------#
 
 
-def convert_to_grayscale(path: str) -> "np.ndarray":
+def read_grayscale(path: str) -> "np.ndarray":
+    """
+    Read the image as an 8 bit grayscale image, ignoring its EXIF
+    orientation.
+
+    Args:
+        path (str): Path to an image file
+
+    Returns:
+        A numpy array of uint8 in the range of [0..255]
+
+    Raises:
+        HoleFillingException
+    """
+    if not os.path.exists(path):
+        raise HoleFillingException(f"FileNotFound: {path}")
+
+    import cv2
+
+    img = cv2.imread(path, cv2.IMREAD_GRAYSCALE | cv2.IMREAD_IGNORE_ORIENTATION)
+    if img is None:
+        raise HoleFillingException(f"UnsupportedImage: {path}")
+    return img
+
+
+def read_image(path: str) -> "np.ndarray":
+    """
+    Read the image with its channels and bit depth, as OpenCV decodes it:
+    BGR or BGRA for color images. Like read_grayscale, the EXIF orientation
+    is ignored.
+
+    Args:
+        path (str): Path to an image file
+
+    Returns:
+        A numpy array of shape (rows, columns) or (rows, columns, C)
+
+    Raises:
+        HoleFillingException
+    """
+    if not os.path.exists(path):
+        raise HoleFillingException(f"FileNotFound: {path}")
+
+    import cv2
+
+    img = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    if img is None:
+        raise HoleFillingException(f"UnsupportedImage: {path}")
+    return img
+
+
+def convert_to_grayscale(
+    path: str, dtype: "np.typing.DTypeLike" = np.float64
+) -> "np.ndarray":
     """
     Convert the image to a grayscale image. This method returns an numpy array
     in the range of [0..1]
 
     Args:
         path (str): Path to an image file
+        dtype (np.dtype): float32 or float64. Defaults to float64
 
     Returns:
         A numpy array in the range of [0..1]
@@ -45,11 +105,64 @@ def convert_to_grayscale(path: str) -> "np.ndarray":
     Raises:
         HoleFillingException
     """
-    if not os.path.exists(path):
-        raise HoleFillingException(f"FileNotFound: {path}")
+    return to_unit(read_grayscale(path), dtype)
+
+
+def to_unit(
+    values: "np.ndarray", dtype: "np.typing.DTypeLike" = np.float64
+) -> "np.ndarray":
+    """
+    Convert pixel values to the [0..1] range of the fill.
+
+    Args:
+        values (np.ndarray): Values of an integer or a float image
+        dtype (np.dtype): float32 or float64. Defaults to float64
+
+    Returns:
+        A new array of dtype
+    """
+    if np.issubdtype(values.dtype, np.integer):
+        unit = values.astype(dtype)
+        unit /= np.iinfo(values.dtype).max
+        return unit
+    return values.astype(dtype)
 
-    img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
-    return img / 255.0
+
+def from_unit(colors: "np.ndarray", dtype: "np.typing.DTypeLike") -> "np.ndarray":
+    """
+    Convert colors in the [0..1] range to pixel values of the dtype. Integer
+    values are rounded and clipped to the range of the dtype.
+
+    Args:
+        colors (np.ndarray): Filled colors
+        dtype (np.dtype): Type of the pixels of the image
+
+    Returns:
+        An array of dtype
+    """
+    dtype = np.dtype(dtype)
+    if np.issubdtype(dtype, np.integer):
+        scale = np.iinfo(dtype).max
+        return np.clip(np.rint(colors * scale), 0, scale).astype(dtype)
+    return colors.astype(dtype)
+
+
+def find_mask_holes(mask: "np.ndarray") -> "np.ndarray":
+    """
+    Threshold the mask. 8 and 16 bit masks, as read from an image file, are
+    compared in their own range, so they are never converted to float. Other
+    masks are in the range [0..1].
+
+    Args:
+        mask (np.ndarray): Mask in the range [0..1], or [0..max] for uint8
+            and uint16
+
+    Returns:
+        A boolean array, True where the intensity is less than half the range
+    """
+    if mask.dtype in (np.uint8, np.uint16):
+        return mask <= np.iinfo(mask.dtype).max // 2
+    return mask < 0.5
 
 
 # -----------------------------------------------------------------------------#
@@ -64,16 +177,32 @@ class ImagePreProcessor:
     corresponding pixel in the image array is set to -1.
 
     Args:
-        image (np.ndarray): A numpy array of the image in grayscale in the range [0..1]
-        mask (np.ndarray): A numpy array of the mask in grayscale in the range [0..1]
+        image (np.ndarray): A numpy array of the image in grayscale in the range [0..1],
+            or of shape (rows, columns, C) for a color image
+        mask (np.ndarray): A numpy array of the mask in grayscale in the range
+            [0..1], or an 8 bit mask in the range [0..255]
+        source_dtype (np.dtype): Type of the pixels of the image the array
+            was normalized from. Default to uint8
     """
 
-    def __init__(self, image: "np.ndarray", mask: "np.ndarray"):
+    def __init__(
+        self,
+        image: "np.ndarray",
+        mask: "np.ndarray",
+        source_dtype: "np.typing.DTypeLike" = np.uint8,
+    ):
         self.__image = image
         self.__mask = mask
+        self.__source_dtype = np.dtype(source_dtype)
 
     @classmethod
-    def from_images(cls, image_path: str, mask_path: str) -> "ImagePreProcessor":
+    def from_images(
+        cls,
+        image_path: str,
+        mask_path: str,
+        color: bool = False,
+        dtype: "np.typing.DTypeLike" = np.float64,
+    ) -> "ImagePreProcessor":
         """
         Takes in tthe images and convert them to grayscale before creating an
         instance of the class
@@ -81,13 +210,35 @@ class ImagePreProcessor:
         Args:
             image_path (str): Location of an image file
             mask_path (str): Location of the mask file
+            color (bool): Keep the channels of the image instead of converting
+                it to grayscale. Default to False
+            dtype (np.dtype): Precision of the image, float32 or float64.
+                Default to float64
 
         Returns:
             An instance of this class ImagePreProcessor
         """
-        image = convert_to_grayscale(image_path)
-        mask = convert_to_grayscale(mask_path)
-        return cls(image, mask)
+        source = read_image(image_path) if color else read_grayscale(image_path)
+        mask = read_grayscale(mask_path)
+        return cls(to_unit(source, dtype), mask, source.dtype)
+
+    # -------------------------------------------------------------------------#
+    # Properties
+    # -------------------------------------------------------------------------#
+    @property
+    def image(self) -> "np.ndarray":
+        """
+        Return the image array
+        """
+        return self.__image
+
+    @property
+    def source_dtype(self) -> np.dtype:
+        """
+        Return the type of the pixels of the source image, to save the
+        filled image with
+        """
+        return self.__source_dtype
 
     # -------------------------------------------------------------------------#
     # Methods
@@ -95,19 +246,19 @@ class ImagePreProcessor:
     def run(self) -> "np.ndarray":
         """
         Find the pixels whose intensity is less than 0.5 in mask and set the
-        corresponding pixel in the image to -1.
+        corresponding pixel in the image to -1. The image is updated in place.
 
         Returns:
             updated array
+
+        Raises:
+            HoleFillingException
         """
-        if self.__image.shape != self.__mask.shape:
+        if self.__image.shape[:2] != self.__mask.shape:
             raise HoleFillingException(
                 "Resolution mismatch. Image and Mask should be of same resolution."
             )
 
-        for row_index, row in enumerate(self.__mask):
-            for col_index, value in enumerate(row):
-                if value < 0.5:
-                    self.__image[row_index][col_index] = -1.0
+        self.__image[find_mask_holes(self.__mask)] = -1.0
 
         return self.__image
@@ -0,0 +1,492 @@
+"""
+module: pipeline
+
+Runs the whole hole filling pipeline for an image and a mask on disk:
+preprocess, find the holes and their boundaries, fill and save.
+
+Shared by the command line interface and the batch mode.
+
+fill_array fills images stored as .npy or raw arrays out of core: the files
+are memory mapped and the result is written in place into the mapped output,
+see array_io.
+
+The engine can be given by its name in the engine registry, or as "auto" to
+let the registry pick the fastest engine for the holes of the image.
+
+By default only a window around the holes is processed: the bounding box of
+the holes of the mask, padded by the margin the engine reads around them. The
+image is converted, preprocessed, searched and filled in that window only,
+which is pasted back into the image before saving. The cost of a fill
+follows the size of the holes rather than the resolution of the image.
+
+Images keep their channels and bit depth unless converted to grayscale: a
+color image is filled in one pass over all its channels and saved with the
+channels and the dtype it was read with.
+
+The window is converted to float32 by default, float64 for reference runs.
+Only the filled pixels are converted back: they are written into the image
+as it was read, which is what the encoder saves.
+
+With a ResultCache, a fill whose decoded pixels and parameters were seen
+before is copied from the cache instead of being computed again.
+"""
+
+# Builtin imports
+import os
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+# Project specific imports
+import numpy as np
+
+# Local imports
+from . import array_io
+from .exceptions import HoleFillingException
+from .image_preprocessor import (
+    ImagePreProcessor,
+    find_mask_holes,
+    from_unit,
+    read_grayscale,
+    read_image,
+    to_unit,
+)
+from .result_cache import ResultCache, result_key
+
+from .hole_filing_lib import registry
+from .hole_filing_lib.detection import find_hole_window, find_holes_and_boundaries
+from .hole_filing_lib.engines import VectorizedEngine
+from .hole_filing_lib.hole_filler import HoleFiller, output_filename
+from .hole_filing_lib.models import Connectivity
+from .hole_filing_lib.profiling import NULL_PROFILER, Profiler
+from .hole_filing_lib.weighting import DefaultWeightMechanism
+
+if TYPE_CHECKING:
+    from .hole_filing_lib.engines import AbstractFillEngine
+    from .hole_filing_lib.models import PixelSet
+
+# Precision of the pixels being filled, float64 for reference runs
+DEFAULT_PRECISION = "float32"
+
+# -----------------------------------------------------------------------------#
+# Functions
+# -----------------------------------------------------------------------------#
+
+
+def get_connectivity(value: int) -> Connectivity:
+    """
+    Convert the connectivity value to the enum.
+
+    Args:
+        value (int): 4 or 8
+
+    Returns:
+        Connectivity
+
+    Raises:
+        HoleFillingException
+    """
+    for connectivity in Connectivity:
+        if connectivity.value == value:
+            return connectivity
+    raise HoleFillingException("Invalid pixel connectivity. Supports 4 and 8")
+
+
+def resolve_engine(
+    engine: Union[str, "AbstractFillEngine", None],
+    image: "np.ndarray",
+    connectivity: Connectivity,
+    accuracy: float = 0.0,
+    param_z: int = 3,
+    param_e: float = 0.01,
+) -> Optional["AbstractFillEngine"]:
+    """
+    Create the engine of this name. "auto" selects the engine from the holes
+    and boundaries of the image. The choice and its reason are printed.
+
+    Args:
+        engine (str | AbstractFillEngine): Name of a registered engine, "auto"
+            or an engine instance, returned as is
+        image (np.ndarray): Preprocessed image, the holes are set to -1
+        connectivity (Connectivity): Pixel connectivity
+        accuracy (float): Largest acceptable error of a filled color for
+            "auto"
+        param_z (int): The z value of the weighting mechanism, for "auto"
+        param_e (float): The e value of the weighting mechanism, for "auto"
+
+    Returns:
+        The engine, None for the default pixel by pixel fill
+
+    Raises:
+        HoleFillingException
+    """
+    if engine is None or not isinstance(engine, str):
+        return engine
+
+    if engine != registry.AUTO:
+        print(f"Engine: {engine}")
+        return registry.create_engine(engine)
+
+    holes, boundaries = find_holes_and_boundaries(image, connectivity)
+    if not holes:
+        return None
+
+    rows = np.concatenate([holes.rows, boundaries.rows])
+    cols = np.concatenate([holes.columns, boundaries.columns])
+    area = int(np.ptp(rows) + 1) * int(np.ptp(cols) + 1)
+
+    choice = registry.select_engine(
+        len(holes), len(boundaries), area, accuracy, param_z=param_z, param_e=param_e
+    )
+    print(f"Engine: {choice.name} (auto: {choice.reason})")
+    return registry.create_engine(choice.name)
+
+
+def window_margin(engine: Union[str, "AbstractFillEngine", None]) -> int:
+    """
+    Return how far around the holes the engine reads the image. "auto" reads
+    as far as the furthest reaching registered engine.
+
+    Args:
+        engine (str | AbstractFillEngine): Name of a registered engine, "auto"
+            or an engine instance
+
+    Returns:
+        Margin in pixels, at least 1 for the boundary
+
+    Raises:
+        HoleFillingException
+    """
+    if engine is None:
+        return 1
+    if engine == registry.AUTO:
+        return max(
+            registry.create_engine(name).margin for name in registry.engine_names()
+        )
+    if isinstance(engine, str):
+        return registry.create_engine(engine).margin
+    return engine.margin
+
+
+def _engine_key(engine: Union[str, "AbstractFillEngine", None]) -> Any:
+    """
+    Return a JSON serializable description of the engine and its settings.
+    """
+    if engine is None or isinstance(engine, str):
+        return engine
+    settings = {name: repr(value) for name, value in vars(engine).items()}
+    return [type(engine).__qualname__, settings]
+
+
+def fill_image(
+    image_path: str,
+    mask_path: str,
+    param_z: int,
+    param_e: float,
+    connectivity: int,
+    output_directory: Optional[str] = None,
+    output_path: Optional[str] = None,
+    debug: bool = False,
+    per_component: bool = False,
+    workers: int = 1,
+    engine: Union[str, "AbstractFillEngine", None] = None,
+    pyramid_levels: int = 0,
+    pyramid_band: int = 2,
+    accuracy: float = 0.0,
+    profile: bool = False,
+    roi: bool = True,
+    cache: Optional[ResultCache] = None,
+    grayscale: bool = False,
+    precision: str = DEFAULT_PRECISION,
+) -> Optional[HoleFiller]:
+    """
+    Fill the holes of the image and write the result to disk.
+
+    Args:
+        image_path (str): Location of an image file
+        mask_path (str): Location of the mask file
+        param_z (int): The z value for the default weighting mechanism
+        param_e (float): The e value for the default weighting mechanism
+        connectivity (int): Pixel connectivity, 4 or 8
+        output_directory (str): Optional. Directory of the output image.
+            Defaults to the directory of the image
+        output_path (str): Optional. Exact path of the output image
+        debug (bool): Draw the boundary in black in the output image
+        per_component (bool): Fill each hole with its own boundary only
+        workers (int): Number of processes used to fill the holes
+        engine (str | AbstractFillEngine): Optional. Engine used to compute
+            the colors, or the name of a registered engine, or "auto"
+        pyramid_levels (int): Number of levels of the coarse to fine fill. 0
+            fills at full resolution only
+        pyramid_band (int): Width of the band refined at each pyramid level
+        accuracy (float): Largest acceptable error of a filled color when the
+            engine is "auto". 0 only allows exact engines
+        profile (bool): Record the time, throughput and memory of every
+            stage, see HoleFiller.profile
+        roi (bool): Only process the window around the holes. The holes
+            and boundaries of the HoleFiller are then relative to the window.
+            The pyramid always processes the whole image. Defaults to True
+        cache (ResultCache): Optional. Cache the result, or copy it from the
+            cache if the same fill was done before
+        grayscale (bool): Convert the image to 8 bit grayscale instead of
+            filling its channels and keeping its bit depth. Defaults to False
+        precision (str): Type the pixels are filled in, "float32" or
+            "float64". Defaults to "float32"
+
+    Returns:
+        The HoleFiller that filled the image, None if the result was copied
+        from the cache
+
+    Raises:
+        HoleFillingException
+    """
+    pixel_connectivity = get_connectivity(connectivity)
+    if not output_directory:
+        output_directory = os.path.dirname(image_path)
+
+    profiler = Profiler() if profile else NULL_PROFILER
+
+    with profiler.stage("read") as counters:
+        frame = read_grayscale(image_path) if grayscale else read_image(image_path)
+        mask = read_grayscale(mask_path)
+        counters["pixels"] = frame.size
+
+    key = None
+    if cache is not None:
+        key = result_key(
+            frame,
+            mask,
+            {
+                "z": param_z,
+                "e": param_e,
+                "connectivity": connectivity,
+                "debug": debug,
+                "per_component": per_component,
+                "engine": _engine_key(engine),
+                "pyramid_levels": pyramid_levels,
+                "pyramid_band": pyramid_band,
+                "accuracy": accuracy,
+                "grayscale": grayscale,
+                "precision": precision,
+            },
+        )
+        if not output_path:
+            output_path = os.path.join(
+                output_directory, output_filename(pixel_connectivity)
+            )
+        if cache.get(key, output_path):
+            print(f"Filled output image copied from the cache to: {output_path}")
+            return None
+
+    # Preprocess the image and mask. Only a window of the image is converted,
+    # unless filling a pyramid
+    image, offset = frame, (0, 0)
+    with profiler.stage("preprocess", frame.size) as counters:
+        if roi and pyramid_levels <= 0 and frame.shape[:2] == mask.shape:
+            window = find_hole_window(find_mask_holes(mask), window_margin(engine))
+            image, mask = frame[window], mask[window]
+            offset = (window[0].start, window[1].start)
+            counters["window"] = image.size
+        processed_img = ImagePreProcessor(to_unit(image, precision), mask).run()
+
+    # Create an instance of the weighting mechanism
+    weighting = DefaultWeightMechanism(param_z, param_e)
+    fill_engine = resolve_engine(
+        engine, processed_img, pixel_connectivity, accuracy, param_z, param_e
+    )
+
+    filler = HoleFiller(
+        processed_img,
+        weighting=weighting,
+        connectivity=pixel_connectivity,
+        output_directory=output_directory,
+        debug=debug,
+        engine=fill_engine,
+        per_component=per_component,
+        workers=workers,
+        output_path=output_path,
+        pyramid_levels=pyramid_levels,
+        pyramid_band=pyramid_band,
+        profiler=profiler,
+        frame=frame,
+        offset=offset,
+    )
+    filler.fill()
+
+    if cache is not None and key is not None and filler.output_path is not None:
+        cache.put(key, filler.output_path)
+    return filler
+
+
+def _resolve_array_engine(
+    engine: Union[str, "AbstractFillEngine", None],
+    holes: "PixelSet",
+    boundaries: "PixelSet",
+    param_z: int = 3,
+    param_e: float = 0.01,
+) -> "AbstractFillEngine":
+    """
+    Create the engine of an out of core fill. "auto" selects among the exact
+    engines. Image based engines are rejected.
+
+    Raises:
+        HoleFillingException
+    """
+    if engine is None:
+        return VectorizedEngine()
+
+    if engine == registry.AUTO:
+        rows = np.concatenate([holes.rows, boundaries.rows])
+        cols = np.concatenate([holes.columns, boundaries.columns])
+        area = int(np.ptp(rows) + 1) * int(np.ptp(cols) + 1)
+        choice = registry.select_engine(
+            len(holes), len(boundaries), area, param_z=param_z, param_e=param_e
+        )
+        print(f"Engine: {choice.name} (auto: {choice.reason})")
+        engine = choice.name
+    elif isinstance(engine, str):
+        print(f"Engine: {engine}")
+
+    fill_engine = registry.create_engine(engine) if isinstance(engine, str) else engine
+    if fill_engine.image_based:
+        raise HoleFillingException(
+            f"{type(fill_engine).__name__} needs the image in memory"
+        )
+    return fill_engine
+
+
+def fill_frame(
+    frame: "np.ndarray",
+    mask: "np.ndarray",
+    param_z: int,
+    param_e: float,
+    connectivity: int,
+    engine: Union[str, "AbstractFillEngine", None] = None,
+    precision: str = DEFAULT_PRECISION,
+) -> "np.ndarray":
+    """
+    Fill the holes of an image in memory. Only the window around the holes
+    is processed. Nothing is printed or written to disk.
+
+    Args:
+        frame (np.ndarray): Grayscale or color image of any bit depth
+        mask (np.ndarray): Mask of the same shape, in [0..1] or 8 bit
+        param_z (int): The z value for the default weighting mechanism
+        param_e (float): The e value for the default weighting mechanism
+        connectivity (int): Pixel connectivity, 4 or 8
+        engine (str | AbstractFillEngine): Optional. Engine used to compute
+            the colors, or the name of a registered engine. Defaults to a
+            VectorizedEngine
+        precision (str): Type the pixels are filled in, "float32" or
+            "float64". Defaults to "float32"
+
+    Returns:
+        A filled copy of the frame
+
+    Raises:
+        HoleFillingException
+    """
+    pixel_connectivity = get_connectivity(connectivity)
+    if isinstance(engine, str):
+        engine = registry.create_engine(engine)
+    fill_engine = engine or VectorizedEngine()
+
+    if frame.shape[:2] != mask.shape:
+        raise HoleFillingException(
+            "Resolution mismatch. Image and Mask should be of same resolution."
+        )
+    window = find_hole_window(find_mask_holes(mask), fill_engine.margin)
+    image = ImagePreProcessor(to_unit(frame[window], precision), mask[window]).run()
+
+    holes, boundaries = find_holes_and_boundaries(image, pixel_connectivity)
+    fill_engine.fill_channels(
+        image,
+        DefaultWeightMechanism(param_z, param_e),
+        pixel_connectivity,
+        holes,
+        boundaries,
+    )
+
+    # Only the holes changed
+    filled = frame.copy()
+    filled[window][holes.rows, holes.columns] = from_unit(
+        image[holes.rows, holes.columns], frame.dtype
+    )
+    return filled
+
+
+def fill_array(
+    image_path: str,
+    mask_path: str,
+    param_z: int,
+    param_e: float,
+    connectivity: int,
+    output_path: Optional[str] = None,
+    engine: Union[str, "AbstractFillEngine", None] = None,
+    shape: Optional[tuple[int, int]] = None,
+    dtype: "np.typing.DTypeLike" = np.uint8,
+    profiler: Optional[Profiler] = None,
+) -> tuple["PixelSet", "PixelSet"]:
+    """
+    Fill the holes of an image stored as an array file, out of core. Only
+    the boundary pixels are read from the image and only the hole pixels are
+    written to the output.
+
+    Args:
+        image_path (str): Location of a .npy or raw image file
+        mask_path (str): Location of a .npy, raw (8 bit) or image mask file
+        param_z (int): The z value for the default weighting mechanism
+        param_e (float): The e value for the default weighting mechanism
+        connectivity (int): Pixel connectivity, 4 or 8
+        output_path (str): Optional. Location of the output array. It starts
+            as a full copy of the image file, so only filling in place keeps
+            the pages away from the holes untouched. Defaults to filling the
+            image file in place
+        engine (str | AbstractFillEngine): Optional. Engine used to compute
+            the colors, or the name of a registered engine, or "auto".
+            Image based engines are not supported. Defaults to a
+            VectorizedEngine
+        shape (tuple[int, int]): Rows and columns of the raw files
+        dtype (np.dtype): Type of the pixels of a raw image. Defaults to
+            uint8
+        profiler (Profiler): Optional. Records the copy, detect, fill and
+            save stages
+
+    Returns:
+        A tuple of PixelSet, the filled holes and their boundaries
+
+    Raises:
+        HoleFillingException
+    """
+    pixel_connectivity = get_connectivity(connectivity)
+    profiler = profiler or NULL_PROFILER
+
+    target = output_path or image_path
+    in_place = os.path.abspath(target) == os.path.abspath(image_path)
+    image = array_io.open_array(image_path, "r+" if in_place else "r", shape, dtype)
+    mask = array_io.open_mask(mask_path, image.shape)
+
+    output = image
+    if not in_place:
+        with profiler.stage("copy", image.size):
+            array_io.copy_file(image_path, target)
+        output = array_io.open_array(target, "r+", shape, dtype)
+
+    with profiler.stage("detect", image.size) as counters:
+        holes, boundaries = array_io.scan_holes(mask, image, pixel_connectivity)
+        counters["holes"] = len(holes)
+        counters["boundaries"] = len(boundaries)
+
+    colors = np.empty(0)
+    if holes:
+        fill_engine = _resolve_array_engine(engine, holes, boundaries, param_z, param_e)
+        weighting = DefaultWeightMechanism(param_z, param_e)
+        with profiler.stage("fill", len(holes)):
+            colors = fill_engine.compute(
+                weighting, holes.coords, boundaries.coords, boundaries.values
+            )
+
+    with profiler.stage("save", len(holes)):
+        output[holes.rows, holes.columns] = from_unit(colors, output.dtype)
+        output.flush()
+
+    print(f"Filled output array written to: {target}")
+    return holes, boundaries
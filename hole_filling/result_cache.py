@@ -0,0 +1,208 @@
+"""
+module: result_cache
+
+An on disk cache of filled images, for jobs that are submitted again with the
+same inputs.
+
+Results are content addressed: the key is a SHA-256 of the decoded image and
+mask pixels and of every parameter that changes the output. Renaming or
+re-encoding the files doesn't change the key, changing a single pixel does.
+
+Every result is a PNG file named after its key. Results are written to a
+temporary file first and renamed into place, so a reader never sees a
+partial file, even with several processes sharing the directory. The last
+access time of a result is its modification time, updated on every hit. When
+the results grow above the size budget, the least recently used are evicted.
+"""
+
+# Builtin imports
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any
+
+# Project specific imports
+import numpy as np
+
+# Local imports
+from .hole_filing_lib.models import CacheStats
+
+# Default size budget of the cached results: 1 GiB
+DEFAULT_RESULT_CACHE_SIZE = 1024 * 1024 * 1024
+
+RESULT_EXTENSION = ".png"
+
+# -----------------------------------------------------------------------------#
+# Functions
+# -----------------------------------------------------------------------------#
+
+
+def result_key(image: np.ndarray, mask: np.ndarray, params: dict[str, Any]) -> str:
+    """
+    Hash the pixels of the image and the mask and the parameters of a fill.
+
+    Args:
+        image (np.ndarray): Decoded image
+        mask (np.ndarray): Decoded mask
+        params (dict): Parameters of the fill. Values must be JSON
+            serializable
+
+    Returns:
+        Hexadecimal digest
+    """
+    digest = hashlib.sha256()
+    for array in (image, mask):
+        digest.update(f"{array.shape}{array.dtype.str}".encode())
+        digest.update(np.ascontiguousarray(array).data)
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+# -----------------------------------------------------------------------------#
+# Classes
+# -----------------------------------------------------------------------------#
+
+
+class ResultCache:
+    """
+    LRU cache of filled images in a directory, bounded by size.
+
+    Args:
+        directory (str): Location of the cached results. Created if missing
+        max_bytes (int): Size budget of the cached results. Defaults to 1 GiB
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_RESULT_CACHE_SIZE):
+        self.__directory = directory
+        self.__max_bytes = max_bytes
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    # -------------------------------------------------------------------------#
+    # Properties
+    # -------------------------------------------------------------------------#
+    @property
+    def directory(self) -> str:
+        """
+        Return the location of the cached results
+        """
+        return self.__directory
+
+    @property
+    def max_bytes(self) -> int:
+        """
+        Return the size budget in bytes
+        """
+        return self.__max_bytes
+
+    # -------------------------------------------------------------------------#
+    # Methods
+    # -------------------------------------------------------------------------#
+    def path(self, key: str) -> str:
+        """
+        Return the location of the result of this key
+        """
+        return os.path.join(self.__directory, key + RESULT_EXTENSION)
+
+    def get(self, key: str, output_path: str) -> bool:
+        """
+        Copy the cached result of this key to the output path.
+
+        Args:
+            key (str): Key returned by result_key
+            output_path (str): Location the result is copied to
+
+        Returns:
+            True on a hit, False if the result isn't cached
+        """
+        path = self.path(key)
+        try:
+            shutil.copyfile(path, output_path)
+            os.utime(path)
+        except FileNotFoundError:
+            self.__misses += 1
+            return False
+
+        self.__hits += 1
+        return True
+
+    def put(self, key: str, result_path: str) -> None:
+        """
+        Cache a copy of a result, then evict the least recently used results
+        above the size budget.
+
+        Args:
+            key (str): Key returned by result_key
+            result_path (str): Location of the filled image
+        """
+        handle, temporary = tempfile.mkstemp(dir=self.__directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as target, open(result_path, "rb") as source:
+                shutil.copyfileobj(source, target)
+            os.replace(temporary, self.path(key))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+        self.__evict()
+
+    def clear(self) -> None:
+        """
+        Remove every cached result
+        """
+        for path, _, _ in self.__entries():
+            os.unlink(path)
+
+    def stats(self) -> CacheStats:
+        """
+        Return the counters of this instance and the content of the
+        directory.
+        """
+        entries = self.__entries()
+        return CacheStats(
+            self.__hits,
+            self.__misses,
+            self.__evictions,
+            len(entries),
+            sum(size for _, size, _ in entries),
+        )
+
+    # -------------------------------------------------------------------------#
+    # Methods: Privates
+    # -------------------------------------------------------------------------#
+    def __entries(self) -> list[tuple[str, int, float]]:
+        """
+        Return the path, size and last access time of the cached results.
+        """
+        entries = []
+        with os.scandir(self.__directory) as scan:
+            for entry in scan:
+                if not entry.name.endswith(RESULT_EXTENSION):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def __evict(self) -> None:
+        """
+        Remove the least recently used results until the cache fits in its
+        budget.
+        """
+        entries = sorted(self.__entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.__max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.__evictions += 1
@@ -0,0 +1,475 @@
+"""
+module: server
+
+A long running local fill service, so that the cost of starting Python and
+importing cv2 is paid once instead of once per image.
+
+The service speaks a minimal HTTP/1.1 over asyncio, one request per
+connection:
+
+    POST /fill      JSON body {"image": base64, "mask": base64, "z": 3,
+                    "e": 0.01, "connectivity": 8, "engine": null}. The image
+                    and the mask are encoded files (PNG, JPEG, ...). Returns
+                    the filled image as a PNG
+    GET  /stats     Queue depth, counters and latency percentiles, as JSON
+
+Requests wait in a bounded queue. When it is full the request is rejected
+right away with 503 and a Retry-After header, instead of piling up. A
+dispatcher hands the queued requests to a pool of worker processes. Requests
+with the same parameters are sent to a worker together, up to max_batch at a
+time. Before dispatching a batch that isn't full, the dispatcher waits
+batch_window seconds for more of them. A batch costs one round trip to the
+pool instead of one per request.
+"""
+
+# Builtin imports
+import asyncio
+import base64
+import binascii
+import json
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Optional, Union
+
+# Project specific imports
+import numpy as np
+
+# Local imports
+from .exceptions import HoleFillingException
+from .pipeline import fill_frame, get_connectivity
+
+from .hole_filing_lib import registry
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Largest accepted request body: 256 MiB
+MAX_BODY_SIZE = 256 * 1024 * 1024
+
+# Number of most recent latencies the percentiles are computed from
+LATENCY_WINDOW = 1024
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+# -----------------------------------------------------------------------------#
+# Worker
+# -----------------------------------------------------------------------------#
+
+
+def fill_payloads(
+    param_z: int,
+    param_e: float,
+    connectivity: int,
+    engine: Optional[str],
+    payloads: list[tuple[bytes, bytes]],
+) -> list[tuple[int, Union[bytes, str]]]:
+    """
+    Fill a batch of encoded images that share their parameters. Runs in a
+    worker process.
+
+    Args:
+        param_z (int): The z value for the default weighting mechanism
+        param_e (float): The e value for the default weighting mechanism
+        connectivity (int): Pixel connectivity, 4 or 8
+        engine (str): Optional. Name of a registered engine
+        payloads (list[tuple[bytes, bytes]]): Encoded image and mask of each
+            request
+
+    Returns:
+        For each request, an HTTP status and either the filled image as a PNG
+        or the error. Invalid payloads are a 400, unexpected failures a 500
+    """
+    import cv2
+
+    results: list[tuple[int, Union[bytes, str]]] = []
+    for image_data, mask_data in payloads:
+        try:
+            frame = cv2.imdecode(
+                np.frombuffer(image_data, np.uint8), cv2.IMREAD_GRAYSCALE
+            )
+            mask = cv2.imdecode(
+                np.frombuffer(mask_data, np.uint8), cv2.IMREAD_GRAYSCALE
+            )
+            if frame is None or mask is None:
+                raise HoleFillingException(
+                    "UnsupportedImage: the payload isn't an image"
+                )
+
+            filled = fill_frame(frame, mask, param_z, param_e, connectivity, engine)
+            _, encoded = cv2.imencode(".png", filled)
+            results.append((200, encoded.tobytes()))
+        except HoleFillingException as error:
+            results.append((400, str(error)))
+        except Exception as error:
+            results.append((500, f"{type(error).__name__}: {error}"))
+    return results
+
+
+# -----------------------------------------------------------------------------#
+# Dataclasses
+# -----------------------------------------------------------------------------#
+
+
+@dataclass
+class _Job:
+    """
+    A queued fill request. key groups the requests that can share a batch.
+    """
+
+    key: tuple[int, float, int, Optional[str]]
+    image: bytes
+    mask: bytes
+    future: "asyncio.Future[tuple[int, Union[bytes, str]]]"
+
+
+# -----------------------------------------------------------------------------#
+# Class
+# -----------------------------------------------------------------------------#
+
+
+class FillServer:
+    """
+    Asyncio HTTP fill service.
+
+    Args:
+        host (str): Address to listen on. Defaults to 127.0.0.1
+        port (int): Port to listen on, 0 picks a free one. Defaults to 8765
+        workers (int): Number of worker processes. Defaults to 1
+        queue_size (int): Number of requests that can wait for a worker
+            before new ones are rejected. Defaults to 64
+        max_batch (int): Largest number of requests filled together.
+            Defaults to 8
+        batch_window (float): Seconds a batch that isn't full waits for
+            more requests. Defaults to 0.005
+        executor (Executor): Optional. Pool the fills run on. Defaults to a
+            ProcessPoolExecutor of workers processes, shut down with the
+            server
+    """
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        workers: int = 1,
+        queue_size: int = 64,
+        max_batch: int = 8,
+        batch_window: float = 0.005,
+        executor: Optional[Executor] = None,
+    ):
+        self.__host = host
+        self.__port = port
+        self.__workers = max(1, workers)
+        self.__queue_size = queue_size
+        self.__max_batch = max(1, max_batch)
+        self.__batch_window = batch_window
+        self.__executor = executor
+        self.__owns_executor = executor is None
+
+        self.__pending: deque[_Job] = deque()
+        self.__server: Optional[asyncio.Server] = None
+        self.__dispatcher: Optional[asyncio.Task] = None
+        self.__wakeup = asyncio.Event()
+        self.__slots = asyncio.Semaphore(self.__workers)
+
+        # Counters
+        self.__latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.__completed = 0
+        self.__failed = 0
+        self.__rejected = 0
+        self.__batches = 0
+        self.__batched = 0
+        self.__busy = 0
+
+    # -------------------------------------------------------------------------#
+    # Properties
+    # -------------------------------------------------------------------------#
+    @property
+    def port(self) -> int:
+        """
+        Return the port the server listens on
+        """
+        if self.__server is not None and self.__server.sockets:
+            return self.__server.sockets[0].getsockname()[1]
+        return self.__port
+
+    @property
+    def url(self) -> str:
+        """
+        Return the base URL of the service
+        """
+        return f"http://{self.__host}:{self.port}"
+
+    # -------------------------------------------------------------------------#
+    # Methods
+    # -------------------------------------------------------------------------#
+    async def start(self) -> None:
+        """
+        Start the worker pool, the dispatcher and the listening socket
+        """
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(self.__workers)
+        self.__dispatcher = asyncio.create_task(self.__dispatch())
+        self.__server = await asyncio.start_server(
+            self.__handle, self.__host, self.__port
+        )
+
+    async def stop(self) -> None:
+        """
+        Stop listening, fail the queued requests and shut the pool down
+        """
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+        if self.__dispatcher is not None:
+            self.__dispatcher.cancel()
+        while self.__pending:
+            job = self.__pending.popleft()
+            if not job.future.done():
+                job.future.set_result((503, "The server is shutting down"))
+        if self.__owns_executor and self.__executor is not None:
+            self.__executor.shutdown(cancel_futures=True)
+
+    async def serve_forever(self) -> None:
+        """
+        Start the service and run until cancelled
+        """
+        await self.start()
+        try:
+            print(f"Serving on {self.url}")
+            await asyncio.Event().wait()
+        finally:
+            await self.stop()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return the state of the queue, the counters and the latency
+        percentiles, in milliseconds, of the most recent requests
+        """
+        latencies = sorted(self.__latencies)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not latencies:
+                return None
+            index = min(len(latencies) - 1, int(fraction * len(latencies)))
+            return round(latencies[index] * 1000, 3)
+
+        return {
+            "queue_depth": len(self.__pending),
+            "queue_size": self.__queue_size,
+            "busy_workers": self.__busy,
+            "workers": self.__workers,
+            "completed": self.__completed,
+            "failed": self.__failed,
+            "rejected": self.__rejected,
+            "batches": self.__batches,
+            "mean_batch_size": (
+                self.__batched / self.__batches if self.__batches else 0.0
+            ),
+            "latency_ms": {
+                "p50": percentile(0.5),
+                "p90": percentile(0.9),
+                "p99": percentile(0.99),
+            },
+        }
+
+    # -------------------------------------------------------------------------#
+    # Methods: Privates
+    # -------------------------------------------------------------------------#
+    async def __handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """
+        Serve a single HTTP request of a connection.
+        """
+        headers: dict[str, str] = {}
+        try:
+            try:
+                request_line = (await reader.readline()).decode("latin-1")
+                method, target, _ = request_line.split(" ", 2)
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+            except ValueError:
+                await self.__respond(writer, 400, {"error": "Malformed request"})
+                return
+
+            if length > MAX_BODY_SIZE:
+                await self.__respond(writer, 413, {"error": "Request too large"})
+                return
+            body = await reader.readexactly(length)
+
+            path = target.split("?", 1)[0]
+            if path == "/stats":
+                if method != "GET":
+                    await self.__respond(writer, 405, {"error": "Use GET"})
+                    return
+                await self.__respond(writer, 200, self.stats())
+            elif path == "/fill":
+                if method != "POST":
+                    await self.__respond(writer, 405, {"error": "Use POST"})
+                    return
+                await self.__fill(writer, body)
+            else:
+                await self.__respond(writer, 404, {"error": f"Unknown path: {path}"})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def __fill(self, writer: asyncio.StreamWriter, body: bytes) -> None:
+        """
+        Queue a fill request and respond with its result.
+        """
+        start = time.perf_counter()
+        try:
+            request = json.loads(body)
+            image = base64.b64decode(request["image"], validate=True)
+            mask = base64.b64decode(request["mask"], validate=True)
+            connectivity = int(request.get("connectivity", 8))
+            get_connectivity(connectivity)
+            engine = request.get("engine")
+            if engine is not None:
+                registry.get_engine_spec(engine)
+            key = (
+                int(request.get("z", 3)),
+                float(request.get("e", 0.01)),
+                connectivity,
+                engine,
+            )
+        except (ValueError, KeyError, TypeError, binascii.Error) as error:
+            await self.__respond(writer, 400, {"error": f"Invalid request: {error}"})
+            return
+        except HoleFillingException as error:
+            await self.__respond(writer, 400, {"error": str(error)})
+            return
+
+        if len(self.__pending) >= self.__queue_size:
+            self.__rejected += 1
+            await self.__respond(
+                writer, 503, {"error": "The queue is full"}, {"Retry-After": "1"}
+            )
+            return
+
+        job = _Job(key, image, mask, asyncio.get_running_loop().create_future())
+        self.__pending.append(job)
+        self.__wakeup.set()
+        status, result = await job.future
+
+        self.__latencies.append(time.perf_counter() - start)
+        if isinstance(result, bytes):
+            self.__completed += 1
+            await self.__respond(writer, status, result, content_type="image/png")
+        else:
+            self.__failed += 1
+            await self.__respond(writer, status, {"error": result})
+
+    async def __dispatch(self) -> None:
+        """
+        Hand the queued requests to the workers, in batches of requests that
+        share their parameters.
+        """
+        while True:
+            await self.__slots.acquire()
+            while not self.__pending:
+                self.__wakeup.clear()
+                await self.__wakeup.wait()
+
+            if len(self.__pending) < self.__max_batch and self.__batch_window > 0:
+                await asyncio.sleep(self.__batch_window)
+
+            first = self.__pending.popleft()
+            batch = [first]
+            remaining: deque[_Job] = deque()
+            for job in self.__pending:
+                if job.key == first.key and len(batch) < self.__max_batch:
+                    batch.append(job)
+                else:
+                    remaining.append(job)
+            self.__pending = remaining
+
+            asyncio.create_task(self.__run(batch))
+
+    async def __run(self, batch: list[_Job]) -> None:
+        """
+        Fill a batch on the pool and resolve the requests.
+        """
+        self.__busy += 1
+        self.__batches += 1
+        self.__batched += len(batch)
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.__executor,
+                fill_payloads,
+                *batch[0].key,
+                [(job.image, job.mask) for job in batch],
+            )
+        except Exception as error:
+            results = [(500, f"{type(error).__name__}: {error}")] * len(batch)
+        finally:
+            self.__busy -= 1
+            self.__slots.release()
+
+        for job, result in zip(batch, results):
+            if not job.future.done():
+                job.future.set_result(result)
+
+    async def __respond(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        content: Union[bytes, dict[str, Any]],
+        headers: Optional[dict[str, str]] = None,
+        content_type: str = "application/json",
+    ) -> None:
+        """
+        Write an HTTP response and close the connection.
+        """
+        if isinstance(content, dict):
+            content = json.dumps(content).encode()
+
+        lines = [
+            f"HTTP/1.1 {status} {_REASONS[status]}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(content)}",
+            "Connection: close",
+        ]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + content)
+        await writer.drain()
+
+
+# -----------------------------------------------------------------------------#
+# Functions
+# -----------------------------------------------------------------------------#
+
+
+def serve(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    workers: int = 1,
+    queue_size: int = 64,
+    max_batch: int = 8,
+    batch_window: float = 0.005,
+) -> None:
+    """
+    Run a FillServer until interrupted. See FillServer for the arguments.
+    """
+    server = FillServer(host, port, workers, queue_size, max_batch, batch_window)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
@@ -1,9 +1,10 @@
 """
 module: flood_fill
 
-A simple flood fill algorithm iterates through each pixel and, when a hole is
-detected, calculates the mean value of its neighboring non-hole pixels and
-assigns this mean as the new value for the hole.
+A simple flood fill algorithm fills the hole layer by layer, from the outside
+in: every hole pixel next to a non-hole pixel gets the mean value of its
+neighboring non-hole pixels, then the next layer is filled, until the hole is
+gone. The fill itself is FloodFillEngine of the library.
 
 Usage: python q2_flood_fill.py <image_path> <mask_path>
 
@@ -23,7 +24,6 @@ options:
 import argparse
 from datetime import datetime
 import os
-import statistics
 from typing import TYPE_CHECKING
 
 # Project specific imports
@@ -31,12 +31,13 @@ import cv2
 
 # Local imports
 from hole_filling.image_preprocessor import ImagePreProcessor
+from hole_filling.hole_filing_lib.detection import find_holes_and_boundaries
+from hole_filling.hole_filing_lib.inpainting import FloodFillEngine
+from hole_filling.hole_filing_lib.models import Connectivity
 
 if TYPE_CHECKING:
     import numpy as np
 
-HOLE_VALUE = -1
-
 
 # -----------------------------------------------------------------------------#
 # Flood Fill
@@ -54,31 +55,11 @@ def flood_fill(img: "np.ndarray", connectivity: int = 4) -> "np.ndarray":
     Returns:
         An array with the region filled
     """
-    # Get the resolution of the image
-    rows, cols = img.shape
-
-    neighbours = [(-1, 0), (1, 0), (0, 1), (0, -1)]
-    if connectivity == 8:
-        neighbours.extend([(-1, -1), (-1, 1), (1, 1), (1, -1)])
-
-    for row_index, row in enumerate(img):
-        for col_index, value in enumerate(row):
-            if value == HOLE_VALUE:  # Found a hole
-                # check the neighbours
-                boundaries = []
-                for dr, dc in neighbours:
-                    nr, nc = row_index + dr, col_index + dc
-
-                    # check if its a valid pixel
-                    if nr < 0 or nr >= rows:
-                        continue
-                    if nc < 0 or nc >= cols:
-                        continue
-
-                    if img[nr][nc] != HOLE_VALUE:  # Found a boundary
-                        boundaries.append(img[nr][nc])
-
-                img[row_index][col_index] = statistics.mean(boundaries)
+    pixel_connectivity = Connectivity.EIGHT if connectivity == 8 else Connectivity.FOUR
+    holes, boundaries = find_holes_and_boundaries(img, pixel_connectivity)
+
+    # The flood fill doesn't use a weighting mechanism
+    FloodFillEngine().fill_region(img, None, pixel_connectivity, holes, boundaries)
 
     return img
 
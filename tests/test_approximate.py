@@ -0,0 +1,58 @@
+"""
+Test the approximate module
+"""
+
+# Project specific imports
+import numpy as np
+import pytest
+
+# Package specific imports
+from hole_filling.exceptions import HoleFillingException
+from hole_filling.hole_filing_lib.approximate import QuadTreeEngine
+from hole_filling.hole_filing_lib.detection import find_holes_and_boundaries
+from hole_filling.hole_filing_lib.engines import VectorizedEngine
+from hole_filling.hole_filing_lib.models import Connectivity
+from hole_filling.hole_filing_lib.weighting import (
+    AbstractWeightingMechanism,
+    DefaultWeightMechanism,
+)
+
+
+@pytest.fixture(scope="session")
+def weighting():
+    return DefaultWeightMechanism(3, 0.01)
+
+
+@pytest.fixture(scope="module")
+def region():
+    rng = np.random.default_rng(11)
+    image = rng.random((80, 90))
+    image[10:60, 15:70] = -1
+    holes, boundaries = find_holes_and_boundaries(image, Connectivity.EIGHT)
+    return holes.coords, boundaries.coords, boundaries.values
+
+
+def test_quadtree_theta_zero_is_exact(weighting, region):
+    expected = VectorizedEngine().compute(weighting, *region)
+    colors = QuadTreeEngine(theta=0, leaf_size=4).compute(weighting, *region)
+
+    assert colors == pytest.approx(expected, rel=1e-12)
+
+
+def test_quadtree_error_bound(weighting, region):
+    expected = VectorizedEngine().compute(weighting, *region)
+    engine = QuadTreeEngine(theta=0.5, leaf_size=8)
+    colors = engine.compute(weighting, *region)
+
+    error = np.abs(colors - expected).max()
+    assert 0 < error < 0.05
+    assert error <= engine.max_error
+
+
+def test_quadtree_requires_default_weighting(region):
+    class ConstantWeighting(AbstractWeightingMechanism):
+        def get_weight(self, hole, boundary):
+            return 1.0
+
+    with pytest.raises(HoleFillingException):
+        QuadTreeEngine().compute(ConstantWeighting(), *region)
@@ -0,0 +1,94 @@
+"""
+Test the array_io module and the out of core fill
+"""
+
+# Project specific imports
+import numpy as np
+import pytest
+
+# Package specific imports
+from hole_filling import array_io
+from hole_filling.exceptions import HoleFillingException
+from hole_filling.pipeline import fill_array
+from hole_filling.hole_filing_lib.detection import find_holes_and_boundaries
+from hole_filling.hole_filing_lib.engines import VectorizedEngine
+from hole_filling.hole_filing_lib.models import Connectivity
+from hole_filling.hole_filing_lib.weighting import DefaultWeightMechanism
+
+
+def make_pair():
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (40, 30)).astype(np.uint8)
+    mask = np.full((40, 30), 255, dtype=np.uint8)
+    mask[10:22, 5:9] = 0
+    mask[30:33, 20:28] = 0
+    return image, mask
+
+
+def expected_fill(image, mask, connectivity):
+    unit = image / 255.0
+    unit[mask < 128] = -1
+    holes, boundaries = find_holes_and_boundaries(unit, connectivity)
+    VectorizedEngine().fill_region(
+        unit, DefaultWeightMechanism(3, 0.01), connectivity, holes, boundaries
+    )
+    return np.rint(unit * 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize("connectivity", [Connectivity.FOUR, Connectivity.EIGHT])
+def test_scan_holes_strips(connectivity):
+    image, mask = make_pair()
+    unit = image / 255.0
+    unit[mask < 128] = -1
+    holes, boundaries = find_holes_and_boundaries(unit, connectivity)
+
+    # Strips of 3 rows split both holes and their boundaries
+    scanned_holes, scanned_boundaries = array_io.scan_holes(mask, image, connectivity, 3)
+
+    assert scanned_holes == holes
+    assert scanned_boundaries == boundaries
+    assert np.allclose(scanned_boundaries.values, boundaries.values)
+
+
+def test_fill_array_npy(tmp_path):
+    image, mask = make_pair()
+    np.save(tmp_path / "image.npy", image)
+    np.save(tmp_path / "mask.npy", mask)
+
+    holes, _ = fill_array(
+        str(tmp_path / "image.npy"), str(tmp_path / "mask.npy"), 3, 0.01, 8,
+        output_path=str(tmp_path / "out.npy"),
+    )
+
+    assert len(holes) == 12 * 4 + 3 * 8
+    assert (np.load(tmp_path / "image.npy") == image).all()
+    assert (np.load(tmp_path / "out.npy") == expected_fill(image, mask, Connectivity.EIGHT)).all()
+
+
+def test_fill_array_raw_in_place(tmp_path):
+    image, mask = make_pair()
+    image = image.astype(np.uint16) * 257
+    image.tofile(tmp_path / "image.raw")
+    mask.tofile(tmp_path / "mask.raw")
+
+    fill_array(
+        str(tmp_path / "image.raw"), str(tmp_path / "mask.raw"), 3, 0.01, 4,
+        engine="fft", shape=(40, 30), dtype=np.uint16,
+    )
+
+    filled = np.fromfile(tmp_path / "image.raw", dtype=np.uint16).reshape(40, 30)
+    assert (filled[mask >= 128] == image[mask >= 128]).all()
+    expected = expected_fill(image // 257, mask, Connectivity.FOUR)
+    assert np.abs(filled / 257.0 - expected).max() <= 0.5
+
+
+def test_fill_array_errors(tmp_path):
+    image, mask = make_pair()
+    image.tofile(tmp_path / "image.raw")
+    mask.tofile(tmp_path / "mask.raw")
+    paths = str(tmp_path / "image.raw"), str(tmp_path / "mask.raw")
+
+    with pytest.raises(HoleFillingException):
+        fill_array(*paths, 3, 0.01, 8, shape=(40, 31))
+    with pytest.raises(HoleFillingException):
+        fill_array(*paths, 3, 0.01, 8, shape=(40, 30), engine="flood")
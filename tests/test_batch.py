@@ -0,0 +1,76 @@
+"""
+Test the batch module
+"""
+
+# Builtin imports
+import json
+import os
+
+# Project specific imports
+import cv2
+import numpy as np
+
+# Package specific imports
+from hole_filling import batch
+
+
+def write_pair(directory, name):
+    image = np.full((10, 12), 200, dtype=np.uint8)
+    mask = np.full((10, 12), 255, dtype=np.uint8)
+    mask[3:6, 4:8] = 0
+    cv2.imwrite(os.path.join(directory, "images", name), image)
+    cv2.imwrite(os.path.join(directory, "masks", name), mask)
+
+
+def test_read_manifest(tmp_path):
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text("image,mask,z,connectivity\na.png,m.png,2,4\nb.png,m.png,,\n")
+
+    items = batch.read_manifest(str(manifest), 3, 0.01, 8)
+
+    assert [(i.z, i.e, i.connectivity) for i in items] == [(2, 0.01, 4), (3, 0.01, 8)]
+    assert items[0].output == str(tmp_path / "Filled_a.png")
+
+
+def test_read_manifest_keeps_zero(tmp_path):
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text('{"image": "a.png", "mask": "m.png", "z": 0, "e": 0}\n')
+
+    items = batch.read_manifest(str(manifest), 3, 0.01, 8)
+
+    assert (items[0].z, items[0].e) == (0, 0.0)
+
+
+def test_run_batch(tmp_path):
+    os.makedirs(tmp_path / "images")
+    os.makedirs(tmp_path / "masks")
+    write_pair(tmp_path, "a.png")
+    write_pair(tmp_path, "b.png")
+    (tmp_path / "images" / "c.png").write_bytes(b"not an image")
+    (tmp_path / "masks" / "c.png").write_bytes(b"not an image")
+    write_pair(tmp_path, "d.png")
+    os.remove(tmp_path / "masks" / "d.png")
+
+    items = batch.scan_directories(
+        str(tmp_path / "images"), str(tmp_path / "masks"), 3, 0.01, 8,
+        str(tmp_path / "out"),
+    )
+    log = tmp_path / "log.jsonl"
+    results = batch.run_batch(items, workers=2, log_path=str(log))
+
+    assert [r.status for r in results] == ["ok", "ok", "failed", "skipped"]
+    assert "HoleFillingException" in results[2].error
+    assert results[3].error and results[3].mask is None
+    filled = cv2.imread(str(tmp_path / "out" / "Filled_a.png"), cv2.IMREAD_GRAYSCALE)
+    assert (filled == 200).all()
+
+    # No partial output is left behind by the failed item
+    assert sorted(os.listdir(tmp_path / "out")) == ["Filled_a.png", "Filled_b.png"]
+
+    # Resume: the filled items are skipped, the failed one is retried
+    results = batch.run_batch(items, workers=2, log_path=str(log))
+    assert [r.status for r in results] == ["skipped", "skipped", "failed", "skipped"]
+    assert any(line.startswith("Skipped: ") for line in batch.summarize(results))
+
+    lines = [json.loads(line) for line in log.read_text().splitlines()]
+    assert len(lines) == 8
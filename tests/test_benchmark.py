@@ -0,0 +1,96 @@
+"""
+Test the benchmark module
+"""
+
+# Builtin imports
+from dataclasses import replace
+
+# Project specific imports
+import pytest
+
+# Package specific imports
+from hole_filling.__main__ import main
+from hole_filling import benchmark
+from hole_filling.benchmark import (
+    WORKLOADS,
+    compare,
+    make_workload,
+    missing_cases,
+    read_results,
+    run_benchmarks,
+    write_results,
+)
+from hole_filling.exceptions import HoleFillingException
+
+
+@pytest.mark.parametrize("workload", WORKLOADS)
+def test_make_workload(workload):
+    image = make_workload(workload, 64)
+
+    holes = image == -1
+    assert image.shape == (64, 64)
+    assert holes.any() and not holes.all()
+    assert ((image >= 0) | holes).all() and (image <= 1).all()
+    assert holes[0, 0] == (workload == "border")
+
+
+def test_make_workload_unknown():
+    with pytest.raises(HoleFillingException):
+        make_workload("star", 64)
+
+
+def test_run_benchmarks_roundtrip(tmp_path):
+    results = list(run_benchmarks(("disc",), (32,),
+                                  ["pixel", "vectorized", "fft", "flood"], repeat=1,
+                                  startup=False))
+
+    assert [result.engine for result in results] == ["pixel", "vectorized", "fft", "flood"]
+    assert all(result.reference == "pixel" for result in results)
+    assert results[0].max_error == 0
+    assert results[1].max_error < 1e-9
+    assert results[2].max_error < 1e-9
+    assert results[3].max_error > 1e-3
+    assert all(result.seconds > 0 and result.peak_bytes > 0 for result in results)
+
+    path = str(tmp_path / "results.json")
+    write_results(path, results)
+    assert read_results(path) == results
+
+
+def test_run_benchmarks_large_case(monkeypatch):
+    monkeypatch.setattr(benchmark, "PIXEL_MAX_PAIRS", 0)
+
+    results = list(run_benchmarks(("disc",), (32,), ["pixel", "vectorized"], repeat=1,
+                                  startup=False))
+
+    # Too large for the pixel by pixel fill: the vectorized fill is the reference
+    assert [result.engine for result in results] == ["vectorized"]
+    assert results[0].reference == "vectorized" and results[0].max_error == 0
+
+
+def test_compare(tmp_path):
+    baseline = list(run_benchmarks(("scratch",), (32,), ["vectorized"], repeat=1,
+                                   startup=False))
+    result = replace(baseline[0], seconds=1.0)
+    slower = replace(result, seconds=1.3, peak_bytes=result.peak_bytes * 2)
+
+    assert compare([result], [replace(result, seconds=1.2)]) == []
+    assert len(compare([result], [slower])) == 2
+    assert compare([result], [replace(result, max_error=0.1)])
+    assert missing_cases([result], [replace(result, size=64)]) == ["scratch 32 vectorized"]
+    assert missing_cases([result], [slower]) == []
+
+    write_results(str(tmp_path / "base.json"), [result])
+    write_results(str(tmp_path / "new.json"), [slower])
+    with pytest.raises(SystemExit) as exit_info:
+        main(["benchmark", "compare", str(tmp_path / "base.json"),
+              str(tmp_path / "new.json")])
+    assert exit_info.value.code == 1
+
+
+def test_startup_results():
+    results = list(run_benchmarks((), (), repeat=1))
+
+    assert [result.engine for result in results] == ["interpreter", "help", "batch_help"]
+    assert all(result.workload == "startup" and result.seconds > 0 for result in results)
+    assert results[1].seconds > results[0].seconds
@@ -0,0 +1,93 @@
+"""
+Test the convolution module
+"""
+
+# Project specific imports
+import numpy as np
+import pytest
+
+# Package specific imports
+from hole_filling.exceptions import HoleFillingException
+from hole_filling.hole_filing_lib.convolution import FFTEngine, _fast_length, fft_error
+from hole_filling.hole_filing_lib.detection import find_holes_and_boundaries
+from hole_filling.hole_filing_lib.engines import VectorizedEngine
+from hole_filling.hole_filing_lib.hole_filler import HoleFiller
+from hole_filling.hole_filing_lib.models import Connectivity
+from hole_filling.hole_filing_lib.weighting import (
+    AbstractWeightingMechanism,
+    DefaultWeightMechanism,
+)
+
+
+@pytest.fixture(scope="session")
+def weighting():
+    return DefaultWeightMechanism(3, 0.01)
+
+
+@pytest.fixture
+def image():
+    rng = np.random.default_rng(5)
+    img = rng.random((31, 37))
+    img[6:20, 8:30] = -1
+    img[24:27, 3:5] = -1
+    return img
+
+
+def test_fast_length():
+    assert [_fast_length(n) for n in (1, 7, 11, 97, 128)] == [1, 8, 12, 100, 128]
+
+
+def test_fft_matches_calculate_hole_color(weighting, image, tmp_path):
+    holes, boundaries = find_holes_and_boundaries(image, Connectivity.EIGHT)
+    hf = HoleFiller(image, weighting, connectivity=Connectivity.EIGHT,
+                    output_directory=str(tmp_path))
+    expected = [hf.calculate_hole_color(hole, boundaries) for hole in holes]
+
+    colors = FFTEngine().compute(weighting, holes.coords, boundaries.coords,
+                                 boundaries.values)
+
+    assert colors == pytest.approx(expected, rel=1e-9)
+
+
+def test_fft_hole_filler(weighting, image, tmp_path):
+    expected = image.copy()
+    HoleFiller(expected, weighting, output_directory=str(tmp_path)).fill()
+
+    filled = image.copy()
+    HoleFiller(filled, weighting, output_directory=str(tmp_path),
+               engine=FFTEngine(), workers=2).fill()
+
+    assert filled == pytest.approx(expected, rel=1e-9)
+
+
+def test_fft_rejects_unsupported_inputs(weighting):
+    class ConstantWeighting(AbstractWeightingMechanism):
+        def get_weight(self, hole, boundary):
+            return 1.0
+
+    with pytest.raises(HoleFillingException):
+        FFTEngine().compute(ConstantWeighting(), [[1, 1]], [[0, 0]], [0.5])
+    with pytest.raises(HoleFillingException):
+        FFTEngine().compute(weighting, [[1.5, 1]], [[0, 0]], [0.5])
+
+
+@pytest.mark.parametrize("z, epsilon", [(5, 1e-9), (8, 0.01)])
+def test_fft_falls_back_on_wide_kernels(z, epsilon):
+    img = np.random.default_rng(2).random((120, 120))
+    img[10:110, 10:110] = -1
+    holes, boundaries = find_holes_and_boundaries(img, Connectivity.EIGHT)
+    weighting = DefaultWeightMechanism(z, epsilon)
+
+    colors = FFTEngine().compute(weighting, holes.coords, boundaries.coords,
+                                 boundaries.values)
+    expected = VectorizedEngine().compute(weighting, holes.coords,
+                                          boundaries.coords, boundaries.values)
+
+    assert np.isfinite(colors).all()
+    assert colors == pytest.approx(expected, rel=1e-9)
+
+
+def test_fft_error():
+    assert fft_error(100.0, 1.0, 100) == pytest.approx(1000 * np.finfo(float).eps)
+    assert fft_error(100.0, 0.0, 100) == np.inf
+    assert fft_error(100.0, -1e-12, 100) == np.inf
@@ -0,0 +1,73 @@
+"""
+Test the detection module
+"""
+
+# Project specific imports
+import numpy as np
+
+# Package specific imports
+from hole_filling.hole_filing_lib.detection import (
+    dilate,
+    find_components,
+    find_hole_window,
+    find_holes_and_boundaries,
+)
+from hole_filling.hole_filing_lib.models import Connectivity
+
+
+def test_dilate_four():
+    mask = np.zeros((3, 3), dtype=bool)
+    mask[1, 1] = True
+
+    expected = np.array([[0, 1, 0], [1, 1, 1], [0, 1, 0]], dtype=bool)
+    assert (dilate(mask, Connectivity.FOUR) == expected).all()
+
+
+def test_dilate_eight_corner():
+    mask = np.zeros((3, 3), dtype=bool)
+    mask[0, 0] = True
+
+    expected = np.array([[1, 1, 0], [1, 1, 0], [0, 0, 0]], dtype=bool)
+    assert (dilate(mask, Connectivity.EIGHT) == expected).all()
+
+
+def test_find_holes_and_boundaries():
+    image = np.array([[1, 1, -1, 1, 1],
+                      [0.5, 1, 1, 1, 1],
+                      [1, 1, 1, 1, -1],
+                      [1, -1, 1, 1, 1]])
+
+    holes, boundaries = find_holes_and_boundaries(image, Connectivity.FOUR)
+
+    assert holes.coords.tolist() == [[0, 2], [2, 4], [3, 1]]
+    assert boundaries.coords.tolist() == [[0, 1], [0, 3], [1, 2], [1, 4],
+                                          [2, 1], [2, 3], [3, 0], [3, 2], [3, 4]]
+    assert boundaries.values.tolist() == [1] * 9
+
+
+def test_find_components():
+    image = np.array([[1, 1, 1, 1, 1, 1],
+                      [1, -1, 1, 1, 1, 1],
+                      [1, 1, -1, 1, 1, 1],
+                      [1, 1, 1, 1, 1, -1]])
+
+    components = find_components(image, Connectivity.FOUR)
+
+    assert len(components) == 2
+    holes, boundaries = components[0]
+    assert holes.coords.tolist() == [[1, 1], [2, 2]]
+    assert boundaries.coords.tolist() == [[0, 1], [1, 0], [1, 2], [2, 1],
+                                          [2, 3], [3, 2]]
+    holes, boundaries = components[1]
+    assert holes.coords.tolist() == [[3, 5]]
+    assert boundaries.coords.tolist() == [[2, 5], [3, 4]]
+
+
+def test_find_hole_window():
+    mask = np.zeros((10, 12), dtype=bool)
+    mask[3:5, 0:2] = True
+    mask[6, 7] = True
+
+    assert find_hole_window(mask) == (slice(2, 8), slice(0, 9))
+    assert find_hole_window(mask, 4) == (slice(0, 10), slice(0, 12))
+    assert find_hole_window(np.zeros((3, 3), dtype=bool)) == (slice(0, 0), slice(0, 0))
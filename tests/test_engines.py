@@ -0,0 +1,90 @@
+"""
+Test the engines module
+"""
+
+# Project specific imports
+import numpy as np
+import pytest
+
+# Package specific imports
+from hole_filling.hole_filing_lib.engines import VectorizedEngine
+from hole_filling.hole_filing_lib.hole_filler import HoleFiller
+from hole_filling.hole_filing_lib.weighting import DefaultWeightMechanism
+from hole_filling.hole_filing_lib.models import Connectivity
+
+
+@pytest.fixture(scope="session")
+def weighting():
+    return DefaultWeightMechanism(3, 0.01)
+
+
+@pytest.fixture
+def image():
+    rng = np.random.default_rng(7)
+    img = rng.random((12, 15))
+    img[3:7, 4:9] = -1
+    img[9, 12] = -1
+    return img
+
+
+def test_vectorized_matches_reference(weighting, image):
+    hf = HoleFiller(image.copy(), weighting, connectivity=Connectivity.EIGHT)
+    hf.find_holes_and_boundaries()
+
+    holes = sorted(hf.holes, key=lambda p: (p.row, p.column))
+    boundaries = list(hf.boundaries)
+    expected = [hf.calculate_hole_color(hole) for hole in holes]
+
+    colors = VectorizedEngine().compute(
+        weighting,
+        np.array([(p.row, p.column) for p in holes]),
+        np.array([(p.row, p.column) for p in boundaries]),
+        np.array([p.value for p in boundaries]),
+    )
+
+    assert colors == pytest.approx(expected, rel=1e-12)
+
+
+def test_vectorized_blocks(weighting, image):
+    hf = HoleFiller(image.copy(), weighting)
+    hf.find_holes_and_boundaries()
+
+    holes = np.array([(p.row, p.column) for p in hf.holes])
+    boundaries = list(hf.boundaries)
+    coords = np.array([(p.row, p.column) for p in boundaries])
+    values = np.array([p.value for p in boundaries])
+
+    # A tiny budget forces one hole per block
+    engine = VectorizedEngine(memory_budget=1)
+    assert engine.block_size(len(boundaries)) == 1
+    colors = engine.compute(weighting, holes, coords, values)
+
+    expected = VectorizedEngine().compute(weighting, holes, coords, values)
+    assert colors == pytest.approx(expected, rel=1e-12)
+
+
+def test_fill_with_engine(weighting, image, tmp_path):
+    reference = image.copy()
+    HoleFiller(reference, weighting, output_directory=str(tmp_path)).fill()
+
+    filled = image.copy()
+    HoleFiller(
+        filled, weighting, output_directory=str(tmp_path), engine=VectorizedEngine()
+    ).fill()
+
+    assert filled == pytest.approx(reference, rel=1e-12)
+
+
+def test_vectorized_channels_in_one_pass(weighting):
+    rng = np.random.default_rng(2)
+    holes = rng.integers(0, 30, (40, 2))
+    boundaries = rng.integers(0, 30, (25, 2))
+    values = rng.random((25, 4))
+    engine = VectorizedEngine(memory_budget=4096)
+
+    colors = engine.compute(weighting, holes, boundaries, values)
+
+    assert colors.shape == (40, 4)
+    for channel in range(4):
+        expected = engine.compute(weighting, holes, boundaries, values[:, channel])
+        assert np.allclose(colors[:, channel], expected)
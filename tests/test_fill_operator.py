@@ -0,0 +1,68 @@
+"""
+Test the fill_operator module
+"""
+
+# Project specific imports
+import numpy as np
+import pytest
+
+# Package specific imports
+from hole_filling.exceptions import HoleFillingException
+from hole_filling.hole_filing_lib.engines import VectorizedEngine
+from hole_filling.hole_filing_lib.fill_operator import FillOperator
+from hole_filling.hole_filing_lib.hole_filler import HoleFiller
+from hole_filling.hole_filing_lib.models import Connectivity
+from hole_filling.hole_filing_lib.weighting import DefaultWeightMechanism
+
+
+@pytest.fixture(scope="session")
+def weighting():
+    return DefaultWeightMechanism(3, 0.01)
+
+
+@pytest.fixture
+def hole_mask():
+    mask = np.zeros((30, 40), dtype=bool)
+    mask[5:12, 6:15] = True
+    mask[20:23, 30:32] = True
+    mask[28, 2] = True
+    return mask
+
+
+@pytest.mark.parametrize("per_component", [False, True])
+def test_apply_matches_hole_filler(weighting, hole_mask, tmp_path, per_component):
+    operator = FillOperator(hole_mask, weighting, Connectivity.EIGHT, per_component)
+    rng = np.random.default_rng(4)
+
+    for _ in range(3):
+        frame = rng.random((30, 40))
+        expected = np.where(hole_mask, -1.0, frame)
+        HoleFiller(expected, weighting, Connectivity.EIGHT, str(tmp_path),
+                   engine=VectorizedEngine(), per_component=per_component).fill()
+
+        assert np.allclose(operator.apply(frame), expected)
+
+
+def test_apply_color_and_integers(weighting, hole_mask):
+    operator = FillOperator(hole_mask, weighting)
+    frame = np.random.default_rng(6).integers(0, 65536, (30, 40, 3)).astype(np.uint16)
+
+    filled = operator.apply(frame)
+
+    assert filled.dtype == np.uint16
+    assert (filled[~hole_mask] == frame[~hole_mask]).all()
+    for channel in range(3):
+        gray = operator.apply(frame[:, :, channel].astype(np.float64))
+        assert np.abs(filled[:, :, channel] - gray).max() <= 0.5
+
+
+def test_operator_properties(weighting, hole_mask):
+    operator = FillOperator(hole_mask, weighting, per_component=True)
+
+    assert len(operator.holes) == hole_mask.sum()
+    assert operator.shape == (30, 40)
+    assert operator.nbytes < len(operator.holes) * len(operator.boundaries) * 8
+    with pytest.raises(HoleFillingException):
+        operator.apply(np.zeros((10, 10)))
+    with pytest.raises(HoleFillingException):
+        FillOperator(hole_mask, weighting, max_bytes=1024)
@@ -0,0 +1,57 @@
+"""
+Test the frames module
+"""
+
+# Builtin imports
+import os
+
+# Project specific imports
+import cv2
+import numpy as np
+import pytest
+
+# Package specific imports
+from hole_filling.frames import fill_frames, iter_frames
+from hole_filling.pipeline import fill_image
+
+
+@pytest.fixture()
+def frames(tmp_path):
+    rng = np.random.default_rng(0)
+    source = tmp_path / "frames"
+    source.mkdir()
+    for index in range(4):
+        frame = rng.integers(0, 256, (32, 48, 3)).astype(np.uint8)
+        cv2.imwrite(str(source / f"{index:02d}.png"), frame)
+    mask = np.full((32, 48), 255, dtype=np.uint8)
+    mask[10:14, 20:26] = 0
+    mask[25, 5] = 0
+    cv2.imwrite(str(tmp_path / "mask.png"), mask)
+    return str(source), str(tmp_path / "mask.png")
+
+
+def test_fill_frames_directory(frames, tmp_path):
+    source, mask = frames
+    output = str(tmp_path / "filled")
+
+    stats = fill_frames(source, mask, 3, 0.01, 8, output)
+
+    assert stats.frames == 4
+    assert stats.holes == 4 * 6 + 1
+    for name in sorted(os.listdir(source)):
+        expected = str(tmp_path / "expected.png")
+        fill_image(os.path.join(source, name), mask, 3, 0.01, 8,
+                   output_path=expected, engine="vectorized")
+        filled = cv2.imread(os.path.join(output, name), cv2.IMREAD_UNCHANGED)
+        assert np.abs(filled.astype(int) - cv2.imread(expected, cv2.IMREAD_UNCHANGED)).max() <= 1
+
+
+def test_fill_frames_video(frames, tmp_path):
+    source, mask = frames
+    video = str(tmp_path / "filled.avi")
+
+    stats = fill_frames(source, mask, 3, 0.01, 8, video, fps=10)
+    names = [name for name, _ in iter_frames(video)]
+
+    assert stats.frames == 4
+    assert names == [f"frame_{index:06d}.png" for index in range(4)]
@@ -7,7 +7,9 @@ import numpy as np
 import pytest
 
 # Package specific imports
+from hole_filling.hole_filing_lib.engines import VectorizedEngine
 from hole_filling.hole_filing_lib.hole_filler import HoleFiller
+from hole_filling.hole_filing_lib.inpainting import FMMEngine
 from hole_filling.hole_filing_lib.weighting import DefaultWeightMechanism
 from hole_filling.hole_filing_lib.models import Pixel, Connectivity
 
@@ -129,3 +131,81 @@ def test_find_boundaries_corner_holes_c8(weighting):
                       Pixel(1,3,1), Pixel(2,2,1), Pixel(3,3,1)] )
 
     assert not hf.boundaries - expected
+
+#-----------------------------------------------------------------------------#
+# Fill per component
+#-----------------------------------------------------------------------------#
+def test_fill_per_component(weighting, tmp_path):
+    image = np.array( [[0.2,0.2,0.2,0.8,0.8],
+                       [0.2,-1,0.2,0.8,0.8],
+                       [0.2,0.2,0.2,0.8,-1],
+                       [0.2,0.2,0.2,0.8,0.8]] )
+
+    hf = HoleFiller(image, weighting, output_directory=str(tmp_path), per_component=True)
+    hf.fill()
+
+    assert image[1][1] == pytest.approx(0.2)
+    assert image[2][4] == pytest.approx(0.8)
+    assert [(s.label, s.hole_count, s.boundary_count) for s in hf.component_stats] == \
+        [(1, 1, 4), (2, 1, 3)]
+
+#-----------------------------------------------------------------------------#
+# Parallel fill
+#-----------------------------------------------------------------------------#
+@pytest.mark.parametrize("per_component", [False, True])
+def test_fill_parallel_is_identical(weighting, tmp_path, per_component):
+    rng = np.random.default_rng(3)
+    image = rng.random((40, 50))
+    image[5:15, 5:20] = -1
+    image[25:35, 30:33] = -1
+    image[38, 48] = -1
+
+    # A small budget splits the holes in many blocks
+    engine = VectorizedEngine(memory_budget=4096)
+
+    serial = image.copy()
+    HoleFiller(serial, weighting, output_directory=str(tmp_path),
+               engine=engine, per_component=per_component).fill()
+
+    parallel = image.copy()
+    hf = HoleFiller(parallel, weighting, output_directory=str(tmp_path),
+                    engine=engine, per_component=per_component, workers=3)
+    hf.fill()
+
+    assert np.array_equal(serial, parallel)
+    assert hf.parallel_stats.workers == 3
+    assert hf.parallel_stats.tasks > 3
+    assert len(hf.component_stats) == (3 if per_component else 1)
+
+#-----------------------------------------------------------------------------#
+# Color
+#-----------------------------------------------------------------------------#
+@pytest.mark.parametrize("options", [
+    {}, {"engine": VectorizedEngine()}, {"engine": FMMEngine()},
+    {"per_component": True}, {"pyramid_levels": 2}, {"workers": 2},
+])
+def test_fill_color_matches_channels(weighting, tmp_path, options):
+    rng = np.random.default_rng(5)
+    image = rng.random((20, 24, 3))
+    image[4:9, 5:11] = -1
+    image[15, 18:21] = -1
+
+    color = image.copy()
+    HoleFiller(color, weighting, output_directory=str(tmp_path), **options).fill()
+
+    for channel in range(3):
+        gray = image[:, :, channel].copy()
+        HoleFiller(gray, weighting, output_directory=str(tmp_path), **options).fill()
+        assert np.allclose(color[:, :, channel], gray)
+
+def test_save_output_dtype(weighting, tmp_path):
+    import cv2
+
+    image = np.full((6, 8), 0.5)
+    image[2:4, 3:5] = -1
+    output = str(tmp_path / "filled.png")
+    HoleFiller(image, weighting, output_path=output, output_dtype=np.uint16).fill()
+
+    saved = cv2.imread(output, cv2.IMREAD_UNCHANGED)
+    assert saved.dtype == np.uint16
+    assert (saved == 32768).all()
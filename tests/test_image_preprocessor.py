@@ -4,9 +4,11 @@ Test the image_preprocessor module
 
 # Project specific imports
 import numpy as np
+import pytest
 
 # Package specific imports
-from hole_filling.image_preprocessor import ImagePreProcessor
+from hole_filling.exceptions import HoleFillingException
+from hole_filling.image_preprocessor import ImagePreProcessor, from_unit, to_unit
 
 def test_image_preprocessing():
     image = np.array( [[1,1,1,1,1],
@@ -28,3 +30,81 @@ def test_image_preprocessing():
     res = preprocessor.run()
 
     assert (res==expected).all()
+
+def test_image_preprocessing_uint8_mask():
+    image = np.ones((2, 3))
+    mask = np.array( [[255,128,127],
+                      [0,200,255]], dtype=np.uint8 )
+
+    expected = np.array( [[1,1,-1],
+                          [-1,1,1]] )
+
+    preprocessor = ImagePreProcessor(image=image, mask=mask)
+    res = preprocessor.run()
+
+    assert res is image
+    assert (res==expected).all()
+
+def test_image_preprocessing_int64_mask():
+    image = np.ones((2, 3))
+    mask = np.array( [[1,1,0],
+                      [0,1,1]], dtype=np.int64 )
+
+    expected = np.array( [[1,1,-1],
+                          [-1,1,1]] )
+
+    preprocessor = ImagePreProcessor(image=image, mask=mask)
+    res = preprocessor.run()
+
+    assert (res==expected).all()
+
+def test_image_preprocessing_resolution_mismatch():
+    preprocessor = ImagePreProcessor(image=np.ones((2, 3)), mask=np.ones((3, 2)))
+
+    with pytest.raises(HoleFillingException):
+        preprocessor.run()
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_to_unit_precision(dtype):
+    values = np.array([0, 1, 128, 255], dtype=np.uint8)
+
+    unit = to_unit(values, dtype)
+
+    assert unit.dtype == dtype
+    assert (from_unit(unit, np.uint8) == values).all()
+    assert (from_unit(to_unit(values.astype(np.uint16) * 257, dtype), np.uint16) ==
+            values.astype(np.uint16) * 257).all()
+
+def test_from_images_keeps_source_dtype(tmp_path):
+    import cv2
+
+    image = (np.arange(12, dtype=np.uint16).reshape(3, 4) * 5000)
+    cv2.imwrite(str(tmp_path / "image.png"), image)
+    cv2.imwrite(str(tmp_path / "mask.png"), np.full((3, 4), 255, dtype=np.uint8))
+
+    color = ImagePreProcessor.from_images(
+        str(tmp_path / "image.png"), str(tmp_path / "mask.png"), color=True
+    )
+    gray = ImagePreProcessor.from_images(
+        str(tmp_path / "image.png"), str(tmp_path / "mask.png")
+    )
+
+    assert color.source_dtype == np.uint16 and gray.source_dtype == np.uint8
+    assert (from_unit(color.image, color.source_dtype) == image).all()
+
+def test_readers_ignore_exif_orientation(tmp_path):
+    import struct
+
+    import cv2
+
+    from hole_filling.image_preprocessor import read_grayscale, read_image
+
+    # A JPEG whose EXIF orientation (6) asks for a 90 degrees rotation
+    _, encoded = cv2.imencode(".jpg", np.zeros((16, 24, 3), dtype=np.uint8))
+    tiff = b"MM\x00*\x00\x00\x00\x08" + struct.pack(">HHHIHHI", 1, 0x0112, 3, 1, 6, 0, 0)
+    exif = b"Exif\x00\x00" + tiff
+    data = encoded.tobytes()
+    path = tmp_path / "rotated.jpg"
+    path.write_bytes(data[:2] + b"\xff\xe1" + struct.pack(">H", len(exif) + 2) + exif + data[2:])
+
+    assert read_image(str(path)).shape[:2] == read_grayscale(str(path)).shape == (16, 24)
@@ -0,0 +1,69 @@
+"""
+Test the incremental module
+"""
+
+# Project specific imports
+import numpy as np
+import pytest
+
+# Package specific imports
+from hole_filling.hole_filing_lib.detection import find_holes_and_boundaries
+from hole_filling.hole_filing_lib.engines import VectorizedEngine
+from hole_filling.hole_filing_lib.incremental import IncrementalFiller
+from hole_filling.hole_filing_lib.models import Connectivity
+from hole_filling.hole_filing_lib.weighting import DefaultWeightMechanism
+
+
+@pytest.fixture(scope="session")
+def weighting():
+    return DefaultWeightMechanism(3, 0.01)
+
+
+def full_fill(source, hole_mask, weighting, connectivity):
+    image = source.copy()
+    image[hole_mask] = -1
+    holes, boundaries = find_holes_and_boundaries(image, connectivity)
+    VectorizedEngine().fill_region(image, weighting, connectivity, holes, boundaries)
+    return image, holes, boundaries
+
+
+@pytest.mark.parametrize("connectivity", [Connectivity.FOUR, Connectivity.EIGHT])
+def test_strokes_match_full_fill(weighting, connectivity):
+    rng = np.random.default_rng(0)
+    source = rng.random((30, 40))
+    filler = IncrementalFiller(source, weighting, connectivity)
+
+    mask = np.zeros(source.shape, dtype=bool)
+    rows, cols = np.mgrid[:30, :40]
+    for row, col, radius, paint in [(10, 10, 4, True), (12, 14, 3, True),
+                                    (20, 30, 3, True), (11, 12, 2, False),
+                                    (0, 39, 3, True), (20, 30, 5, False)]:
+        brush = (rows - row) ** 2 + (cols - col) ** 2 <= radius**2
+        mask = mask | brush if paint else mask & ~brush
+        filler.update(mask)
+
+        expected, holes, boundaries = full_fill(source, mask, weighting, connectivity)
+        assert filler.holes == holes
+        assert filler.boundaries == boundaries
+        assert np.allclose(filler.image, expected, atol=1e-9)
+
+
+def test_apply_delta(weighting):
+    source = np.full((5, 5), 0.5)
+    source[0] = 1.0
+    filler = IncrementalFiller(source, weighting)
+
+    stats = filler.apply_delta(added=[[2, 2], [2, 2]])
+    assert (stats.added_holes, stats.removed_holes) == (1, 0)
+    assert (stats.added_boundaries, stats.removed_boundaries) == (4, 0)
+    assert filler.image[2, 2] == pytest.approx(0.5)
+
+    # Growing the hole up to the bright row: one boundary lost, three gained
+    stats = filler.apply_delta(added=[[1, 2]], removed=[[4, 4]])
+    assert (stats.added_holes, stats.removed_holes) == (1, 0)
+    assert (stats.added_boundaries, stats.removed_boundaries) == (3, 1)
+    assert filler.image[1, 2] > 0.5
+
+    stats = filler.apply_delta(removed=[[1, 2], [2, 2]])
+    assert stats.removed_holes == 2 and not filler.holes
+    assert (filler.image == source).all()
@@ -0,0 +1,90 @@
+"""
+Test the inpainting module
+"""
+
+# Project specific imports
+import numpy as np
+import pytest
+
+# Package specific imports
+from q2_flood_fill import flood_fill
+from hole_filling.exceptions import HoleFillingException
+from hole_filling.hole_filing_lib.detection import find_holes_and_boundaries
+from hole_filling.hole_filing_lib.hole_filler import HoleFiller
+from hole_filling.hole_filing_lib.inpainting import FloodFillEngine, FMMEngine
+from hole_filling.hole_filing_lib.models import Connectivity
+from hole_filling.hole_filing_lib.weighting import DefaultWeightMechanism
+
+
+@pytest.fixture(scope="session")
+def weighting():
+    return DefaultWeightMechanism(3, 0.01)
+
+
+@pytest.fixture
+def image():
+    img = np.random.default_rng(8).random((30, 40))
+    img[5:15, 10:25] = -1
+    img[20:24, 30:33] = -1
+    return img
+
+
+def peel(image, connectivity):
+    # Reference onion peel, one pixel at a time
+    image = image.copy()
+    rows, cols = image.shape
+    offsets = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+    if connectivity == Connectivity.EIGHT:
+        offsets += [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+    while (image == -1).any():
+        known = image != -1
+        layer = {}
+        for row, col in zip(*np.nonzero(~known)):
+            around = [image[row + dr, col + dc] for dr, dc in offsets
+                      if 0 <= row + dr < rows and 0 <= col + dc < cols
+                      and known[row + dr, col + dc]]
+            if around:
+                layer[row, col] = np.mean(around)
+        for (row, col), value in layer.items():
+            image[row, col] = value
+    return image
+
+
+@pytest.mark.parametrize("connectivity", list(Connectivity))
+def test_flood_fill_layers(weighting, image, connectivity):
+    expected = peel(image, connectivity)
+
+    holes, boundaries = find_holes_and_boundaries(image, connectivity)
+    FloodFillEngine().fill_region(image, weighting, connectivity, holes, boundaries)
+
+    assert image == pytest.approx(expected, rel=1e-12)
+
+
+def test_flood_fill_has_no_scan_order(image):
+    flipped = flood_fill(image[::-1, ::-1].copy(), 8)
+    assert flood_fill(image.copy(), 8) == pytest.approx(flipped[::-1, ::-1], rel=1e-12)
+
+
+def test_flood_fill_corner_hole(weighting):
+    image = np.full((4, 4), 0.5)
+    image[:2, :2] = -1
+
+    assert flood_fill(image, 4) == pytest.approx(np.full((4, 4), 0.5))
+
+    image = np.full((2, 2), -1.0)
+    with pytest.raises(HoleFillingException):
+        flood_fill(image)
+
+
+def test_fmm_fills_within_range(weighting, image, tmp_path):
+    known = image[image != -1]
+    hf = HoleFiller(image, weighting, output_directory=str(tmp_path),
+                    engine=FMMEngine(), workers=2, per_component=True)
+    hf.fill()
+
+    assert (image >= known.min() - 1 / 255).all()
+    assert (image <= known.max() + 1 / 255).all()
+    assert hf.parallel_stats is None
+
+    with pytest.raises(HoleFillingException):
+        FMMEngine().compute(weighting, [[0, 0]], [[0, 1]], [0.5])
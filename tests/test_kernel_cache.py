@@ -0,0 +1,109 @@
+"""
+Test the kernel_cache module
+"""
+
+# Project specific imports
+import numpy as np
+import pytest
+
+# Package specific imports
+from hole_filling.hole_filing_lib import kernel_cache as kernel_cache_module
+from hole_filling.hole_filing_lib.hole_filler import HoleFiller
+from hole_filling.hole_filing_lib.engines import VectorizedEngine
+from hole_filling.hole_filing_lib.kernel_cache import KERNEL_CACHE, KernelCache
+from hole_filling.hole_filing_lib.weighting import DefaultWeightMechanism
+
+
+@pytest.fixture
+def kernel_cache():
+    KERNEL_CACHE.clear()
+    yield KERNEL_CACHE
+    KERNEL_CACHE.clear()
+
+
+def test_cache_hits_and_misses():
+    cache = KernelCache()
+    table = cache.get_table(3, 0.01, 10)
+    assert table.shape == (64, 64)
+    assert table[3, 4] == 1 / (5**3 + 0.01)
+
+    assert cache.get_table(3, 0.01, 63) is table
+    assert cache.get_table(3, 0.01, 64).shape == (128, 128)
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 2, 1)
+    assert stats.nbytes == 128 * 128 * 8
+
+
+def test_cache_lru_eviction():
+    cache = KernelCache(max_bytes=2 * 64 * 64 * 8)
+    cache.get_table(2, 0.1, 1)
+    cache.get_table(3, 0.1, 1)
+    cache.get_table(2, 0.1, 1)
+    cache.get_table(4, 0.1, 1)
+
+    assert cache.stats().evictions == 1
+    cache.get_table(2, 0.1, 1)
+    assert cache.stats().hits == 2
+    assert cache.get_table(2, 0.1, 64) is None
+
+
+def test_cached_weights_are_identical(kernel_cache):
+    rng = np.random.default_rng(2)
+    holes = rng.integers(0, 300, (200, 2))
+    boundaries = rng.integers(0, 300, (150, 2))
+
+    cached = DefaultWeightMechanism(3, 0.01).get_weights(holes, boundaries)
+    direct = DefaultWeightMechanism(3, 0.01, use_cache=False).get_weights(
+        holes, boundaries
+    )
+
+    assert np.array_equal(cached, direct)
+    assert kernel_cache.stats().misses == 1
+    assert kernel_cache.stats().entries == 1
+
+
+def test_sparse_pairs_skip_the_table(kernel_cache):
+    # Two pixels far apart: the table would dwarf the weights
+    holes = np.array([[0, 0]])
+    boundaries = np.array([[0, 5000], [1, 5000]])
+
+    cached = DefaultWeightMechanism(3, 0.01).get_weights(holes, boundaries)
+    direct = DefaultWeightMechanism(3, 0.01, use_cache=False).get_weights(
+        holes, boundaries
+    )
+
+    assert np.array_equal(cached, direct)
+    assert kernel_cache.stats().nbytes == 0
+
+    # A table that is already cached is still used
+    kernel_cache.get_table(3, 0.01, 10)
+    assert kernel_cache.get_table(3, 0.01, 10, pairs=1) is not None
+
+
+def test_concurrent_miss_keeps_the_larger_table(monkeypatch):
+    cache = KernelCache()
+    build_table = kernel_cache_module.build_table
+
+    def racing_build(param_z, param_e, size):
+        # Another thread caches a larger table while this one is built
+        monkeypatch.setattr(kernel_cache_module, "build_table", build_table)
+        cache.get_table(param_z, param_e, 100)
+        return build_table(param_z, param_e, size)
+
+    monkeypatch.setattr(kernel_cache_module, "build_table", racing_build)
+
+    assert cache.get_table(3, 0.01, 10).shape == (128, 128)
+    assert cache.get_table(3, 0.01, 100).shape == (128, 128)
+    assert cache.stats().entries == 1
+
+
+def test_cache_shared_across_fillers(kernel_cache, tmp_path):
+    image = np.random.default_rng(3).random((40, 40))
+    image[10:30, 10:30] = -1
+    for _ in range(2):
+        HoleFiller(image.copy(), DefaultWeightMechanism(3, 0.01),
+                   output_directory=str(tmp_path), engine=VectorizedEngine()).fill()
+
+    stats = kernel_cache.stats()
+    assert (stats.misses, stats.hits) == (1, 1)
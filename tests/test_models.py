@@ -0,0 +1,69 @@
+"""
+Test the models module
+"""
+
+# Project specific imports
+import numpy as np
+
+# Package specific imports
+from hole_filling.hole_filing_lib.models import Pixel, PixelSet
+
+
+def test_pixel_set_deduplicates():
+    pixels = PixelSet([2, 0, 2, 1], [1, 3, 1, 0], [0.5, 0.1, 0.9, 0.2])
+
+    assert len(pixels) == 3
+    assert list(pixels) == [Pixel(0, 3, 0.1), Pixel(1, 0, 0.2), Pixel(2, 1, 0.5)]
+
+def test_pixel_set_contains():
+    pixels = PixelSet([1, 4], [2, 0])
+
+    assert Pixel(1, 2, -1) in pixels
+    assert Pixel(4, 0, -1) in pixels
+    assert Pixel(1, 2, 0.5) not in pixels
+    assert Pixel(2, 1, -1) not in pixels
+    assert (1, 2) not in pixels
+
+def test_pixel_set_behaves_like_a_set():
+    pixels = PixelSet([1, 4], [2, 0], [0.5, 1])
+
+    assert pixels == {Pixel(1, 2, 0.5), Pixel(4, 0, 1)}
+    assert not pixels - {Pixel(1, 2, 0.5), Pixel(4, 0, 1)}
+    assert pixels - {Pixel(4, 0, 1)} == PixelSet([1], [2], [0.5])
+
+def test_pixel_set_from_mask():
+    image = np.array([[0.1, 0.2], [0.3, 0.4]])
+    mask = np.array([[False, True], [True, False]])
+
+    pixels = PixelSet.from_mask(mask, image)
+
+    assert pixels.coords.tolist() == [[0, 1], [1, 0]]
+    assert pixels.values.tolist() == [0.2, 0.3]
+    assert pixels.nbytes == 2 * (4 + 4 + 8)
+
+def test_pixel_set_channels():
+    image = np.arange(12, dtype=np.float64).reshape(2, 2, 3)
+    mask = np.array([[False, True], [True, False]])
+
+    pixels = PixelSet.from_mask(mask, image)
+
+    assert pixels.values.shape == (2, 3)
+    assert PixelSet(pixels.rows, pixels.columns, pixels.values).values.shape == (2, 3)
+    assert Pixel(0, 1, np.array([3.0, 4.0, 5.0])) in pixels
+    assert [pixel.value for pixel in pixels] == [(3, 4, 5), (6, 7, 8)]
+    assert len(set(pixels)) == 2
+
+def test_pixel_set_operators():
+    a = PixelSet([0, 1, 2, 3], [0, 1, 2, 3], [0.1, 0.2, 0.3, 0.4])
+    b = PixelSet([1, 2, 5], [1, 2, 5], [0.2, 0.9, 0.5])
+
+    # (2, 2) has a different value in b, so it isn't a shared pixel
+    assert a & b == PixelSet([1], [1], [0.2])
+    assert a - b == PixelSet([0, 2, 3], [0, 2, 3], [0.1, 0.3, 0.4])
+    assert len(a | b) == 6 and (a | b) >= a and (a | b) >= b
+    assert len(a ^ b) == 5 and (a ^ b) == (a - b) | (b - a)
+    assert a | (a & b) == a and isinstance(a | (a & b), PixelSet)
+    assert a.merge(b) == PixelSet([0, 1, 2, 3, 5], [0, 1, 2, 3, 5],
+                                  [0.1, 0.2, 0.3, 0.4, 0.5])
+    assert a <= a and not a <= b and a & b <= b
+    assert a - set(b) == a - b
@@ -0,0 +1,109 @@
+"""
+Test the pipeline module
+"""
+
+# Project specific imports
+import cv2
+import numpy as np
+import pytest
+
+# Package specific imports
+from hole_filling.pipeline import fill_image
+
+
+@pytest.fixture()
+def pair(tmp_path):
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (60, 80)).astype(np.uint8)
+    mask = np.full((60, 80), 255, dtype=np.uint8)
+    mask[20:26, 30:33] = 0
+    mask[40, 50:55] = 0
+    cv2.imwrite(str(tmp_path / "image.png"), image)
+    cv2.imwrite(str(tmp_path / "mask.png"), mask)
+    return str(tmp_path / "image.png"), str(tmp_path / "mask.png")
+
+
+def fill(pair, tmp_path, name, **kwargs):
+    output = str(tmp_path / name)
+    fill_image(*pair, 3, 0.01, 8, output_path=output, **kwargs)
+    return cv2.imread(output, cv2.IMREAD_GRAYSCALE)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{}, {"per_component": True}, {"engine": "vectorized"}, {"engine": "fmm"}],
+)
+def test_roi_is_identical(pair, tmp_path, options):
+    full = fill(pair, tmp_path, "full.png", roi=False, **options)
+    window = fill(pair, tmp_path, "roi.png", **options)
+
+    assert (window == full).all()
+
+
+def test_roi_window(pair, tmp_path):
+    filler = fill_image(
+        *pair, 3, 0.01, 8, output_path=str(tmp_path / "out.png"), profile=True
+    )
+
+    preprocess = filler.profile["stages"][1]
+    assert preprocess["window"] == (42 - 19) * (56 - 29)
+    assert len(filler.holes) == 6 * 3 + 5
+
+
+def test_roi_without_holes(pair, tmp_path):
+    cv2.imwrite(pair[1], np.full((60, 80), 255, dtype=np.uint8))
+
+    filled = fill(pair, tmp_path, "out.png")
+
+    assert (filled == cv2.imread(pair[0], cv2.IMREAD_GRAYSCALE)).all()
+
+
+@pytest.mark.parametrize("channels, dtype", [(3, np.uint8), (4, np.uint16)])
+def test_color_keeps_channels_and_depth(pair, tmp_path, channels, dtype):
+    rng = np.random.default_rng(1)
+    scale = np.iinfo(dtype).max
+    image = rng.integers(0, scale + 1, (60, 80, channels)).astype(dtype)
+    cv2.imwrite(pair[0], image)
+
+    output = str(tmp_path / "color.png")
+    fill_image(*pair, 3, 0.01, 8, output_path=output, engine="vectorized")
+    filled = cv2.imread(output, cv2.IMREAD_UNCHANGED)
+
+    assert filled.shape == image.shape
+    assert filled.dtype == dtype
+    holes = cv2.imread(pair[1], cv2.IMREAD_GRAYSCALE) < 128
+    assert (filled[~holes] == image[~holes]).all()
+    for channel in range(channels):
+        cv2.imwrite(pair[0], image[:, :, channel])
+        fill_image(*pair, 3, 0.01, 8, output_path=output, engine="vectorized")
+        gray = cv2.imread(output, cv2.IMREAD_UNCHANGED)
+        assert (filled[:, :, channel] == gray).all()
+
+
+def test_grayscale_option(pair, tmp_path):
+    image = np.random.default_rng(1).integers(0, 256, (60, 80, 3)).astype(np.uint8)
+    cv2.imwrite(pair[0], image)
+
+    output = str(tmp_path / "gray.png")
+    fill_image(*pair, 3, 0.01, 8, output_path=output, grayscale=True)
+
+    assert cv2.imread(output, cv2.IMREAD_UNCHANGED).shape == (60, 80)
+
+
+@pytest.mark.parametrize("options", [{"engine": "vectorized"}, {"pyramid_levels": 2}])
+def test_float32_matches_float64(pair, tmp_path, options):
+    single = fill(pair, tmp_path, "single.png", **options)
+    double = fill(pair, tmp_path, "double.png", precision="float64", **options)
+
+    assert np.abs(single.astype(int) - double).max() <= 1
+    assert (single == double).mean() > 0.999
+
+
+def test_save_writes_only_the_holes(pair, tmp_path):
+    filler = fill_image(*pair, 3, 0.01, 8, output_path=str(tmp_path / "out.png"))
+    filled = cv2.imread(filler.output_path, cv2.IMREAD_GRAYSCALE)
+    image = cv2.imread(pair[0], cv2.IMREAD_GRAYSCALE)
+
+    changed = np.argwhere(filled != image)
+    holes = {(row + 19, col + 29) for row, col in filler.holes.coords.tolist()}
+    assert {tuple(pixel) for pixel in changed.tolist()} <= holes
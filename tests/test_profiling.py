@@ -0,0 +1,75 @@
+"""
+Test the profiling module
+"""
+
+# Project specific imports
+import numpy as np
+
+# Package specific imports
+from hole_filling.hole_filing_lib.engines import VectorizedEngine
+from hole_filling.hole_filing_lib.hole_filler import HoleFiller
+from hole_filling.hole_filing_lib.profiling import (
+    NULL_PROFILER,
+    Profiler,
+    format_profile,
+)
+from hole_filling.hole_filing_lib.weighting import DefaultWeightMechanism
+
+
+def test_profiler_stage():
+    profiler = Profiler()
+    with profiler.stage("alloc", 100) as counters:
+        data = np.ones(1_000_000)
+        counters["items"] = len(data)
+
+    (stage,) = profiler.stages
+    assert (stage.name, stage.pixels, stage.counters) == (
+        "alloc",
+        100,
+        {"items": 1_000_000},
+    )
+    assert stage.seconds > 0 and stage.pixels_per_second > 0
+    assert stage.peak_bytes >= data.nbytes
+
+
+def test_null_profiler():
+    with NULL_PROFILER.stage("nothing") as counters:
+        counters["items"] = 1
+
+    assert NULL_PROFILER.stages == []
+    assert not NULL_PROFILER.enabled
+
+
+def test_hole_filler_profile(tmp_path):
+    image = np.random.default_rng(4).random((30, 30))
+    image[10:20, 10:20] = -1
+
+    hf = HoleFiller(
+        image,
+        DefaultWeightMechanism(3, 0.01),
+        output_directory=str(tmp_path),
+        engine=VectorizedEngine(),
+        profiler=Profiler(trace_memory=False),
+    )
+    hf.fill()
+
+    profile = hf.profile
+    assert [stage["name"] for stage in profile["stages"]] == ["detect", "fill", "save"]
+    assert profile["stages"][0]["holes"] == 100
+    assert profile["stages"][1]["pixels"] == 100
+    assert profile["total_seconds"] > 0
+
+    lines = list(format_profile(profile))
+    assert len(lines) == 5 and lines[-1].startswith("total")
+    assert len(list(format_profile(profile, as_json=True))) == 3
+
+
+def test_hole_filler_without_profile(tmp_path):
+    image = np.full((5, 5), 0.5)
+    image[2, 2] = -1
+    hf = HoleFiller(
+        image, DefaultWeightMechanism(3, 0.01), output_directory=str(tmp_path)
+    )
+    hf.fill()
+
+    assert hf.profile == {}
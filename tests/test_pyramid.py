@@ -0,0 +1,65 @@
+"""
+Test the pyramid module
+"""
+
+# Project specific imports
+import numpy as np
+import pytest
+
+# Package specific imports
+from hole_filling.hole_filing_lib.hole_filler import HoleFiller
+from hole_filling.hole_filing_lib.engines import VectorizedEngine
+from hole_filling.hole_filing_lib.models import Connectivity
+from hole_filling.hole_filing_lib.pyramid import downsample, pyramid_fill
+from hole_filling.hole_filing_lib.weighting import DefaultWeightMechanism
+
+
+@pytest.fixture(scope="session")
+def weighting():
+    return DefaultWeightMechanism(3, 0.01)
+
+
+@pytest.fixture
+def image():
+    rows, cols = np.mgrid[:197, :220]
+    img = (np.sin(rows / 30) + np.cos(cols / 40) + 2) / 4
+    img[(rows - 98) ** 2 + (cols - 110) ** 2 < 60**2] = -1
+    return img
+
+
+def exact_fill(image, weighting, tmp_path):
+    filled = image.copy()
+    HoleFiller(filled, weighting, connectivity=Connectivity.EIGHT,
+               output_directory=str(tmp_path), engine=VectorizedEngine()).fill()
+    return filled
+
+
+def test_downsample():
+    image = np.array([[0.2, 0.4, 0.5],
+                      [0.6, 0.8, -1],
+                      [0.6, -1, 0.8]])
+
+    expected = np.array([[0.5, -1],
+                         [-1, 0.8]])
+    assert downsample(image) == pytest.approx(expected)
+
+
+def test_pyramid_wide_band_is_exact(weighting, image, tmp_path):
+    expected = exact_fill(image, weighting, tmp_path)
+
+    filled = image.copy()
+    pyramid_fill(filled, weighting, Connectivity.EIGHT, levels=2, band=100)
+
+    assert filled == pytest.approx(expected, rel=1e-12)
+
+
+def test_pyramid_approximates(weighting, image, tmp_path):
+    expected = exact_fill(image, weighting, tmp_path)
+
+    filled = image.copy()
+    hf = HoleFiller(filled, weighting, connectivity=Connectivity.EIGHT,
+                    output_directory=str(tmp_path), pyramid_levels=2, pyramid_band=2)
+    hf.fill()
+
+    assert (filled != -1).all()
+    assert np.abs(filled - expected).max() < 0.005
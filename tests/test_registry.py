@@ -0,0 +1,74 @@
+"""
+Test the registry module
+"""
+
+# Project specific imports
+import numpy as np
+import pytest
+
+# Package specific imports
+from hole_filling.exceptions import HoleFillingException
+from hole_filling.hole_filing_lib import registry
+from hole_filling.hole_filing_lib.convolution import FFTEngine
+from hole_filling.hole_filing_lib.engines import VectorizedEngine
+from hole_filling.hole_filing_lib.models import Connectivity
+from hole_filling.pipeline import resolve_engine
+
+
+def test_create_engine():
+    assert isinstance(registry.create_engine("fft"), FFTEngine)
+    assert {"vectorized", "fft", "quadtree", "flood", "fmm"} <= set(
+        registry.engine_names()
+    )
+    with pytest.raises(HoleFillingException):
+        registry.create_engine("magic")
+
+
+def test_select_engine_exact():
+    small = registry.select_engine(10, 20, 64)
+    assert small.name == "vectorized"
+    assert set(small.estimates) == {"vectorized", "fft"}
+    assert "flood" in small.reason
+
+    assert registry.select_engine(200_000, 2_000, 250_000).name == "fft"
+
+
+def test_select_engine_accuracy_and_memory():
+    choice = registry.select_engine(200_000, 2_000, 250_000, accuracy=1.0)
+    assert choice.name == "flood"
+
+    choice = registry.select_engine(200_000, 2_000, 250_000, memory=70 * 2**20)
+    assert choice.name == "vectorized"
+
+    with pytest.raises(HoleFillingException):
+        registry.select_engine(200_000, 2_000, 250_000, memory=1024)
+
+
+def test_resolve_engine(capsys):
+    image = np.full((20, 20), 0.5)
+    image[5:8, 5:9] = -1
+
+    engine = resolve_engine("auto", image, Connectivity.EIGHT)
+    assert isinstance(engine, VectorizedEngine)
+    assert "Engine: vectorized (auto: 12 holes" in capsys.readouterr().out
+
+    assert resolve_engine(None, image, Connectivity.EIGHT) is None
+
+
+def test_vectorized_budget():
+    from hole_filling.hole_filing_lib import engines
+
+    memory = registry.get_engine_spec("vectorized").memory
+    assert memory(10, 10, 100) == 10 * 10 * 32
+    assert memory(10**6, 10**6, 100) == engines.DEFAULT_MEMORY_BUDGET
+
+
+def test_select_engine_fft_precision():
+    # 300x300 bounding box around a 260x260 hole
+    sizes = (67_600, 1_040, 90_000)
+    assert registry.select_engine(*sizes).name == "fft"
+
+    for param_z, param_e in ((5, 1e-9), (8, 0.01)):
+        choice = registry.select_engine(*sizes, param_z=param_z, param_e=param_e)
+        assert choice.name == "vectorized"
+        assert "fft (error" in choice.reason
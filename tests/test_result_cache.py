@@ -0,0 +1,69 @@
+"""
+Test the result_cache module
+"""
+
+# Builtin imports
+import os
+
+# Project specific imports
+import cv2
+import numpy as np
+
+# Package specific imports
+from hole_filling.pipeline import fill_image
+from hole_filling.result_cache import ResultCache, result_key
+
+
+def test_result_key():
+    image = np.zeros((4, 5), dtype=np.uint8)
+    mask = np.full((4, 5), 255, dtype=np.uint8)
+    key = result_key(image, mask, {"z": 3, "e": 0.01})
+
+    assert key == result_key(image.copy(), mask, {"e": 0.01, "z": 3})
+    assert key != result_key(image, mask, {"z": 2, "e": 0.01})
+    assert key != result_key(image.reshape(5, 4), mask.reshape(5, 4), {"z": 3, "e": 0.01})
+    image[1, 1] = 1
+    assert key != result_key(image, mask, {"z": 3, "e": 0.01})
+
+
+def test_get_put_evict(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=250)
+    for name in "abc":
+        (tmp_path / name).write_bytes(name.encode() * 100)
+
+    assert not cache.get("a", str(tmp_path / "out"))
+    cache.put("a", str(tmp_path / "a"))
+    cache.put("b", str(tmp_path / "b"))
+    os.utime(cache.path("a"), (1, 1))
+    os.utime(cache.path("b"), (2, 2))
+
+    # Reading a refreshes it, b is now the least recently used
+    assert cache.get("a", str(tmp_path / "out"))
+    assert (tmp_path / "out").read_bytes() == b"a" * 100
+    cache.put("c", str(tmp_path / "c"))
+
+    assert not os.path.exists(cache.path("b"))
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions) == (1, 1, 1)
+    assert (stats.entries, stats.nbytes) == (2, 200)
+
+
+def test_fill_image_cache(tmp_path):
+    image = np.random.default_rng(0).integers(0, 256, (20, 30)).astype(np.uint8)
+    mask = np.full((20, 30), 255, dtype=np.uint8)
+    mask[5:9, 10:14] = 0
+    cv2.imwrite(str(tmp_path / "image.png"), image)
+    cv2.imwrite(str(tmp_path / "mask.png"), mask)
+    paths = str(tmp_path / "image.png"), str(tmp_path / "mask.png")
+    cache = ResultCache(str(tmp_path / "cache"))
+
+    filler = fill_image(*paths, 3, 0.01, 8, output_path=str(tmp_path / "a.png"), cache=cache)
+    assert filler is not None
+    filler = fill_image(*paths, 3, 0.01, 8, output_path=str(tmp_path / "b.png"), cache=cache)
+    assert filler is None
+    filler = fill_image(*paths, 3, 0.01, 4, output_path=str(tmp_path / "c.png"), cache=cache)
+    assert filler is not None
+
+    assert (tmp_path / "a.png").read_bytes() == (tmp_path / "b.png").read_bytes()
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 2, 2)
@@ -0,0 +1,151 @@
+"""
+Test the server module, on localhost
+"""
+
+# Builtin imports
+import asyncio
+import base64
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Project specific imports
+import cv2
+import numpy as np
+
+# Package specific imports
+from hole_filling.pipeline import fill_frame
+from hole_filling.server import FillServer
+
+
+def make_request(seed, connectivity=8):
+    image = np.random.default_rng(seed).integers(0, 256, (20, 30)).astype(np.uint8)
+    mask = np.full((20, 30), 255, dtype=np.uint8)
+    mask[5:9, 10:14] = 0
+    body = {
+        "image": base64.b64encode(cv2.imencode(".png", image)[1]).decode(),
+        "mask": base64.b64encode(cv2.imencode(".png", mask)[1]).decode(),
+        "z": 3,
+        "e": 0.01,
+        "connectivity": connectivity,
+    }
+    return image, mask, json.dumps(body).encode()
+
+
+async def http(port, method, path, body=b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+
+    head, _, content = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ")[1])
+    return status, content
+
+
+class SlowExecutor(ThreadPoolExecutor):
+    """Keeps the worker busy long enough for the queue to fill up"""
+
+    def submit(self, fn, *args, **kwargs):
+        def slow():
+            time.sleep(0.2)
+            return fn(*args, **kwargs)
+
+        return super().submit(slow)
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 30))
+
+
+def test_fill_batches_and_stats():
+    async def scenario():
+        server = FillServer(port=0, workers=1, max_batch=8, batch_window=0.05,
+                            executor=ThreadPoolExecutor(1))
+        await server.start()
+        try:
+            requests = [make_request(seed, 8 if seed < 6 else 4) for seed in range(8)]
+            responses = await asyncio.gather(
+                *(http(server.port, "POST", "/fill", body) for _, _, body in requests)
+            )
+            _, stats = await http(server.port, "GET", "/stats")
+            bad = await http(server.port, "POST", "/fill", b'{"image": "x"}')
+            missing = await http(server.port, "GET", "/nothing")
+        finally:
+            await server.stop()
+        return requests, responses, json.loads(stats), bad, missing
+
+    requests, responses, stats, bad, missing = run(scenario())
+
+    for (image, mask, body), (status, content) in zip(requests, responses):
+        assert status == 200
+        filled = cv2.imdecode(np.frombuffer(content, np.uint8), cv2.IMREAD_GRAYSCALE)
+        connectivity = json.loads(body)["connectivity"]
+        assert (filled == fill_frame(image, mask, 3, 0.01, connectivity)).all()
+
+    # Two parameter sets: at most one batch each once the window has passed
+    assert stats["completed"] == 8 and stats["batches"] == 2
+    assert stats["queue_depth"] == 0
+    assert stats["latency_ms"]["p50"] <= stats["latency_ms"]["p99"]
+    assert bad[0] == 400 and missing[0] == 404
+
+
+def test_backpressure():
+    async def scenario():
+        server = FillServer(port=0, queue_size=2, max_batch=1, batch_window=0,
+                            executor=SlowExecutor(1))
+        await server.start()
+        try:
+            _, _, body = make_request(0)
+            statuses = await asyncio.gather(
+                *(http(server.port, "POST", "/fill", body) for _ in range(6))
+            )
+            stats = server.stats()
+        finally:
+            await server.stop()
+        return [status for status, _ in statuses], stats
+
+    statuses, stats = run(scenario())
+
+    # Two requests in the queue, maybe one more already on the worker
+    assert statuses.count(200) in (2, 3)
+    assert statuses.count(200) + statuses.count(503) == 6
+    assert stats["rejected"] == statuses.count(503)
+    assert stats["completed"] == statuses.count(200)
+
+
+class BrokenExecutor(ThreadPoolExecutor):
+    """Fails every submission, like a pool whose workers died"""
+
+    def submit(self, fn, *args, **kwargs):
+        raise RuntimeError("the pool is broken")
+
+
+def test_failures_status():
+    async def scenario():
+        server = FillServer(port=0, batch_window=0, executor=BrokenExecutor(1))
+        await server.start()
+        try:
+            broken = await http(server.port, "POST", "/fill", make_request(0)[2])
+        finally:
+            await server.stop()
+
+        server = FillServer(port=0, batch_window=0, executor=ThreadPoolExecutor(1))
+        await server.start()
+        try:
+            body = json.loads(make_request(0)[2])
+            body["image"] = base64.b64encode(b"not an image").decode()
+            invalid = await http(server.port, "POST", "/fill", json.dumps(body).encode())
+        finally:
+            await server.stop()
+        return broken, invalid
+
+    broken, invalid = run(scenario())
+
+    # Failures of the pool are the server's fault, bad payloads the client's
+    assert broken[0] == 500 and b"the pool is broken" in broken[1]
+    assert invalid[0] == 400
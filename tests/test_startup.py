@@ -0,0 +1,44 @@
+"""
+Test that the command line starts without the heavy imports
+"""
+
+# Builtin imports
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs the command line in process, then prints the heavy modules it imported
+SCRIPT = """
+import runpy, sys
+sys.argv = ["hole_filling"] + sys.argv[1:]
+try:
+    runpy.run_module("hole_filling", run_name="__main__")
+except SystemExit:
+    pass
+print(sorted(name for name in ("cv2", "numpy") if name in sys.modules))
+"""
+
+
+def run(*argv: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT, *argv],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.splitlines()[-1]
+
+
+def test_help_is_light():
+    assert run("-h") == "[]"
+
+
+def test_invalid_arguments_are_light():
+    assert run("image.png", "mask.png", "3", "0.01", "6") == "[]"
+
+
+def test_registry_is_light():
+    assert run("batch", "-h") == "[]"
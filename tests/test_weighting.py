@@ -3,13 +3,38 @@
 """
 
 # Project specific imports
+import numpy as np
 import pytest
 
 # Package specific imports
-from hole_filling.hole_filing_lib.weighting import DefaultWeightMechanism
+from hole_filling.hole_filing_lib.weighting import (
+    AbstractWeightingMechanism,
+    DefaultWeightMechanism,
+)
 from hole_filling.hole_filing_lib.models import Pixel
 
 def test_default_weighting():
     dwm = DefaultWeightMechanism(2, 0.1)
     weight = dwm.get_weight(Pixel(1,2,1), Pixel(2,3,1))
     assert weight == pytest.approx(0.4761, rel=1e-3)
+
+def test_default_batched_weighting():
+    dwm = DefaultWeightMechanism(3, 0.01)
+    holes = np.array([(1, 2), (4, 4)])
+    boundaries = np.array([(0, 2), (2, 3), (5, 1)])
+
+    weights = dwm.get_weights(holes, boundaries)
+
+    assert weights.shape == (2, 3)
+    for i, (hr, hc) in enumerate(holes):
+        for j, (br, bc) in enumerate(boundaries):
+            expected = dwm.get_weight(Pixel(hr, hc, -1), Pixel(br, bc, 1))
+            assert weights[i, j] == pytest.approx(expected, rel=1e-12)
+
+def test_batched_weighting_fallback():
+    class ManhattanWeighting(AbstractWeightingMechanism):
+        def get_weight(self, hole, boundary):
+            return 1 / (abs(hole.row - boundary.row) + abs(hole.column - boundary.column))
+
+    weights = ManhattanWeighting().get_weights(np.array([(0, 0)]), np.array([(1, 1), (0, 4)]))
+    assert weights.tolist() == [[0.5, 0.25]]